@@ -1,9 +1,236 @@
+import argparse
 from src.components.user_interface.depth_estimation_app import DepthEstimationApp
+from src.components.user_interface.depth_server import DepthServer
+from src.components.processing.batch_processor import BatchDepthProcessor
+from src.components.processing.metrics import create_metrics, SINK_NAMES
+from src.components.processing.inference_scheduler import InferenceScheduler
+from src.components.processing.multi_stream import MultiStreamEngine, VideoStream
+from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+from src.components.processing.autotuner import Autotuner, DEFAULT_CACHE_PATH
+from src.components.processing.model_registry import ModelRegistry
+from src.components.processing.point_cloud import PointCloudProjector
+from src.components.user_interface.frame_publisher import FramePublisher
+
+def parse_args():
+    """
+    Interpreta los argumentos de la línea de comandos.
+
+    Returns:
+        argparse.Namespace: Argumentos de la aplicación.
+    """
+    parser = argparse.ArgumentParser(description="Estimación de fondo monocular")
+    parser.add_argument("--model", default="src/tensorflow_models/lite_models/monocular-depth-estimation2.0_fp16.tflite",
+                        help="Ruta al modelo TFLite")
+    parser.add_argument("--source", default="0",
+                        help="Índice de la cámara o ruta de un archivo de video")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Ejecutar captura, inferencia, post-procesamiento y grabación en hilos independientes")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="Capacidad de las colas entre etapas del pipeline")
+    parser.add_argument("--overflow-policy", choices=("drop_oldest", "block"), default=None,
+                        help="Política de desbordamiento de las colas (por defecto según la fuente)")
+    parser.add_argument("--input", default=None,
+                        help="Modo offline: archivo de video o directorio de imágenes a procesar sin cámara")
+    parser.add_argument("--output", default="output",
+                        help="Directorio de resultados del modo offline")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Cantidad de frames por inferencia en el modo offline")
+    parser.add_argument("--output-format", choices=BatchDepthProcessor.OUTPUT_FORMATS, default="npy",
+                        help="Formato de resultados del modo offline")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Cantidad de procesos del pool de intérpretes en el modo offline")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Cantidad de hilos de cada intérprete (por defecto los del entorno de TFLite, "
+                             "y 1 por proceso del pool en el modo offline)")
+    parser.add_argument("--metrics", nargs="*", choices=SINK_NAMES, default=[],
+                        help="Destinos de las métricas por etapa (desactivadas si no se indica ninguno)")
+    parser.add_argument("--metrics-json", default="metrics.json",
+                        help="Archivo del destino de métricas 'json'")
+    parser.add_argument("--metrics-port", type=int, default=9100,
+                        help="Puerto local del destino de métricas 'prometheus'")
+    parser.add_argument("--metrics-interval", type=float, default=5.0,
+                        help="Segundos entre publicaciones de los destinos 'log' y 'json'")
+    parser.add_argument("--skip-threshold", type=float, default=None,
+                        help="Reutilizar la profundidad mientras el cambio entre frames (0-1) no supere este umbral")
+    parser.add_argument("--max-staleness", type=int, default=15,
+                        help="Frames consecutivos máximos que reutilizan la misma profundidad")
+    parser.add_argument("--max-inference-fps", type=float, default=None,
+                        help="Tasa máxima de inferencias por segundo al omitir frames")
+    parser.add_argument("--range-smoothing", type=float, default=None,
+                        help="Suavizado temporal (0-1] del rango de profundidad del mapa de colores")
+    parser.add_argument("--record-mode", choices=("video", "depth", "both"), default="video",
+                        help="Grabar el video combinado, la profundidad sin procesar en float16 o ambos")
+    parser.add_argument("--sources", nargs="+", default=None,
+                        help="Modo multi-fuente: índices de cámara o rutas de video que comparten un intérprete")
+    parser.add_argument("--resolution", type=int, choices=(1, 2, 3, 4), default=2,
+                        help="Opción de resolución de las cámaras del modo multi-fuente")
+    parser.add_argument("--max-batch", type=int, default=None,
+                        help="Frames por inferencia de los modos multi-fuente (por defecto la cantidad de fuentes) "
+                             "y servidor (por defecto 4)")
+    parser.add_argument("--latency-budget-ms", type=float, default=200.0,
+                        help="Latencia máxima por frame desde la captura hasta el resultado en el modo multi-fuente")
+    parser.add_argument("--batch-wait-ms", type=float, default=10.0,
+                        help="Espera máxima para completar un lote en los modos multi-fuente y servidor")
+    parser.add_argument("--record", action="store_true",
+                        help="Grabar cada flujo del modo multi-fuente")
+    parser.add_argument("--no-display", action="store_true",
+                        help="No abrir ventanas en el modo multi-fuente")
+    parser.add_argument("--serve", action="store_true",
+                        help="Modo servidor: exponer el modelo por HTTP local con agrupamiento dinámico")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección del modo servidor")
+    parser.add_argument("--port", type=int, default=8080, help="Puerto del modo servidor")
+    parser.add_argument("--unix-socket", default=None,
+                        help="Socket Unix del modo servidor, en lugar de TCP")
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="Solicitudes en curso a partir de las cuales el servidor responde 503")
+    parser.add_argument("--autotune", action="store_true",
+                        help="Elegir modelo, hilos y XNNPACK midiendo al iniciar (resultado guardado en caché)")
+    parser.add_argument("--autotune-budget-ms", type=float, default=None,
+                        help="Latencia p95 máxima por inferencia para el autoajuste")
+    parser.add_argument("--autotune-cache", default=DEFAULT_CACHE_PATH,
+                        help="Archivo de caché del autoajuste")
+    parser.add_argument("--retune", action="store_true",
+                        help="Ignorar el caché y repetir el autoajuste")
+    parser.add_argument("--latest-frame", action="store_true",
+                        help="Capturar en un hilo que conserva solo el frame más reciente de la cámara")
+    parser.add_argument("--pixel-format", default="auto",
+                        help="Formato de píxel de la cámara (MJPG, YUYV...) o 'auto' para negociarlo")
+    parser.add_argument("--camera-fps", type=float, default=None,
+                        help="Tasa de cuadros solicitada a la cámara")
+    parser.add_argument("--camera-buffer-size", type=int, default=1,
+                        help="Frames que puede retener el controlador de la cámara")
+    parser.add_argument("--replay", action="store_true",
+                        help="Reproducir un archivo de video a su tasa original, como una cámara")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="Modelos intercambiables durante la ejecución con la tecla 'm' o SIGUSR1 "
+                             "(ruta, opcionalmente con @ANCHOxALTO si el modelo es totalmente convolucional); "
+                             "el primero es el inicial")
+    parser.add_argument("--model-memory-mb", type=float, default=None,
+                        help="Memoria máxima de los modelos cargados; se descartan los usados hace más tiempo")
+    parser.add_argument("--point-cloud", choices=("ply", "npy"), default=None,
+                        help="Grabar (sin preguntar) también la nube de puntos de cada frame, en PLY binario o bloques .npy")
+    parser.add_argument("--intrinsics", type=float, nargs=4, default=None, metavar=("FX", "FY", "CX", "CY"),
+                        help="Intrínsecos de la cámara en píxeles de la resolución de captura")
+    parser.add_argument("--fov", type=float, default=60.0,
+                        help="Campo de visión horizontal en grados, si no se indican los intrínsecos")
+    parser.add_argument("--point-stride", type=int, default=1,
+                        help="Usar un píxel de profundidad de cada N en filas y columnas")
+    parser.add_argument("--voxel-size", type=float, default=None,
+                        help="Promediar los puntos de cada vóxel de este tamaño")
+    parser.add_argument("--depth-scale", type=float, default=1.0,
+                        help="Factor que convierte la salida del modelo a unidades de distancia")
+    parser.add_argument("--publish", default=None, metavar="NOMBRE",
+                        help="Publicar cada frame y su profundidad en un anillo de memoria compartida con este nombre")
+    parser.add_argument("--publish-slots", type=int, default=8,
+                        help="Posiciones del anillo de memoria compartida")
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    # Inicializar la aplicacion
-    app = DepthEstimationApp(
-        "src/tensorflow_models/lite_models/monocular-depth-estimation2.0_fp16.tflite"
-    )
-    # Empezar con la ejecucion
-    app.run()
+    args = parse_args()
+    num_threads = None
+    use_xnnpack = True
+    camera_options = {
+        'latest_only': args.latest_frame,
+        'pixel_format': args.pixel_format,
+        'frame_rate': args.camera_fps,
+        'buffer_size': args.camera_buffer_size,
+        'replay': args.replay,
+    }
+    if args.autotune and args.input is None:
+        # El modo offline conserva --threads y --workers, que reparten la CPU entre procesos
+        autotuner = Autotuner(
+            latency_budget=args.autotune_budget_ms / 1000 if args.autotune_budget_ms is not None else None,
+            cache_path=args.autotune_cache
+        )
+        choice = autotuner.tune(force=args.retune)
+        args.model = choice['model_path']
+        args.threads = num_threads = choice['num_threads']
+        use_xnnpack = choice['use_xnnpack']
+    if args.input is not None:
+        # Modo offline, sin interacción con el usuario
+        processor = BatchDepthProcessor(
+            args.model,
+            batch_size=args.batch_size,
+            output_format=args.output_format,
+            num_workers=args.workers,
+            num_threads=args.threads
+        )
+        processor.run(args.input, args.output)
+    elif args.serve:
+        server = DepthServer(
+            TFLiteModelInterpreter(model_path=args.model, num_threads=args.threads, use_xnnpack=use_xnnpack),
+            max_batch=args.max_batch or 4,
+            max_wait=args.batch_wait_ms / 1000,
+            max_pending=args.max_pending
+        )
+        server.run(host=args.host, port=args.port, unix_socket=args.unix_socket)
+    elif args.sources is not None:
+        # Modo multi-fuente: un único intérprete compartido por todos los flujos
+        streams = []
+        for index, source in enumerate(args.sources):
+            stream = VideoStream(
+                f"fuente{index}",
+                int(source) if source.isdigit() else source,
+                resolution_option=args.resolution,
+                queue_size=args.queue_size,
+                overflow_policy=args.overflow_policy,
+                range_smoothing=args.range_smoothing,
+                camera_options=camera_options
+            )
+            if args.record:
+                stream.start_recording(record_mode=args.record_mode)
+            streams.append(stream)
+        engine = MultiStreamEngine(
+            TFLiteModelInterpreter(model_path=args.model, num_threads=args.threads, use_xnnpack=use_xnnpack),
+            streams,
+            max_batch=args.max_batch,
+            latency_budget=args.latency_budget_ms / 1000,
+            max_wait=args.batch_wait_ms / 1000,
+            metrics=create_metrics(args.metrics, json_path=args.metrics_json, port=args.metrics_port,
+                                   log_interval=args.metrics_interval)
+        )
+        engine.run(display=not args.no_display)
+    else:
+        source = int(args.source) if args.source.isdigit() else args.source
+        scheduler = None
+        if args.skip_threshold is not None:
+            scheduler = InferenceScheduler(
+                threshold=args.skip_threshold,
+                max_staleness=args.max_staleness,
+                max_inference_fps=args.max_inference_fps
+            )
+        metrics = create_metrics(args.metrics, json_path=args.metrics_json, port=args.metrics_port,
+                                 log_interval=args.metrics_interval)
+        model_registry = None
+        if args.models is not None:
+            model_registry = ModelRegistry(args.models, max_memory_mb=args.model_memory_mb,
+                                           num_threads=num_threads, use_xnnpack=use_xnnpack, metrics=metrics)
+            model_registry.install_signal_handler()
+        point_cloud = None
+        if args.point_cloud is not None:
+            point_cloud = PointCloudProjector(intrinsics=args.intrinsics, fov=args.fov, stride=args.point_stride,
+                                              voxel_size=args.voxel_size, depth_scale=args.depth_scale)
+        publisher = None
+        if args.publish is not None:
+            publisher = FramePublisher(args.publish, num_slots=args.publish_slots)
+        # Inicializar la aplicacion
+        app = DepthEstimationApp(
+            args.model,
+            source=source,
+            pipelined=args.pipeline,
+            queue_size=args.queue_size,
+            overflow_policy=args.overflow_policy,
+            metrics=metrics,
+            scheduler=scheduler,
+            range_smoothing=args.range_smoothing,
+            record_mode=args.record_mode,
+            num_threads=num_threads,
+            use_xnnpack=use_xnnpack,
+            camera_options=camera_options,
+            model_registry=model_registry,
+            point_cloud=point_cloud,
+            point_cloud_format=args.point_cloud or 'ply',
+            publisher=publisher
+        )
+        # Empezar con la ejecucion
+        app.run()
@@ -0,0 +1,320 @@
+"""
+Suite de benchmarks reproducible sobre los modelos, el video y las imágenes incluidos en el
+repositorio. No requiere cámara ni pantalla. Mide por separado cada etapa del procesamiento
+(decodificación, preprocesamiento, inferencia, normalización/mapa de colores, combinación y
+codificación) para cada modelo y opción de resolución, guarda los percentiles en JSON y falla
+si alguna etapa empeora respecto a una línea base más allá del umbral configurado.
+
+Uso:
+    python -m src.benchmarks.benchmark_suite --output bench.json
+    python -m src.benchmarks.benchmark_suite --save-baseline baseline.json
+    python -m src.benchmarks.benchmark_suite --baseline baseline.json --threshold 0.10
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import cv2
+from src.components.processing.camera_manager import CameraManager
+from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+from src.components.processing.video_processor import VideoProcessor
+
+STAGES = ('decode', 'preprocess', 'invoke', 'normalize', 'hstack', 'encode')
+LITE_MODELS_DIR = "src/tensorflow_models/lite_models"
+SAVED_MODELS_DIR = "src/tensorflow_models/SavedModels"
+DEFAULT_VIDEO = "src/videos/2024-05-26_16.54.56.mp4"
+DEFAULT_IMAGES = "src/examples"
+
+class SavedModelRunner:
+    """
+    Adaptador que ejecuta un SavedModel de Keras con la misma interfaz de TFLiteModelInterpreter,
+    para comparar ambos formatos en la etapa de inferencia.
+
+    Attributes:
+        model (tf.keras.Model): Modelo cargado.
+        input_height (int): Alto de la entrada del modelo.
+        input_width (int): Ancho de la entrada del modelo.
+    """
+    def __init__(self, model_path):
+        """
+        Carga el SavedModel especificado.
+
+        Args:
+            model_path (str): Ruta al directorio del SavedModel.
+        """
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        _, self.input_height, self.input_width, _ = self.model.inputs[0].shape
+        self._input = None
+        self._output = None
+
+    def set_input_tensor(self, frame):
+        """
+        Preprocesa el frame a float32 en el rango [0, 1].
+
+        Args:
+            frame (ndarray): Frame de video a procesar.
+        """
+        resized = cv2.resize(frame, (self.input_width, self.input_height))
+        self._input = resized[np.newaxis].astype(np.float32) / 255.0
+
+    def invoke(self):
+        """
+        Ejecuta el modelo sobre la última entrada.
+        """
+        self._output = self.model(self._input, training=False)
+
+    def get_output_tensor(self):
+        """
+        Devuelve la salida de la última inferencia.
+
+        Returns:
+            ndarray: Salida del modelo.
+        """
+        return np.asarray(self._output)[0]
+
+def discover_models(include_saved_models):
+    """
+    Busca los modelos incluidos en el repositorio.
+
+    Args:
+        include_saved_models (bool): Si es True, incluye también los SavedModels.
+
+    Returns:
+        list: Tuplas (nombre, tipo, ruta), con tipo 'tflite' o 'saved_model'.
+    """
+    models = [(os.path.basename(path), 'tflite', path)
+              for path in sorted(glob.glob(os.path.join(LITE_MODELS_DIR, "*.tflite")))]
+    if include_saved_models:
+        models += [(os.path.basename(path), 'saved_model', path)
+                   for path in sorted(glob.glob(os.path.join(SAVED_MODELS_DIR, "*")))
+                   if os.path.isdir(path)]
+    return models
+
+def frame_reader(input_kind, video_path, images_dir):
+    """
+    Crea una función que decodifica el siguiente frame de la entrada, volviendo al inicio
+    cuando se agota, para que todas las corridas procesen la misma secuencia.
+
+    Args:
+        input_kind (str): 'video' o 'images'.
+        video_path (str): Ruta del video.
+        images_dir (str): Directorio de imágenes.
+
+    Returns:
+        tuple: Función sin argumentos que devuelve el siguiente frame, y función para liberar
+        los recursos.
+
+    Raises:
+        ValueError: Si la entrada no está disponible.
+    """
+    if input_kind == 'video':
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Error: No se pudo abrir el video {video_path}.")
+
+        def read_video():
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+            return frame
+
+        return read_video, cap.release
+
+    paths = sorted(glob.glob(os.path.join(images_dir, "*.jpg")))
+    if not paths:
+        raise ValueError(f"Error: No hay imágenes en {images_dir}.")
+    position = [0]
+
+    def read_image():
+        frame = cv2.imread(paths[position[0] % len(paths)])
+        position[0] += 1
+        return frame
+
+    return read_image, lambda: None
+
+def percentiles(samples):
+    """
+    Resume una lista de latencias.
+
+    Args:
+        samples (list): Latencias en segundos.
+
+    Returns:
+        dict: Media, p50, p95, p99 y máximo en milisegundos.
+    """
+    values = 1000 * np.asarray(samples)
+    return {
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max()),
+    }
+
+def run_case(model, input_kind, resolution_option, frames, warmup, video_path, images_dir, work_dir):
+    """
+    Mide todas las etapas para un modelo, una entrada y una resolución.
+
+    Args:
+        model (object): Intérprete con set_input_tensor, invoke y get_output_tensor.
+        input_kind (str): 'video' o 'images'.
+        resolution_option (int): Opción de resolución de CameraManager.
+        frames (int): Cantidad de frames medidos.
+        warmup (int): Cantidad de frames de calentamiento no medidos.
+        video_path (str): Ruta del video.
+        images_dir (str): Directorio de imágenes.
+        work_dir (str): Directorio temporal para el video codificado.
+
+    Returns:
+        dict: Percentiles de cada etapa.
+    """
+    width, height = CameraManager.RESOLUTIONS[resolution_option]
+    processor = VideoProcessor()
+    read_frame, release = frame_reader(input_kind, video_path, images_dir)
+    writer = cv2.VideoWriter(os.path.join(work_dir, f"bench_{resolution_option}.mp4"),
+                             cv2.VideoWriter_fourcc(*'mp4v'), 30.0, (2 * width, height))
+    samples = {stage: [] for stage in STAGES}
+    try:
+        for i in range(warmup + frames):
+            timings = []
+            start = time.perf_counter()
+            # Decodificar y llevar el frame a la resolución que entregaría la cámara
+            frame = cv2.resize(read_frame(), (width, height))
+            timings.append(time.perf_counter())
+            model.set_input_tensor(frame=frame)
+            timings.append(time.perf_counter())
+            model.invoke()
+            output_data = model.get_output_tensor()
+            timings.append(time.perf_counter())
+            combined = processor.prepare_output(frame.shape)
+            processor.colorize_into(output_data=output_data, out=combined[:, width:])
+            timings.append(time.perf_counter())
+            np.copyto(combined[:, :width], frame)
+            timings.append(time.perf_counter())
+            writer.write(combined)
+            timings.append(time.perf_counter())
+            if i < warmup:
+                continue
+            for stage, end in zip(STAGES, timings):
+                samples[stage].append(end - start)
+                start = end
+    finally:
+        writer.release()
+        release()
+    return {stage: percentiles(values) for stage, values in samples.items()}
+
+def compare_with_baseline(results, baseline, threshold, metric, min_ms):
+    """
+    Compara los resultados con una línea base.
+
+    Args:
+        results (dict): Resultados actuales por caso y etapa.
+        baseline (dict): Resultados de la línea base por caso y etapa.
+        threshold (float): Empeoramiento relativo máximo permitido (0.10 = 10%).
+        metric (str): Percentil comparado ('p50', 'p95' o 'p99').
+        min_ms (float): Latencia mínima de la línea base para comparar una etapa, evitando
+                        falsos positivos en etapas demasiado rápidas para medirse con precisión.
+
+    Returns:
+        list: Descripciones de las regresiones encontradas.
+    """
+    regressions = []
+    for case, stages in results.items():
+        if case not in baseline:
+            continue
+        for stage, stats in stages.items():
+            reference = baseline[case].get(stage, {}).get(metric)
+            if reference is None or reference < min_ms:
+                continue
+            change = stats[metric] / reference - 1
+            if change > threshold:
+                regressions.append(f"{case} {stage}: {metric} {reference:.2f} ms -> "
+                                   f"{stats[metric]:.2f} ms (+{100 * change:.0f}%)")
+    return regressions
+
+def environment():
+    """
+    Describe el entorno de ejecución para que los resultados sean comparables.
+
+    Returns:
+        dict: Plataforma, procesador, CPUs y versiones de las bibliotecas.
+    """
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+
+def main():
+    """
+    Ejecuta la suite, guarda los resultados y termina con código 1 si hay regresiones.
+    """
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de estimación de profundidad")
+    parser.add_argument("--frames", type=int, default=100, help="Frames medidos por caso")
+    parser.add_argument("--warmup", type=int, default=10, help="Frames de calentamiento por caso")
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[1, 2, 3, 4],
+                        choices=sorted(CameraManager.RESOLUTIONS))
+    parser.add_argument("--inputs", nargs="+", default=['video', 'images'], choices=['video', 'images'])
+    parser.add_argument("--video", default=DEFAULT_VIDEO)
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--num-threads", type=int, default=None, help="Hilos del intérprete TFLite")
+    parser.add_argument("--saved-models", action="store_true", help="Incluir los SavedModels")
+    parser.add_argument("--output", default="bench_results.json", help="Archivo JSON de resultados")
+    parser.add_argument("--save-baseline", default=None, help="Guardar los resultados como línea base")
+    parser.add_argument("--baseline", default=None, help="Línea base con la que comparar")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Empeoramiento relativo permitido")
+    parser.add_argument("--metric", choices=['p50', 'p95', 'p99'], default='p50')
+    parser.add_argument("--min-ms", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, kind, path in discover_models(args.saved_models):
+            if kind == 'tflite':
+                model = TFLiteModelInterpreter(model_path=path, num_threads=args.num_threads)
+            else:
+                model = SavedModelRunner(path)
+            for input_kind in args.inputs:
+                for resolution_option in args.resolutions:
+                    case = f"{name}/{input_kind}/{resolution_option}"
+                    results[case] = run_case(model, input_kind, resolution_option, args.frames, args.warmup,
+                                             args.video, args.images, work_dir)
+                    summary = ", ".join(f"{stage} {stats[args.metric]:.2f}" for stage, stats in results[case].items())
+                    print(f"{case}: {summary} ms ({args.metric})")
+
+    report = {
+        'environment': environment(),
+        'config': {'frames': args.frames, 'warmup': args.warmup, 'num_threads': args.num_threads},
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Línea base guardada en {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare_with_baseline(results, baseline, args.threshold, args.metric, args.min_ms)
+        if regressions:
+            print(f"Regresiones mayores a {100 * args.threshold:.0f}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("Sin regresiones respecto a la línea base")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Mide el arranque en frío de la aplicación: el tiempo desde que se lanza el proceso hasta que se
+obtiene el primer frame de profundidad coloreado, y el pico de memoria residente (RSS) del
+proceso. Cada medición se ejecuta en un proceso nuevo que reproduce el arranque de
+`python main.py`: importa el módulo principal, construye el intérprete (con su inferencia de
+calentamiento), lee el primer frame del video incluido y lo procesa.
+
+Con --runtimes se compara el arranque con cada entorno de TFLite instalado (ai_edge_litert,
+tflite_runtime o tensorflow), forzado mediante la variable MONODEPTH_TFLITE_RUNTIME.
+
+Uso:
+    python -m src.benchmarks.cold_start --runs 5
+    python -m src.benchmarks.cold_start --runtimes tflite_runtime tensorflow
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+DEFAULT_MODEL = "src/tensorflow_models/lite_models/monocular-depth-estimation2.0_fp16.tflite"
+DEFAULT_VIDEO = "src/videos/2024-05-26_16.54.56.mp4"
+
+def child(model_path, video_path):
+    """
+    Arranque medido, ejecutado en el proceso hijo. Imprime en JSON las marcas de tiempo de
+    cada fase y el pico de RSS.
+
+    Args:
+        model_path (str): Ruta del modelo TFLite.
+        video_path (str): Ruta del video usado como fuente.
+    """
+    import resource
+    marks = {'start': time.time()}
+    import main  # noqa: F401  (mismas importaciones que la aplicación)
+    from src.components.processing.camera_manager import CameraManager
+    from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+    from src.components.processing.video_processor import VideoProcessor
+    marks['imports'] = time.time()
+    model = TFLiteModelInterpreter(model_path=model_path)
+    marks['model'] = time.time()
+    camera_manager = CameraManager(source=video_path)
+    video_processor = VideoProcessor()
+    frame = camera_manager.get_frame()
+    marks['first_frame'] = time.time()
+    model.set_input_tensor(frame=frame)
+    model.invoke()
+    output_data = model.get_output_view()
+    video_processor.normalize_output(output_data=output_data, frame=frame)
+    del output_data
+    marks['first_depth'] = time.time()
+    camera_manager.release()
+    # En Linux ru_maxrss se expresa en KB
+    marks['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    marks['runtime'] = model.runtime
+    print(json.dumps(marks))
+
+def measure(model_path, video_path, runtime):
+    """
+    Lanza un proceso nuevo y mide su arranque.
+
+    Args:
+        model_path (str): Ruta del modelo TFLite.
+        video_path (str): Ruta del video.
+        runtime (str): Entorno de TFLite forzado, o None para el de preferencia.
+
+    Returns:
+        dict: Duración de cada fase en segundos, pico de RSS y entorno utilizado.
+
+    Raises:
+        RuntimeError: Si el proceso hijo falla.
+    """
+    env = dict(os.environ)
+    if runtime is not None:
+        env['MONODEPTH_TFLITE_RUNTIME'] = runtime
+    launched = time.time()
+    result = subprocess.run([sys.executable, "-m", "src.benchmarks.cold_start", "--child",
+                             "--model", model_path, "--video", video_path],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "Error en el proceso hijo")
+    marks = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        'interpreter_start_s': marks['start'] - launched,
+        'imports_s': marks['imports'] - marks['start'],
+        'model_load_s': marks['model'] - marks['imports'],
+        'first_frame_s': marks['first_frame'] - marks['model'],
+        'first_inference_s': marks['first_depth'] - marks['first_frame'],
+        'time_to_first_depth_s': marks['first_depth'] - launched,
+        'peak_rss_mb': marks['peak_rss_mb'],
+        'runtime': marks['runtime'],
+    }
+
+def main():
+    """
+    Ejecuta las mediciones y muestra la mediana de cada fase.
+    """
+    parser = argparse.ArgumentParser(description="Arranque en frío: tiempo al primer frame de profundidad y RSS")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--video", default=DEFAULT_VIDEO)
+    parser.add_argument("--runs", type=int, default=3, help="Procesos lanzados por entorno")
+    parser.add_argument("--runtimes", nargs="+", default=[None],
+                        choices=['ai_edge_litert', 'tflite_runtime', 'tensorflow'],
+                        help="Entornos de TFLite a comparar (por defecto el de preferencia)")
+    parser.add_argument("--output", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.model, args.video)
+        return
+
+    report = {}
+    for runtime in args.runtimes:
+        try:
+            runs = [measure(args.model, args.video, runtime) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{runtime or 'Entorno por defecto'}: {e}")
+            continue
+        name = runs[0]['runtime']
+        summary = {key: float(np.median([run[key] for run in runs])) for key in runs[0] if key != 'runtime'}
+        report[name] = summary
+        print(f"{name}: primer frame de profundidad en {summary['time_to_first_depth_s']:.2f} s "
+              f"(inicio {summary['interpreter_start_s']:.2f} s, importaciones {summary['imports_s']:.2f} s, "
+              f"modelo {summary['model_load_s']:.2f} s, primer frame {summary['first_frame_s']:.3f} s, "
+              f"primera inferencia {summary['first_inference_s']:.3f} s), pico de RSS {summary['peak_rss_mb']:.0f} MB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Generador de carga para el servidor de profundidad. Abre varias conexiones concurrentes que
+envían en bucle las imágenes de src/examples y reporta el rendimiento, la latencia de cola y
+las solicitudes rechazadas por el control de admisión.
+
+El servidor debe estar en ejecución, por ejemplo:
+    python main.py --serve --max-batch 4 --batch-wait-ms 5
+
+Uso:
+    python -m src.benchmarks.depth_server_load --concurrency 16 --requests 500
+    python -m src.benchmarks.depth_server_load --unix-socket /tmp/depth.sock --format color
+"""
+import argparse
+import asyncio
+import glob
+import io
+import os
+import time
+import numpy as np
+import cv2
+
+# El cliente no importa el intérprete, por lo que puede ejecutarse sin TensorFlow
+DEFAULT_IMAGES = "src/examples"
+
+def load_payloads(images_dir, raw):
+    """
+    Prepara los cuerpos de las solicitudes a partir de las imágenes del directorio.
+
+    Args:
+        images_dir (str): Directorio con imágenes JPEG.
+        raw (bool): Si es True se envían arrays .npy decodificados en lugar de los JPEG.
+
+    Returns:
+        tuple: Lista de cuerpos y su tipo de contenido.
+
+    Raises:
+        ValueError: Si el directorio no contiene imágenes.
+    """
+    paths = sorted(glob.glob(os.path.join(images_dir, "*.jpg")))
+    if not paths:
+        raise ValueError(f"Error: No hay imágenes en {images_dir}.")
+    if not raw:
+        payloads = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                payloads.append(f.read())
+        return payloads, 'image/jpeg'
+    payloads = []
+    for path in paths:
+        buffer = io.BytesIO()
+        np.save(buffer, cv2.imread(path))
+        payloads.append(buffer.getvalue())
+    return payloads, 'application/x-npy'
+
+async def read_response(reader):
+    """
+    Lee una respuesta HTTP/1.1 con Content-Length.
+
+    Args:
+        reader (asyncio.StreamReader): Flujo de lectura de la conexión.
+
+    Returns:
+        tuple: Código de estado, cabeceras en minúsculas y cuerpo.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers, body
+
+async def client(args, payloads, content_type, counter, results):
+    """
+    Conexión que envía solicitudes hasta agotar el total compartido.
+
+    Args:
+        args (argparse.Namespace): Configuración de la carga.
+        payloads (list): Cuerpos de las solicitudes.
+        content_type (str): Tipo de contenido de los cuerpos.
+        counter (list): Contador compartido de solicitudes enviadas.
+        results (dict): Latencias de las respuestas correctas y contadores por código de estado.
+    """
+    if args.unix_socket:
+        reader, writer = await asyncio.open_unix_connection(args.unix_socket)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while counter[0] < args.requests:
+            index = counter[0]
+            counter[0] += 1
+            body = payloads[index % len(payloads)]
+            request = (f"POST /depth?format={args.format} HTTP/1.1\r\n"
+                       f"Host: {args.host}\r\n"
+                       f"Content-Type: {content_type}\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1')
+            start = time.perf_counter()
+            writer.write(request + body)
+            await writer.drain()
+            status, headers, _ = await read_response(reader)
+            elapsed = time.perf_counter() - start
+            results['status'][status] = results['status'].get(status, 0) + 1
+            if status == 200:
+                results['latencies'].append(elapsed)
+            elif status == 503:
+                # Respetar la contrapresión del servidor antes de reintentar
+                await asyncio.sleep(args.backoff)
+            if headers.get('connection') == 'close':
+                break
+    finally:
+        writer.close()
+
+async def run_load(args):
+    """
+    Lanza las conexiones concurrentes y espera a que terminen.
+
+    Args:
+        args (argparse.Namespace): Configuración de la carga.
+
+    Returns:
+        tuple: Resultados y duración total en segundos.
+    """
+    payloads, content_type = load_payloads(args.images, args.raw)
+    results = {'latencies': [], 'status': {}}
+    counter = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args, payloads, content_type, counter, results)
+                           for _ in range(args.concurrency)))
+    return results, time.perf_counter() - start
+
+def main():
+    """
+    Ejecuta la carga y muestra el rendimiento y los percentiles de latencia.
+    """
+    parser = argparse.ArgumentParser(description="Generador de carga para el servidor de profundidad")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix-socket", default=None, help="Conectarse por un socket Unix en lugar de TCP")
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--raw", action="store_true", help="Enviar arrays .npy en lugar de JPEG")
+    parser.add_argument("--format", choices=['float16', 'png16', 'color'], default='float16')
+    parser.add_argument("--concurrency", type=int, default=8, help="Conexiones concurrentes")
+    parser.add_argument("--requests", type=int, default=200, help="Solicitudes totales")
+    parser.add_argument("--backoff", type=float, default=0.05,
+                        help="Espera tras un rechazo por sobrecarga, en segundos")
+    args = parser.parse_args()
+
+    results, elapsed = asyncio.run(run_load(args))
+    latencies = results['latencies']
+    ok = len(latencies)
+    print(f"{ok} respuestas correctas en {elapsed:.2f} s ({ok / elapsed:.1f} solicitudes/s) "
+          f"con {args.concurrency} conexiones")
+    print(f"Códigos de estado: {dict(sorted(results['status'].items()))}")
+    if latencies:
+        values = 1000 * np.asarray(latencies)
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        print(f"Latencia: media {values.mean():.1f} ms, p50 {p50:.1f} ms, p95 {p95:.1f} ms, "
+              f"p99 {p99:.1f} ms, máx {values.max():.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Evaluación del planificador de inferencias sobre el video incluido en el repositorio. Para cada
+umbral compara la profundidad reutilizada con la que se obtendría infiriendo en todos los
+frames, y reporta la fracción de inferencias omitidas, el tiempo de CPU ahorrado y el error
+introducido.
+
+Uso:
+    python -m src.benchmarks.frame_skipping_eval --thresholds 0.01 0.02 0.05 --max-staleness 15
+"""
+import argparse
+import time
+import numpy as np
+from src.components.processing.inference_scheduler import InferenceScheduler
+from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+from src.benchmarks.preprocess_benchmark import load_frames, DEFAULT_MODEL, DEFAULT_VIDEO
+
+def reference_depths(model, frames):
+    """
+    Ejecuta el modelo en todos los frames.
+
+    Args:
+        model (TFLiteModelInterpreter): Intérprete del modelo.
+        frames (list): Frames del video.
+
+    Returns:
+        tuple: Lista de profundidades y tiempo medio de inferencia por frame en segundos.
+    """
+    depths = []
+    start = time.perf_counter()
+    for frame in frames:
+        model.set_input_tensor(frame=frame)
+        model.invoke()
+        depths.append(model.get_output_tensor())
+    return depths, (time.perf_counter() - start) / len(frames)
+
+def evaluate(frames, depths, inference_time, threshold, max_staleness):
+    """
+    Simula el planificador sobre el video usando las profundidades de referencia.
+
+    Args:
+        frames (list): Frames del video.
+        depths (list): Profundidad de referencia de cada frame.
+        inference_time (float): Tiempo medio de inferencia por frame, en segundos.
+        threshold (float): Umbral de cambio del planificador.
+        max_staleness (int): Frames consecutivos máximos sin inferencia.
+
+    Returns:
+        dict: Fracción omitida, tiempo ahorrado, costo del detector y error relativo de la
+        profundidad reutilizada (media y p95).
+    """
+    scheduler = InferenceScheduler(threshold=threshold, max_staleness=max_staleness)
+    errors = []
+    detector_time = 0.0
+    for frame, depth in zip(frames, depths):
+        start = time.perf_counter()
+        infer = scheduler.should_infer(frame)
+        detector_time += time.perf_counter() - start
+        if infer:
+            scheduler.store_depth(depth, copy=False)
+        # Error relativo al rango de profundidad del frame
+        depth_range = float(depth.max() - depth.min()) or 1.0
+        errors.append(float(np.abs(scheduler.depth - depth).mean()) / depth_range)
+    stats = scheduler.stats()
+    saved = stats['skipped'] * inference_time - detector_time
+    return {
+        'skip_ratio': stats['skip_ratio'],
+        'saved_s': saved,
+        'saved_ratio': saved / (len(frames) * inference_time),
+        'detector_ms': 1000 * detector_time / len(frames),
+        'mean_error': float(np.mean(errors)),
+        'p95_error': float(np.percentile(errors, 95)),
+    }
+
+def main():
+    """
+    Ejecuta la evaluación para cada umbral y muestra los resultados como tabla.
+    """
+    parser = argparse.ArgumentParser(description="Evaluación de la omisión de frames")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--video", default=DEFAULT_VIDEO)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.005, 0.01, 0.02, 0.05])
+    parser.add_argument("--max-staleness", type=int, default=15)
+    args = parser.parse_args()
+
+    model = TFLiteModelInterpreter(model_path=args.model)
+    frames = load_frames(args.video, args.frames)
+    depths, inference_time = reference_depths(model, frames)
+    print(f"{len(frames)} frames, inferencia media {1000 * inference_time:.1f} ms")
+    print(f"{'umbral':>8} {'omitidos':>9} {'CPU ahorrada':>13} {'detector':>10} {'error medio':>12} {'error p95':>10}")
+    for threshold in args.thresholds:
+        result = evaluate(frames, depths, inference_time, threshold, args.max_staleness)
+        print(f"{threshold:>8.3f} {100 * result['skip_ratio']:>8.0f}% {100 * result['saved_ratio']:>12.0f}% "
+              f"{result['detector_ms']:>8.2f}ms {100 * result['mean_error']:>11.2f}% {100 * result['p95_error']:>9.2f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Reporte de escalado del InterpreterPool sobre el video incluido en el repositorio. Mide el
+rendimiento con 1..K procesos y la aceleración respecto a un solo proceso.
+
+Uso:
+    python -m src.benchmarks.interpreter_pool_scaling --max-workers 8 --frames 300
+"""
+import argparse
+import os
+import time
+from src.components.processing.interpreter_pool import InterpreterPool
+from src.benchmarks.preprocess_benchmark import load_frames, DEFAULT_MODEL, DEFAULT_VIDEO
+
+def measure_pool(model_path, frames, num_workers, num_threads):
+    """
+    Mide el rendimiento del pool con una cantidad de procesos dada. La carga del modelo queda
+    fuera de la medición.
+
+    Args:
+        model_path (str): Ruta al archivo del modelo TFLite.
+        frames (list): Frames a procesar.
+        num_workers (int): Cantidad de procesos del pool.
+        num_threads (int): Cantidad de hilos del intérprete de cada proceso.
+
+    Returns:
+        float: Frames por segundo.
+    """
+    with InterpreterPool(model_path, frames[0].shape, num_workers=num_workers,
+                         num_threads=num_threads) as pool:
+        # Calentamiento: una inferencia por proceso
+        for _ in pool.map(frames[:num_workers]):
+            pass
+        start = time.perf_counter()
+        for _ in pool.map(frames):
+            pass
+        elapsed = time.perf_counter() - start
+    return len(frames) / elapsed
+
+def main():
+    """
+    Ejecuta el reporte de escalado y lo muestra como tabla.
+    """
+    parser = argparse.ArgumentParser(description="Escalado del pool de intérpretes")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--video", default=DEFAULT_VIDEO)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=1, help="Hilos del intérprete por proceso")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    print(f"{len(frames)} frames, {args.threads} hilo(s) por proceso, {os.cpu_count()} CPUs")
+    print(f"{'procesos':>8} {'FPS':>8} {'aceleración':>12} {'eficiencia':>11}")
+    baseline = None
+    for num_workers in range(1, args.max_workers + 1):
+        fps = measure_pool(args.model, frames, num_workers, args.threads)
+        baseline = baseline or fps
+        speedup = fps / baseline
+        print(f"{num_workers:>8} {fps:>8.1f} {speedup:>11.2f}x {100 * speedup / num_workers:>10.0f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Mide el costo por frame de la retroproyección a nubes de puntos y de su escritura, para
+comprobar que la etapa sigue el ritmo de una cámara de 480p. Se usa una profundidad sintética
+(un plano inclinado con ruido) y un frame aleatorio, de modo que no se necesita el modelo.
+
+Uso:
+    python -m src.benchmarks.point_cloud_benchmark
+    python -m src.benchmarks.point_cloud_benchmark --depth-size 640 480 --stride 2 --voxel-size 0.05 --format npy
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from src.components.processing.point_cloud import PointCloudProjector
+from src.components.storage.point_cloud_writer import PointCloudWriter
+
+def synthetic_depth(width, height, seed=0):
+    """
+    Genera una profundidad sintética: un plano inclinado entre 1 y 5 con ruido.
+
+    Args:
+        width (int): Ancho de la profundidad.
+        height (int): Alto de la profundidad.
+        seed (int): Semilla del ruido.
+
+    Returns:
+        ndarray: Profundidad float32 con forma (1, alto, ancho, 1), como la salida del modelo.
+    """
+    rng = np.random.default_rng(seed)
+    plane = np.linspace(1.0, 5.0, height, dtype=np.float32)[:, np.newaxis] * np.ones(width, dtype=np.float32)
+    depth = plane + rng.normal(0, 0.02, size=(height, width)).astype(np.float32)
+    return depth[np.newaxis, :, :, np.newaxis]
+
+def main():
+    """
+    Ejecuta la medición y muestra la latencia por frame de cada fase.
+    """
+    parser = argparse.ArgumentParser(description="Costo de la retroproyección y escritura de nubes de puntos")
+    parser.add_argument("--depth-size", type=int, nargs=2, default=(640, 480), metavar=("ANCHO", "ALTO"),
+                        help="Resolución de la profundidad")
+    parser.add_argument("--image-size", type=int, nargs=2, default=(640, 480), metavar=("ANCHO", "ALTO"),
+                        help="Resolución del frame de la cámara")
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--voxel-size", type=float, default=None)
+    parser.add_argument("--format", choices=PointCloudWriter.FORMATS, default='ply')
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--camera-fps", type=float, default=30.0, help="Tasa de la cámara a sostener")
+    args = parser.parse_args()
+
+    width, height = args.depth_size
+    image = np.random.default_rng(1).integers(0, 256, size=(args.image_size[1], args.image_size[0], 3),
+                                              dtype=np.uint8)
+    depth = synthetic_depth(width, height)
+    projector = PointCloudProjector(image_size=args.image_size, stride=args.stride, voxel_size=args.voxel_size)
+    projector.project(depth, image=image)  # La grilla de rayos se calcula en la primera llamada
+
+    project_times, write_times = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        writer = PointCloudWriter(os.path.join(directory, "points"), file_format=args.format)
+        for i in range(args.frames):
+            start = time.perf_counter()
+            points, colors = projector.project(depth, image=image)
+            middle = time.perf_counter()
+            writer.write(points, colors, frame_number=i)
+            project_times.append(middle - start)
+            write_times.append(time.perf_counter() - middle)
+        writer.close()
+        points_per_frame = writer.points_written / writer.frames_written
+
+    project_ms = 1000 * np.asarray(project_times)
+    write_ms = 1000 * np.asarray(write_times)
+    total_ms = project_ms + write_ms
+    budget_ms = 1000 / args.camera_fps
+    print(f"Profundidad {width}x{height}, paso {args.stride}, vóxel {args.voxel_size}, formato {args.format}: "
+          f"{points_per_frame:.0f} puntos/frame")
+    print(f"  Retroproyección: p50 {np.percentile(project_ms, 50):.2f} ms, p95 {np.percentile(project_ms, 95):.2f} ms")
+    print(f"  Escritura: p50 {np.percentile(write_ms, 50):.2f} ms, p95 {np.percentile(write_ms, 95):.2f} ms")
+    p95 = np.percentile(total_ms, 95)
+    print(f"  Total p95 {p95:.2f} ms por frame; presupuesto a {args.camera_fps:.0f} FPS: {budget_ms:.1f} ms "
+          f"({'se sostiene' if p95 <= budget_ms else 'no se sostiene'})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Genera variantes cuantizadas de los modelos a partir de los SavedModels incluidos y las compara
+con los modelos fp16 de referencia.
+
+Para cada SavedModel se producen dos variantes en lite_models:
+    *_dynamic.tflite: cuantización de rango dinámico (pesos int8, activaciones en float).
+    *_int8.tflite: cuantización entera completa, con entrada y salida int8, calibrada con un
+                   conjunto representativo de imágenes de src/examples y frames del video.
+
+Las imágenes de ejemplo y el video incluidos son salidas combinadas de la aplicación, por lo que
+se usa su mitad izquierda, que contiene el frame original. Los frames del video se reparten
+entre calibración y evaluación, de modo que el error se mide con frames no vistos durante la
+calibración.
+
+El reporte compara para cada variante el tamaño del archivo, la latencia de inferencia y el
+error de profundidad respecto al modelo fp16 (error absoluto medio relativo al rango de
+profundidad de la referencia, el mismo criterio que frame_skipping_eval).
+
+Uso:
+    python -m src.benchmarks.quantize_models
+    python -m src.benchmarks.quantize_models --models monocular-depth-estimation3.0 --report quant.json
+    python -m src.benchmarks.quantize_models --skip-conversion
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import numpy as np
+import cv2
+from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+
+SAVED_MODELS_DIR = "src/tensorflow_models/SavedModels"
+LITE_MODELS_DIR = "src/tensorflow_models/lite_models"
+DEFAULT_VIDEO = "src/videos/2024-05-26_16.54.56.mp4"
+DEFAULT_IMAGES = "src/examples"
+VARIANTS = ('fp16', 'dynamic', 'int8')
+
+def original_half(image):
+    """
+    Extrae el frame original de una imagen combinada (frame a la izquierda, profundidad
+    coloreada a la derecha).
+
+    Args:
+        image (ndarray): Imagen combinada.
+
+    Returns:
+        ndarray: Mitad izquierda de la imagen.
+    """
+    return np.ascontiguousarray(image[:, :image.shape[1] // 2])
+
+def load_dataset(images_dir, video_path, video_frames):
+    """
+    Carga las imágenes de calibración y de evaluación. Las imágenes de ejemplo y los frames
+    pares del video se usan para calibrar; los frames impares, para evaluar.
+
+    Args:
+        images_dir (str): Directorio de imágenes de ejemplo.
+        video_path (str): Ruta del video.
+        video_frames (int): Cantidad de frames del video a muestrear.
+
+    Returns:
+        tuple: Frames de calibración y frames de evaluación.
+
+    Raises:
+        ValueError: Si no se encontraron frames.
+    """
+    examples = [original_half(cv2.imread(path)) for path in sorted(glob.glob(os.path.join(images_dir, "*.jpg")))]
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    step = max(total // video_frames, 1) if total > 0 else 1
+    sampled = []
+    index = 0
+    while len(sampled) < video_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % step == 0:
+            sampled.append(original_half(frame))
+        index += 1
+    cap.release()
+    calibration = examples + sampled[0::2]
+    evaluation = sampled[1::2] or examples
+    if not calibration:
+        raise ValueError("Error: No hay frames para el conjunto representativo.")
+    return calibration, evaluation
+
+def convert(saved_model_path, variant, input_shape, calibration):
+    """
+    Convierte un SavedModel a TFLite con la cuantización indicada. La forma de la entrada se
+    fija a la del modelo fp16 para que la calibración y el modelo resultante sean equivalentes.
+
+    Args:
+        saved_model_path (str): Ruta del SavedModel.
+        variant (str): 'dynamic' o 'int8'.
+        input_shape (tuple): Forma (1, alto, ancho, canales) de la entrada.
+        calibration (list): Frames BGR del conjunto representativo.
+
+    Returns:
+        bytes: Modelo TFLite serializado.
+
+    Raises:
+        ValueError: Si el SavedModel no incluye los pesos.
+    """
+    if not glob.glob(os.path.join(saved_model_path, "variables", "variables.data-*")):
+        raise ValueError(f"Error: {saved_model_path} no incluye los pesos (variables.data-*).")
+    import tensorflow as tf
+    model = tf.keras.models.load_model(saved_model_path, compile=False)
+    function = tf.function(lambda x: model(x, training=False))
+    concrete = function.get_concrete_function(tf.TensorSpec(input_shape, tf.float32))
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == 'int8':
+        _, height, width, _ = input_shape
+
+        def representative_dataset():
+            # Mismo preprocesamiento que TFLiteModelInterpreter: BGR escalado a [0, 1]
+            for frame in calibration:
+                resized = cv2.resize(frame, (width, height))
+                yield [resized[np.newaxis].astype(np.float32) / 255.0]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+def evaluate(model_path, frames, reference, num_threads, warmup):
+    """
+    Mide la latencia y el error de profundidad de un modelo.
+
+    Args:
+        model_path (str): Ruta del modelo TFLite.
+        frames (list): Frames de evaluación.
+        reference (list): Profundidades del modelo fp16 para los mismos frames, o None.
+        num_threads (int): Hilos del intérprete.
+        warmup (int): Inferencias de calentamiento no medidas.
+
+    Returns:
+        tuple: Métricas del modelo y lista de profundidades calculadas.
+    """
+    model = TFLiteModelInterpreter(model_path=model_path, num_threads=num_threads)
+    for frame in frames[:warmup]:
+        model.set_input_tensor(frame=frame)
+        model.invoke()
+    latencies = []
+    depths = []
+    for frame in frames:
+        start = time.perf_counter()
+        model.set_input_tensor(frame=frame)
+        model.invoke()
+        depth = model.get_output_tensor()
+        latencies.append(time.perf_counter() - start)
+        depths.append(depth)
+    values = 1000 * np.asarray(latencies)
+    result = {
+        'size_mb': os.path.getsize(model_path) / 2**20,
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'input_quantized': model.input_quantization is not None,
+        'output_quantized': model.output_quantization is not None,
+    }
+    if reference is not None:
+        errors = []
+        for depth, expected in zip(depths, reference):
+            depth_range = float(expected.max() - expected.min()) or 1.0
+            errors.append(float(np.abs(depth - expected).mean()) / depth_range)
+        result['mean_error'] = float(np.mean(errors))
+        result['p95_error'] = float(np.percentile(errors, 95))
+    return result, depths
+
+def main():
+    """
+    Convierte los modelos, mide cada variante y guarda el reporte.
+    """
+    parser = argparse.ArgumentParser(description="Cuantización int8 de los modelos de profundidad")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="Nombres de los SavedModels a convertir (por defecto todos)")
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--video", default=DEFAULT_VIDEO)
+    parser.add_argument("--video-frames", type=int, default=100, help="Frames del video a muestrear")
+    parser.add_argument("--output-dir", default=LITE_MODELS_DIR, help="Directorio de los modelos generados")
+    parser.add_argument("--num-threads", type=int, default=None, help="Hilos del intérprete al medir")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--skip-conversion", action="store_true",
+                        help="Medir las variantes ya generadas sin volver a convertirlas")
+    parser.add_argument("--report", default="quantization_report.json", help="Archivo JSON del reporte")
+    args = parser.parse_args()
+
+    names = args.models or sorted(os.path.basename(path) for path in glob.glob(os.path.join(SAVED_MODELS_DIR, "*"))
+                                  if os.path.isdir(path))
+    calibration, evaluation = load_dataset(args.images, args.video, args.video_frames)
+    print(f"Conjunto representativo: {len(calibration)} frames, evaluación: {len(evaluation)} frames")
+
+    report = {}
+    for name in names:
+        baseline_path = os.path.join(LITE_MODELS_DIR, f"{name}_fp16.tflite")
+        baseline = TFLiteModelInterpreter(model_path=baseline_path)
+        input_shape = (1, baseline.input_height, baseline.input_width, baseline.input_details[0]['shape'][3])
+        paths = {'fp16': baseline_path}
+        for variant in VARIANTS[1:]:
+            paths[variant] = os.path.join(args.output_dir, f"{name}_{variant}.tflite")
+            if args.skip_conversion:
+                continue
+            print(f"Convirtiendo {name} ({variant})...")
+            tflite_model = convert(os.path.join(SAVED_MODELS_DIR, name), variant, input_shape, calibration)
+            with open(paths[variant], 'wb') as f:
+                f.write(tflite_model)
+
+        report[name] = {}
+        reference = None
+        for variant in VARIANTS:
+            if not os.path.exists(paths[variant]):
+                print(f"Variante no encontrada: {paths[variant]}")
+                continue
+            result, depths = evaluate(paths[variant], evaluation, reference, args.num_threads, args.warmup)
+            if variant == 'fp16':
+                reference = depths
+            report[name][variant] = result
+
+        print(f"\n{name}")
+        print(f"{'variante':>9} {'tamaño':>9} {'p50':>9} {'p95':>9} {'error medio':>12} {'error p95':>10}")
+        for variant, result in report[name].items():
+            errors = (f"{100 * result['mean_error']:>11.2f}% {100 * result['p95_error']:>9.2f}%"
+                      if 'mean_error' in result else f"{'-':>12} {'-':>10}")
+            print(f"{variant:>9} {result['size_mb']:>7.1f}MB {result['p50_ms']:>7.1f}ms "
+                  f"{result['p95_ms']:>7.1f}ms {errors}")
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReporte guardado en {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Mide cuánto agrega la publicación en memoria compartida a la latencia del productor, sin
+suscriptores y con varios procesos suscriptores leyendo a la vez, y la latencia de entrega a
+cada suscriptor. Los suscriptores lentos (--slow) procesan cada frame durante --slow-delay-ms
+para comprobar que el productor no se frena y que los frames perdidos se detectan. Cada frame
+lleva su número de secuencia en los datos, de modo que los suscriptores verifican que ninguna
+lectura válida esté mezclada con un frame posterior.
+
+Uso:
+    python -m src.benchmarks.shared_memory_fanout
+    python -m src.benchmarks.shared_memory_fanout --subscribers 4 --slow 1 --slow-delay-ms 100 --frames 600
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from src.components.user_interface.frame_publisher import FramePublisher, FrameSubscriber
+
+def run_subscriber(name, delay):
+    """
+    Bucle de un proceso suscriptor. Escribe 'ready' al conectarse y, al terminar la
+    publicación, sus contadores y latencias de entrega en JSON.
+
+    Args:
+        name (str): Nombre del anillo.
+        delay (float): Tiempo de procesamiento simulado por frame, en segundos.
+    """
+    subscriber = FrameSubscriber(name)
+    print("ready", flush=True)
+    delivery = []
+    torn = 0
+    while True:
+        item = subscriber.read(timeout=5.0)
+        if item is None:
+            break
+        delivery.append(time.perf_counter() - item.published)
+        marker = item.sequence % 256
+        consistent = item.frame[0, 0, 0] == marker and item.frame[-1, -1, -1] == marker \
+            and item.depth[-1, -1] == item.sequence
+        if item.valid and not consistent:
+            torn += 1
+        del item
+        if delay:
+            time.sleep(delay)
+    stats = subscriber.stats()
+    subscriber.close()
+    delivery_ms = 1000 * np.asarray(delivery) if delivery else np.zeros(1)
+    stats.update({'torn': torn, 'p50_ms': float(np.percentile(delivery_ms, 50)),
+                  'p95_ms': float(np.percentile(delivery_ms, 95))})
+    print(json.dumps(stats), flush=True)
+
+def publish_frames(name, frame_size, depth_size, num_slots, frames, fps, delays):
+    """
+    Publica frames sintéticos a la tasa indicada con un suscriptor por cada retardo.
+
+    Args:
+        name (str): Nombre del anillo.
+        frame_size (tuple): Ancho y alto de los frames.
+        depth_size (tuple): Ancho y alto de la profundidad.
+        num_slots (int): Posiciones del anillo.
+        frames (int): Cantidad de frames medidos.
+        fps (float): Tasa de publicación.
+        delays (list): Retardo por frame de cada suscriptor, en segundos.
+
+    Returns:
+        tuple: Latencias de publish en segundos y resultados de cada suscriptor.
+    """
+    frame = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
+    depth = np.zeros((1, depth_size[1], depth_size[0], 1), dtype=np.float32)
+    publisher = FramePublisher(name, num_slots=num_slots)
+    # El anillo se crea con el primer frame; los suscriptores se conectan después
+    publisher.publish(frame, depth, time.perf_counter())
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "src.benchmarks.shared_memory_fanout", "--subscriber", name,
+                          "--slow-delay-ms", str(1000 * delay)], stdout=subprocess.PIPE, text=True)
+        for delay in delays
+    ]
+    for process in processes:
+        process.stdout.readline()
+
+    times = []
+    interval = 1.0 / fps
+    next_time = time.perf_counter()
+    try:
+        for _ in range(frames):
+            sequence = publisher.published
+            frame[...] = sequence % 256
+            depth[...] = sequence
+            start = time.perf_counter()
+            publisher.publish(frame, depth, start)
+            times.append(time.perf_counter() - start)
+            next_time += interval
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+    finally:
+        publisher.close()
+    results = [json.loads(process.communicate()[0].splitlines()[-1]) for process in processes]
+    return times, results
+
+def main():
+    """
+    Ejecuta la medición sin suscriptores y con suscriptores, y muestra la diferencia.
+    """
+    parser = argparse.ArgumentParser(description="Latencia de la publicación en memoria compartida")
+    parser.add_argument("--frame-size", type=int, nargs=2, default=(640, 480), metavar=("ANCHO", "ALTO"))
+    parser.add_argument("--depth-size", type=int, nargs=2, default=(256, 256), metavar=("ANCHO", "ALTO"))
+    parser.add_argument("--slots", type=int, default=8, help="Posiciones del anillo")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=30.0, help="Tasa de publicación")
+    parser.add_argument("--subscribers", type=int, default=3, help="Suscriptores que siguen el ritmo")
+    parser.add_argument("--slow", type=int, default=1, help="Suscriptores lentos")
+    parser.add_argument("--slow-delay-ms", type=float, default=0.0,
+                        help="Procesamiento simulado por frame de los suscriptores lentos")
+    parser.add_argument("--subscriber", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.subscriber is not None:
+        run_subscriber(args.subscriber, args.slow_delay_ms / 1000)
+        return
+    slow_delay = (args.slow_delay_ms or 4000 / args.fps) / 1000
+    name = f"monodepth_fanout_{os.getpid()}"
+    baseline, _ = publish_frames(f"{name}_0", args.frame_size, args.depth_size, args.slots, args.frames,
+                                 args.fps, [])
+    delays = [0.0] * args.subscribers + [slow_delay] * args.slow
+    loaded, results = publish_frames(f"{name}_1", args.frame_size, args.depth_size, args.slots, args.frames,
+                                     args.fps, delays)
+
+    baseline_ms = 1000 * np.asarray(baseline)
+    loaded_ms = 1000 * np.asarray(loaded)
+    print(f"Frame {args.frame_size[0]}x{args.frame_size[1]}, profundidad {args.depth_size[0]}x{args.depth_size[1]}, "
+          f"{args.slots} posiciones, {args.frames} frames a {args.fps:.0f} FPS")
+    for label, values in (("sin suscriptores", baseline_ms), (f"con {len(delays)} suscriptores", loaded_ms)):
+        print(f"  publish {label}: p50 {np.percentile(values, 50):.3f} ms, p95 {np.percentile(values, 95):.3f} ms, "
+              f"p99 {np.percentile(values, 99):.3f} ms, máximo {values.max():.3f} ms")
+    added = np.percentile(loaded_ms, 95) - np.percentile(baseline_ms, 95)
+    print(f"  Latencia p95 agregada al productor: {added:+.3f} ms")
+    for delay, result in zip(delays, results):
+        kind = f"lento ({1000 * delay:.0f} ms/frame)" if delay else "rápido"
+        print(f"  Suscriptor {kind}: {result['received']} recibidos, {result['skipped']} perdidos en "
+              f"{result['overruns']} alcances, {result['torn']} inconsistentes, entrega p50 "
+              f"{result['p50_ms']:.3f} ms, p95 {result['p95_ms']:.3f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import glob
+import hashlib
+import json
+import os
+import platform
+import time
+import numpy as np
+from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+
+LITE_MODELS_DIR = "src/tensorflow_models/lite_models"
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "monodepth", "autotune.json")
+
+def file_hash(path):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo, leyéndolo por bloques.
+
+    Args:
+        path (str): Ruta del archivo.
+
+    Returns:
+        str: Hash en hexadecimal.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cpu_signature():
+    """
+    Describe el procesador de la máquina. Dos máquinas con la misma firma deberían elegir la
+    misma configuración.
+
+    Returns:
+        str: Arquitectura, modelo de procesador, cantidad de CPUs y sistema operativo.
+    """
+    model = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    model = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{platform.machine()}|{model}|{os.cpu_count()}|{platform.system()}"
+
+def discover_models(directory=LITE_MODELS_DIR):
+    """
+    Busca las variantes del modelo, de la versión más reciente a la más antigua.
+
+    Args:
+        directory (str): Directorio de los modelos TFLite.
+
+    Returns:
+        list: Rutas de los modelos en orden de preferencia.
+    """
+    return sorted(glob.glob(os.path.join(directory, "*.tflite")), reverse=True)
+
+class Autotuner:
+    """
+    Elige al iniciar la configuración del intérprete (variante del modelo, hilos y XNNPACK)
+    midiendo unas pocas inferencias de cada combinación. Los modelos se recorren en orden de
+    preferencia: se elige el primero que tenga alguna configuración dentro del presupuesto de
+    latencia, con su configuración más rápida. Sin presupuesto, o si ninguna lo cumple, se elige
+    la configuración más rápida de todas. El resultado se guarda en un caché en disco indexado
+    por el hash de los modelos, la firma del procesador y el presupuesto, de modo que los
+    siguientes inicios no repiten la medición.
+
+    Attributes:
+        model_paths (list): Modelos candidatos, en orden de preferencia.
+        thread_options (list): Cantidades de hilos a probar.
+        xnnpack_options (tuple): Valores de use_xnnpack a probar.
+        latency_budget (float): Latencia p95 máxima por inferencia, en segundos, o None.
+        warmup (int): Inferencias de calentamiento no medidas por configuración.
+        iterations (int): Inferencias medidas por configuración.
+        cache_path (str): Archivo JSON del caché.
+    """
+    def __init__(self, model_paths=None, thread_options=None, xnnpack_options=(True, False), latency_budget=None,
+                 warmup=2, iterations=10, cache_path=DEFAULT_CACHE_PATH):
+        """
+        Inicializa el autoajuste.
+
+        Args:
+            model_paths (list): Modelos candidatos en orden de preferencia. Por defecto todos los
+                                de lite_models, de la versión más reciente a la más antigua.
+            thread_options (list): Cantidades de hilos a probar. Por defecto potencias de dos
+                                   hasta la cantidad de CPUs, más la cantidad de CPUs.
+            xnnpack_options (tuple): Valores de use_xnnpack a probar.
+            latency_budget (float): Latencia p95 máxima por inferencia, en segundos, o None.
+            warmup (int): Inferencias de calentamiento no medidas por configuración.
+            iterations (int): Inferencias medidas por configuración.
+            cache_path (str): Archivo JSON del caché.
+
+        Raises:
+            ValueError: Si no hay modelos candidatos o los parámetros no son válidos.
+        """
+        self.model_paths = list(model_paths) if model_paths else discover_models()
+        if not self.model_paths:
+            raise ValueError("Error: No hay modelos TFLite para el autoajuste.")
+        if iterations < 1:
+            raise ValueError("Error: Se necesita al menos una inferencia medida por configuración.")
+        if thread_options is None:
+            cpus = os.cpu_count() or 1
+            thread_options = sorted({2**i for i in range(cpus.bit_length()) if 2**i <= cpus} | {cpus})
+        self.thread_options = list(thread_options)
+        self.xnnpack_options = tuple(xnnpack_options)
+        self.latency_budget = latency_budget
+        self.warmup = warmup
+        self.iterations = iterations
+        self.cache_path = cache_path
+
+    def cache_key(self):
+        """
+        Calcula la clave del caché para los modelos, el procesador y las opciones actuales.
+
+        Returns:
+            str: Clave del caché.
+        """
+        description = json.dumps({
+            'models': [file_hash(path) for path in self.model_paths],
+            'cpu': cpu_signature(),
+            'threads': self.thread_options,
+            'xnnpack': self.xnnpack_options,
+            'budget': self.latency_budget,
+        }, sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def measure(self, model_path, num_threads, use_xnnpack, frame):
+        """
+        Mide la latencia de inferencia de una configuración.
+
+        Args:
+            model_path (str): Ruta del modelo.
+            num_threads (int): Hilos del intérprete.
+            use_xnnpack (bool): Indicador de si se usa XNNPACK.
+            frame (ndarray): Frame de entrada.
+
+        Returns:
+            dict: Configuración y latencias p50 y p95 en milisegundos.
+        """
+        interpreter = TFLiteModelInterpreter(model_path=model_path, num_threads=num_threads,
+                                             use_xnnpack=use_xnnpack)
+        samples = []
+        for i in range(self.warmup + self.iterations):
+            start = time.perf_counter()
+            interpreter.set_input_tensor(frame=frame)
+            interpreter.invoke()
+            if i >= self.warmup:
+                samples.append(time.perf_counter() - start)
+        p50, p95 = np.percentile(1000 * np.asarray(samples), (50, 95))
+        return {'model_path': model_path, 'num_threads': num_threads, 'use_xnnpack': use_xnnpack,
+                'p50_ms': float(p50), 'p95_ms': float(p95)}
+
+    def select(self, results):
+        """
+        Elige la mejor configuración entre las medidas.
+
+        Args:
+            results (list): Resultados de measure.
+
+        Returns:
+            dict: Configuración elegida.
+        """
+        if self.latency_budget is not None:
+            budget_ms = 1000 * self.latency_budget
+            for model_path in self.model_paths:
+                within = [r for r in results if r['model_path'] == model_path and r['p95_ms'] <= budget_ms]
+                if within:
+                    return min(within, key=lambda r: r['p50_ms'])
+            print(f"Advertencia: Ninguna configuración cumple el presupuesto de {budget_ms:.1f} ms; "
+                  f"se usa la más rápida.")
+        return min(results, key=lambda r: r['p50_ms'])
+
+    def tune(self, force=False, frame_shape=(480, 640, 3)):
+        """
+        Devuelve la configuración elegida, midiendo todas las combinaciones si no está en el caché.
+
+        Args:
+            force (bool): Si es True se ignora el caché y se vuelve a medir.
+            frame_shape (tuple): Forma del frame de prueba.
+
+        Returns:
+            dict: model_path, num_threads, use_xnnpack y latencias de la configuración elegida.
+        """
+        key = self.cache_key()
+        cache = self._load_cache()
+        if not force and key in cache:
+            choice = cache[key]['choice']
+            print(f"Configuración del caché: {os.path.basename(choice['model_path'])}, "
+                  f"{choice['num_threads']} hilos, XNNPACK {'sí' if choice['use_xnnpack'] else 'no'}")
+            return choice
+
+        frame = np.random.default_rng(0).integers(0, 256, size=frame_shape, dtype=np.uint8)
+        results = []
+        for model_path in self.model_paths:
+            for use_xnnpack in self.xnnpack_options:
+                for num_threads in self.thread_options:
+                    try:
+                        result = self.measure(model_path, num_threads, use_xnnpack, frame)
+                    except Exception as e:
+                        # Una configuración no soportada no debe impedir elegir entre las demás
+                        print(f"Configuración omitida ({os.path.basename(model_path)}, {num_threads} hilos, "
+                              f"XNNPACK {use_xnnpack}): {e}")
+                        continue
+                    print(f"  {os.path.basename(model_path)}, {num_threads} hilos, XNNPACK "
+                          f"{'sí' if use_xnnpack else 'no'}: p50 {result['p50_ms']:.1f} ms, "
+                          f"p95 {result['p95_ms']:.1f} ms")
+                    results.append(result)
+        if not results:
+            raise ValueError("Error: No se pudo medir ninguna configuración.")
+        choice = self.select(results)
+        cache[key] = {'choice': choice, 'results': results, 'cpu': cpu_signature(), 'created': time.time()}
+        self._save_cache(cache)
+        print(f"Configuración elegida: {os.path.basename(choice['model_path'])}, {choice['num_threads']} hilos, "
+              f"XNNPACK {'sí' if choice['use_xnnpack'] else 'no'} (p50 {choice['p50_ms']:.1f} ms)")
+        return choice
+
+    def _load_cache(self):
+        """
+        Lee el caché. Un caché ausente o dañado se trata como vacío.
+
+        Returns:
+            dict: Entradas del caché por clave.
+        """
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        """
+        Guarda el caché de forma atómica.
+
+        Args:
+            cache (dict): Entradas del caché por clave.
+        """
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.cache_path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temporary, self.cache_path)
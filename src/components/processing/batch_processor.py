@@ -0,0 +1,157 @@
+import collections
+import itertools
+import os
+import time
+import numpy as np
+import cv2
+from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+from src.components.processing.video_processor import VideoProcessor
+from src.components.processing.frame_sources import iter_frames, batched
+from src.components.processing.interpreter_pool import InterpreterPool
+
+class BatchDepthProcessor:
+    """
+    Procesa de forma no interactiva un archivo de video o un directorio de imágenes, ejecutando
+    el modelo sobre lotes de frames. Los frames se leen mediante generadores y los resultados se
+    escriben por lote, por lo que la memoria utilizada depende del tamaño de lote y no de la
+    longitud del video.
+
+    Attributes:
+        model_path (str): Ruta al archivo del modelo TFLite.
+        depth_model (TFLiteModelInterpreter): Intérprete del modelo TFLite, o None si se usa
+        un pool de procesos.
+        video_processor (VideoProcessor): Procesador utilizado para colorear la profundidad.
+        batch_size (int): Cantidad de frames por inferencia.
+        output_format (str): 'npy' para guardar la profundidad en float16 o 'color' para
+        guardar el frame combinado con la profundidad coloreada.
+        num_workers (int): Cantidad de procesos del pool de intérpretes; 1 ejecuta el modelo en
+        el proceso actual.
+        num_threads (int): Cantidad de hilos de cada intérprete, o None para el valor por defecto
+        (1 en cada proceso del pool, para no sobresuscribir la CPU).
+    """
+    OUTPUT_FORMATS = ('npy', 'color')
+
+    def __init__(self, tflite_model_path, batch_size=1, output_format='npy', num_workers=1, num_threads=None):
+        """
+        Inicializa el procesador por lotes.
+
+        Args:
+            tflite_model_path (str): Ruta al archivo del modelo TFLite.
+            batch_size (int): Cantidad de frames por inferencia.
+            output_format (str): 'npy' o 'color'.
+            num_workers (int): Cantidad de procesos del pool de intérpretes. Con más de un
+                               proceso los frames se procesan de a uno en cada proceso y el
+                               tamaño de lote se ignora.
+            num_threads (int): Cantidad de hilos de cada intérprete. Si es None, el intérprete
+                               local usa el valor por defecto del entorno y cada proceso del
+                               pool usa 1.
+
+        Raises:
+            ValueError: Si el formato de salida no es válido o el modelo no admite el tamaño de lote.
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Error: Formato de salida no válido. Las opciones son {self.OUTPUT_FORMATS}.")
+        self.model_path = tflite_model_path
+        self.depth_model = None
+        if num_workers == 1:
+            self.depth_model = TFLiteModelInterpreter(model_path=tflite_model_path, num_threads=num_threads)
+            self.depth_model.resize_batch(batch_size)
+        self.video_processor = VideoProcessor()
+        self.batch_size = batch_size
+        self.output_format = output_format
+        self.num_workers = num_workers
+        self.num_threads = num_threads
+
+    def run(self, input_path, output_dir):
+        """
+        Procesa todos los frames de la entrada y escribe los resultados en orden.
+
+        Args:
+            input_path (str): Ruta de un archivo de video o de un directorio de imágenes.
+            output_dir (str): Directorio donde se guardan los resultados.
+
+        Returns:
+            dict: Cantidad de frames procesados, duración en segundos y frames por segundo.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        start_time = time.perf_counter()
+        if self.depth_model is None:
+            processed = self.run_pool(iter_frames(input_path), output_dir)
+            mode = f"{self.num_workers} procesos"
+        else:
+            processed = self.run_batched(iter_frames(input_path), output_dir)
+            mode = f"lote de {self.batch_size}"
+        elapsed = time.perf_counter() - start_time
+        fps = processed / elapsed if elapsed > 0 else 0.0
+        print(f"Procesados {processed} frames en {elapsed:.2f} s ({fps:.1f} FPS, {mode})")
+        return {'frames': processed, 'elapsed': elapsed, 'fps': fps}
+
+    def run_batched(self, frames, output_dir):
+        """
+        Procesa los frames en el proceso actual, en lotes de batch_size.
+
+        Args:
+            frames (iterable): Generador de tuplas (nombre, frame).
+            output_dir (str): Directorio de salida.
+
+        Returns:
+            int: Cantidad de frames procesados.
+        """
+        processed = 0
+        for batch in batched(frames, self.batch_size):
+            self.depth_model.set_input_batch([frame for _, frame in batch])
+            self.depth_model.invoke()
+            outputs = self.depth_model.get_output_batch(count=len(batch))
+            for (name, frame), output_data in zip(batch, outputs):
+                self.write_result(output_dir, name, frame, output_data)
+            processed += len(batch)
+        return processed
+
+    def run_pool(self, frames, output_dir):
+        """
+        Procesa los frames repartiéndolos entre los procesos de un InterpreterPool. La memoria
+        compartida toma el tamaño del primer frame y los frames de otro tamaño se redimensionan
+        al copiarlos; los resultados en color se combinan con el frame original.
+
+        Args:
+            frames (iterable): Generador de tuplas (nombre, frame).
+            output_dir (str): Directorio de salida.
+
+        Returns:
+            int: Cantidad de frames procesados.
+        """
+        first = next(frames, None)
+        if first is None:
+            return 0
+        # Los frames en vuelo se conservan hasta recibir su salida, que llega en el mismo orden
+        in_flight = collections.deque()
+
+        def track(items):
+            for item in items:
+                in_flight.append(item)
+                yield item[1]
+
+        processed = 0
+        with InterpreterPool(self.model_path, first[1].shape, num_workers=self.num_workers,
+                             num_threads=self.num_threads or 1) as pool:
+            for output_data in pool.map(track(itertools.chain([first], frames))):
+                name, frame = in_flight.popleft()
+                self.write_result(output_dir, name, frame, output_data)
+                processed += 1
+        return processed
+
+    def write_result(self, output_dir, name, frame, output_data):
+        """
+        Escribe el resultado de un frame en el directorio de salida.
+
+        Args:
+            output_dir (str): Directorio de salida.
+            name (str): Nombre del frame.
+            frame (ndarray): Frame original.
+            output_data (ndarray): Salida del modelo para el frame.
+        """
+        if self.output_format == 'npy':
+            np.save(os.path.join(output_dir, f"{name}.npy"), output_data.squeeze().astype(np.float16))
+        else:
+            combined = self.video_processor.normalize_output(output_data=output_data, frame=frame)
+            cv2.imwrite(os.path.join(output_dir, f"{name}_colors_prediction.jpg"), combined)
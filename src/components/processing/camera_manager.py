@@ -1,17 +1,46 @@
+import os
+import threading
+import time
 import cv2
 
 class CameraManager:
     """
     Gestiona la conexión y captura de video desde una cámara utilizando OpenCV. Esta clase permite
-    abrir una fuente de video, leer frames y cerrar la conexión de manera controlada, además de 
+    abrir una fuente de video, leer frames y cerrar la conexión de manera controlada, además de
     configurar la resolución de la cámara.
 
+    En modo latest_only un hilo en segundo plano lee la cámara continuamente y conserva solo el
+    frame más reciente, de modo que get_frame nunca devuelve frames acumulados en el buffer del
+    controlador cuando el procesamiento es más lento que la cámara. Si la cámara se desconecta,
+    la conexión se reintenta automáticamente. Un archivo de video puede reproducirse como si
+    fuera una cámara (replay), entregando los frames a su tasa original.
+
     Attributes:
         cap (cv2.VideoCapture): Objeto de captura de video de OpenCV que gestiona la transmisión de
         la cámara.
+        source (int or str): Índice de la cámara o ruta del video.
+        is_file (bool): Indicador de si la fuente es un archivo de video.
+        latest_only (bool): Indicador de si se usa el hilo de captura que conserva solo el último frame.
+        replay (bool): Indicador de si un archivo se reproduce a su tasa de cuadros original.
+        resolution (tuple): Resolución (ancho, alto) de los frames entregados.
+        pixel_format (str): Formato de píxel negociado con la cámara (por ejemplo 'MJPG'), o None.
+        fps (float): Tasa de cuadros informada por la fuente, o None si no la informa.
+        last_timestamp (float): Marca de tiempo monotónica de captura del último frame entregado.
+        frames_captured (int): Frames leídos de la fuente.
+        frames_dropped (int): Frames capturados que fueron reemplazados por uno más reciente antes
+        de entregarse.
+        reconnects (int): Reconexiones realizadas.
     """
+    # Resoluciones disponibles (ancho, alto) según la opción seleccionada
+    RESOLUTIONS = {
+        1: (320, 240),
+        2: (640, 480),
+        3: (1280, 720),
+        4: (1920, 1080)
+    }
 
-    def __init__(self, source=0, resolution_option=2):
+    def __init__(self, source=0, resolution_option=2, latest_only=False, pixel_format='auto', frame_rate=None,
+                 buffer_size=1, replay=False, reconnect_attempts=5, reconnect_delay=0.5):
         """
         Inicializa un objeto CameraManager que intenta abrir la fuente de video especificada y configura la resolución.
 
@@ -20,19 +49,63 @@ class CameraManager:
                                  Por defecto, se usa 0, que generalmente se refiere a la cámara web principal
                                  del sistema.
             resolution_option (int): La opción de resolución deseada para la cámara. Puede ser 1, 2, 3 o 4.
+                                     Los frames de un archivo se redimensionan a esta resolución.
+            latest_only (bool): Si es True, un hilo en segundo plano captura continuamente y
+                                get_frame devuelve siempre el frame más reciente.
+            pixel_format (str): Código FOURCC del formato de píxel ('MJPG', 'YUYV'...), 'auto' para
+                                probar el formato actual y MJPG, o None para no modificarlo.
+            frame_rate (float): Tasa de cuadros solicitada a la cámara. En modo 'auto' un formato
+                                solo se acepta si la cámara informa al menos esta tasa.
+            buffer_size (int): Cantidad de frames que puede retener el controlador, o None para
+                               no modificarla.
+            replay (bool): Si es True y la fuente es un archivo, los frames se entregan a la tasa
+                           de cuadros original del video, como lo haría una cámara.
+            reconnect_attempts (int): Intentos de reconexión consecutivos antes de dar la cámara por perdida.
+            reconnect_delay (float): Espera entre intentos de reconexión, en segundos.
 
         Raises:
             ValueError: Si no se puede acceder a la fuente de video especificada o si la resolución no es válida.
         """
+        self.source = source
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.latest_only = latest_only
+        self.replay = replay and self.is_file
+        self.pixel_format = None
+        self.resolution = None
+        self.fps = None
+        self.last_timestamp = None
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+        self._requested_format = pixel_format
+        self._frame_rate = frame_rate
+        self._buffer_size = buffer_size
+        self._resolution_option = resolution_option
+        self._reconnect_attempts = reconnect_attempts
+        self._reconnect_delay = reconnect_delay
+        self._replay_start = None
+        self._replay_index = 0
+        self._latest = None
+        self._error = None
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
         self.cap = cv2.VideoCapture(source)
         if not self.cap.isOpened():
             raise ValueError("Error: No se pudo acceder a la cámara web.")
 
         self.set_resolution(resolution_option)
+        if latest_only:
+            self._thread = threading.Thread(target=self._grab_loop, name="captura-cámara", daemon=True)
+            self._thread.start()
 
     def set_resolution(self, resolution_option):
         """
         Configura la resolución de la cámara y valida si la cámara soporta la resolución seleccionada.
+        Se prueban los formatos de píxel candidatos hasta encontrar uno que entregue la resolución
+        (y la tasa de cuadros, si se solicitó). Las resoluciones altas prueban primero MJPG, ya que
+        los formatos sin comprimir rara vez alcanzan la tasa completa por USB.
 
         Args:
             resolution_option (int): La opción de resolución deseada para la cámara. Puede ser 1, 2, 3 o 4.
@@ -40,27 +113,162 @@ class CameraManager:
         Raises:
             ValueError: Si la resolución no es válida o si la cámara no soporta la resolución seleccionada.
         """
-        resolutions = {
-            1: (320, 240),
-            2: (640, 480),
-            3: (1280, 720),
-            4: (1920, 1080)
-        }
+        resolutions = self.RESOLUTIONS
 
         if resolution_option not in resolutions:
             raise ValueError("Error: Resolución no válida. Las opciones son 1: '240p', 2: '480p', 3: '720p', 4: '1080p'.")
 
         width, height = resolutions[resolution_option]
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.resolution = (width, height)
+        if self.is_file:
+            # Un archivo no puede cambiar de resolución: sus frames se redimensionan al leerlos
+            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            self.fps = fps if fps > 0 else None
+            return
+
+        if self._buffer_size is not None:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self._buffer_size)
+        if self._requested_format == 'auto':
+            candidates = ['MJPG', None] if resolution_option >= 3 else [None, 'MJPG']
+        else:
+            candidates = [self._requested_format]
+
+        actual_width = actual_height = None
+        for pixel_format in candidates:
+            if pixel_format is not None:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*pixel_format))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            if self._frame_rate is not None:
+                self.cap.set(cv2.CAP_PROP_FPS, self._frame_rate)
+
+            # Validar si la cámara soporta la resolución seleccionada
+            actual_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+            actual_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            if (actual_width, actual_height) != (width, height):
+                continue
+            if self._requested_format == 'auto' and self._frame_rate is not None and 0 < fps < self._frame_rate:
+                continue
+            self.pixel_format = pixel_format or self._current_format()
+            self.fps = fps if fps > 0 else None
+            return
 
-        # Validar si la cámara soporta la resolución seleccionada
-        actual_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-        actual_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        raise ValueError(f"Error: La cámara no soporta la resolución seleccionada ({width}x{height})."
+                         f" Resolución actual: ({actual_width}x{actual_height}).")
 
-        if (actual_width, actual_height) != (width, height):
-            raise ValueError(f"Error: La cámara no soporta la resolución seleccionada ({width}x{height})."
-                             f" Resolución actual: ({actual_width}x{actual_height}).")
+    def _current_format(self):
+        """
+        Obtiene el formato de píxel actual de la cámara.
+
+        Returns:
+            str: Código FOURCC, o None si la cámara no lo informa.
+        """
+        code = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        if code <= 0:
+            return None
+        return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+    def _read_source(self):
+        """
+        Lee el siguiente frame de la fuente. En las cámaras, una lectura fallida provoca
+        reintentos de reconexión; en la reproducción de archivos, los frames se entregan a la
+        tasa original del video.
+
+        Returns:
+            tuple: El frame y su marca de tiempo de captura.
+
+        Raises:
+            ValueError: Si la fuente terminó o la cámara no pudo reconectarse.
+        """
+        ret, frame = self.cap.read()
+        if not ret and not self.is_file:
+            ret, frame = self._reconnect()
+        if not ret:
+            raise ValueError("Error: No se pudo obtener el frame.")
+        if self.replay and self.fps:
+            # Esperar al instante en que la cámara simulada entregaría este frame
+            if self._replay_start is None:
+                self._replay_start = time.perf_counter()
+            delay = self._replay_start + self._replay_index / self.fps - time.perf_counter()
+            self._replay_index += 1
+            if delay > 0:
+                time.sleep(delay)
+        if self.is_file and (frame.shape[1], frame.shape[0]) != self.resolution:
+            frame = cv2.resize(frame, self.resolution)
+        self.frames_captured += 1
+        return frame, time.perf_counter()
+
+    def _reconnect(self):
+        """
+        Reabre la cámara y vuelve a aplicar su configuración.
+
+        Returns:
+            tuple: Resultado y frame de la primera lectura tras reconectar.
+        """
+        for attempt in range(self._reconnect_attempts):
+            if self._stop_event.is_set():
+                break
+            print(f"Cámara desconectada, reintentando ({attempt + 1}/{self._reconnect_attempts})...")
+            self.cap.release()
+            time.sleep(self._reconnect_delay)
+            self.cap = cv2.VideoCapture(self.source)
+            if not self.cap.isOpened():
+                continue
+            try:
+                self.set_resolution(self._resolution_option)
+            except ValueError:
+                continue
+            ret, frame = self.cap.read()
+            if ret:
+                self.reconnects += 1
+                print("Cámara reconectada")
+                return ret, frame
+        return False, None
+
+    def _grab_loop(self):
+        """
+        Bucle del hilo de captura: lee la fuente continuamente y reemplaza el frame pendiente
+        por el más reciente.
+        """
+        try:
+            while not self._stop_event.is_set():
+                item = self._read_source()
+                with self._condition:
+                    if self._latest is not None:
+                        self.frames_dropped += 1
+                    self._latest = item
+                    self._condition.notify()
+        except ValueError as e:
+            self._error = e
+        finally:
+            with self._condition:
+                if self._error is None:
+                    self._error = ValueError("Error: Captura detenida.")
+                self._condition.notify_all()
+
+    def read(self):
+        """
+        Lee el siguiente frame junto con su marca de tiempo de captura. En modo latest_only
+        espera a que haya un frame nuevo y devuelve el más reciente.
+
+        Returns:
+            tuple: El frame y su marca de tiempo monotónica (time.perf_counter) de captura.
+
+        Raises:
+            ValueError: Si no se puede leer un frame de la fuente de video.
+        """
+        if not self.latest_only:
+            frame, timestamp = self._read_source()
+        else:
+            with self._condition:
+                while self._latest is None and self._error is None:
+                    self._condition.wait()
+                if self._latest is None:
+                    raise self._error
+                (frame, timestamp), self._latest = self._latest, None
+        self.last_timestamp = timestamp
+        return frame, timestamp
 
     def get_frame(self):
         """
@@ -72,14 +280,32 @@ class CameraManager:
         Raises:
             ValueError: Si no se puede leer un frame de la fuente de video.
         """
-        ret, frame = self.cap.read()
-        if not ret:
-            raise ValueError("Error: No se pudo obtener el frame.")
+        frame, _ = self.read()
         return frame
 
+    def stats(self):
+        """
+        Devuelve los contadores de captura.
+
+        Returns:
+            dict: Frames capturados, descartados por llegar uno más reciente, reconexiones,
+            formato de píxel y tasa de cuadros de la fuente.
+        """
+        return {
+            'captured': self.frames_captured,
+            'dropped': self.frames_dropped,
+            'reconnects': self.reconnects,
+            'pixel_format': self.pixel_format,
+            'fps': self.fps,
+        }
+
     def release(self):
         """
         Libera la fuente de video, cerrando la conexión con la cámara y liberando los recursos
         asociados.
         """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
         self.cap.release()
@@ -0,0 +1,90 @@
+import os
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def video_frames(video_path):
+    """
+    Genera los frames de un archivo de video uno a uno, sin cargar el video completo en memoria.
+
+    Args:
+        video_path (str): Ruta del archivo de video.
+
+    Yields:
+        tuple: Nombre del frame (índice con cinco dígitos) y el frame decodificado.
+
+    Raises:
+        ValueError: Si no se puede abrir el archivo de video.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Error: No se pudo abrir el video {video_path}.")
+    try:
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield f"{index:05d}", frame
+            index += 1
+    finally:
+        cap.release()
+
+def image_frames(directory):
+    """
+    Genera las imágenes de un directorio en orden alfabético, leyendo una a la vez.
+
+    Args:
+        directory (str): Ruta del directorio de imágenes.
+
+    Yields:
+        tuple: Nombre de la imagen sin extensión y la imagen decodificada.
+    """
+    for filename in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(filename)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+        frame = cv2.imread(os.path.join(directory, filename))
+        if frame is None:
+            print(f"Advertencia: No se pudo leer la imagen {filename}, se omite.")
+            continue
+        yield name, frame
+
+def iter_frames(path):
+    """
+    Genera los frames de un archivo de video o de un directorio de imágenes.
+
+    Args:
+        path (str): Ruta del video o del directorio.
+
+    Returns:
+        generator: Generador de tuplas (nombre, frame).
+
+    Raises:
+        ValueError: Si la ruta no existe.
+    """
+    if os.path.isdir(path):
+        return image_frames(path)
+    if os.path.isfile(path):
+        return video_frames(path)
+    raise ValueError(f"Error: La ruta {path} no existe.")
+
+def batched(frames, batch_size):
+    """
+    Agrupa un generador de frames en lotes de tamaño fijo. El último lote puede ser menor.
+
+    Args:
+        frames (iterable): Generador de tuplas (nombre, frame).
+        batch_size (int): Cantidad de frames por lote.
+
+    Yields:
+        list: Lote de tuplas (nombre, frame).
+    """
+    batch = []
+    for item in frames:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
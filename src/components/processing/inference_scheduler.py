@@ -0,0 +1,136 @@
+import time
+import numpy as np
+import cv2
+
+class InferenceScheduler:
+    """
+    Planificador adaptativo de inferencias. Compara una versión reducida en escala de grises de
+    cada frame con la del último frame inferido y solo solicita una nueva inferencia cuando el
+    cambio supera un umbral o cuando la profundidad disponible es demasiado antigua. En escenas
+    estáticas se reutiliza la última profundidad.
+
+    Attributes:
+        threshold (float): Diferencia media absoluta (en [0, 1]) a partir de la cual se infiere.
+        max_staleness (int): Cantidad máxima de frames consecutivos que reutilizan la misma profundidad.
+        max_inference_fps (float): Tasa máxima de inferencias por segundo, o None para no limitarla.
+        inferred (int): Cantidad de frames con inferencia.
+        skipped (int): Cantidad de frames que reutilizaron la profundidad anterior.
+        depth (ndarray): Última profundidad calculada.
+        last_change (float): Cambio medido en el último frame.
+    """
+    def __init__(self, threshold=0.02, max_staleness=15, max_inference_fps=None, detector_size=(32, 24)):
+        """
+        Inicializa el planificador.
+
+        Args:
+            threshold (float): Diferencia media absoluta (en [0, 1]) a partir de la cual se infiere.
+            max_staleness (int): Cantidad máxima de frames consecutivos sin inferencia.
+            max_inference_fps (float): Tasa máxima de inferencias por segundo. Mientras no se
+                                       supere max_staleness, los frames que llegan antes del
+                                       intervalo mínimo reutilizan la profundidad anterior.
+            detector_size (tuple): Tamaño (ancho, alto) de la imagen reducida del detector de cambios.
+
+        Raises:
+            ValueError: Si los parámetros no son válidos.
+        """
+        if threshold < 0:
+            raise ValueError("Error: El umbral de cambio no puede ser negativo.")
+        if max_staleness < 1:
+            raise ValueError("Error: max_staleness debe ser al menos 1.")
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.max_inference_fps = max_inference_fps
+        self.inferred = 0
+        self.skipped = 0
+        self.depth = None
+        self.last_change = 0.0
+        self._detector_size = detector_size
+        width, height = detector_size
+        self._small = np.empty((height, width, 3), dtype=np.uint8)
+        self._current = np.empty((height, width), dtype=np.uint8)
+        self._reference = np.empty((height, width), dtype=np.uint8)
+        self._difference = np.empty((height, width), dtype=np.uint8)
+        self._has_reference = False
+        self._stale_frames = 0
+        self._last_inference_time = float('-inf')
+
+    def measure_change(self, frame):
+        """
+        Calcula el cambio del frame respecto al último frame inferido sobre una versión
+        reducida en escala de grises, reutilizando buffers preasignados.
+
+        Args:
+            frame (ndarray): Frame BGR.
+
+        Returns:
+            float: Diferencia media absoluta en [0, 1], o 1.0 si no hay referencia.
+        """
+        cv2.resize(frame, self._detector_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._current)
+        if not self._has_reference:
+            return 1.0
+        cv2.absdiff(self._current, self._reference, dst=self._difference)
+        return cv2.mean(self._difference)[0] / 255.0
+
+    def should_infer(self, frame, now=None):
+        """
+        Decide si el frame requiere una nueva inferencia y actualiza los contadores. Si la
+        respuesta es True, el frame pasa a ser la referencia del detector y debe llamarse a
+        store_depth con la nueva profundidad.
+
+        Args:
+            frame (ndarray): Frame BGR.
+            now (float): Tiempo monotónico actual. Por defecto time.perf_counter().
+
+        Returns:
+            bool: True si debe ejecutarse el modelo, False si puede reutilizarse self.depth.
+        """
+        now = time.perf_counter() if now is None else now
+        self.last_change = self.measure_change(frame)
+        # Se infiere tras max_staleness frames consecutivos que reutilizaron la profundidad
+        stale = self._stale_frames >= self.max_staleness
+        rate_limited = (self.max_inference_fps is not None
+                        and now - self._last_inference_time < 1.0 / self.max_inference_fps)
+        infer = (self.depth is None or stale
+                 or (self.last_change > self.threshold and not rate_limited))
+        if infer:
+            self._reference, self._current = self._current, self._reference
+            self._has_reference = True
+            self._stale_frames = 0
+            self._last_inference_time = now
+            self.inferred += 1
+        else:
+            self._stale_frames += 1
+            self.skipped += 1
+        return infer
+
+    def store_depth(self, depth, copy=True):
+        """
+        Guarda la profundidad calculada para reutilizarla en los frames siguientes.
+
+        Args:
+            depth (ndarray): Profundidad calculada por el modelo.
+            copy (bool): Si es True, la profundidad se copia en un buffer propio (necesario si
+                         es una vista sobre el intérprete). Si es False se conserva la referencia,
+                         y el array no debe modificarse después.
+        """
+        if not copy:
+            self.depth = depth
+        elif self.depth is None or self.depth.shape != depth.shape:
+            self.depth = depth.copy()
+        else:
+            np.copyto(self.depth, depth)
+
+    def stats(self):
+        """
+        Devuelve los contadores del planificador.
+
+        Returns:
+            dict: Frames inferidos, omitidos y fracción de frames omitidos.
+        """
+        total = self.inferred + self.skipped
+        return {
+            'inferred': self.inferred,
+            'skipped': self.skipped,
+            'skip_ratio': self.skipped / total if total else 0.0,
+        }
@@ -0,0 +1,282 @@
+import collections
+import multiprocessing as mp
+import queue
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+
+def _worker_main(worker_id, model_path, num_threads, frame_shape, num_slots, input_name,
+                 task_queue, result_queue):
+    """
+    Bucle principal de un proceso del pool. Carga el modelo una sola vez, lee los frames desde
+    la memoria compartida de entrada y escribe la profundidad en la memoria compartida de salida.
+
+    Args:
+        worker_id (int): Identificador del proceso dentro del pool.
+        model_path (str): Ruta al archivo del modelo TFLite.
+        num_threads (int): Cantidad de hilos del intérprete.
+        frame_shape (tuple): Forma de los frames (alto, ancho, canales).
+        num_slots (int): Cantidad de posiciones de la memoria compartida.
+        input_name (str): Nombre del bloque de memoria compartida de entrada.
+        task_queue (multiprocessing.Queue): Cola de tareas de este proceso.
+        result_queue (multiprocessing.Queue): Cola de resultados compartida con el pool.
+    """
+    input_shm = None
+    output_shm = None
+    frames = None
+    outputs = None
+    try:
+        # Importar dentro del proceso para que cada worker cargue su propio intérprete
+        from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+        model = TFLiteModelInterpreter(model_path=model_path, num_threads=num_threads)
+        input_shm = shared_memory.SharedMemory(name=input_name)
+        frames = np.ndarray((num_slots, *frame_shape), dtype=np.uint8, buffer=input_shm.buf)
+        output_shape = tuple(int(dim) for dim in model.output_details[0]['shape'][1:])
+        result_queue.put(('ready', worker_id, output_shape))
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            if task[0] == 'attach':
+                output_shm = shared_memory.SharedMemory(name=task[1])
+                outputs = np.ndarray((num_slots, *output_shape), dtype=np.float32, buffer=output_shm.buf)
+                continue
+            _, seq, slot = task
+            model.set_input_tensor(frame=frames[slot])
+            model.invoke()
+            output_view = model.get_output_view()
+            outputs[slot] = output_view
+            del output_view
+            result_queue.put(('done', worker_id, seq, slot))
+    except Exception:
+        result_queue.put(('error', worker_id, traceback.format_exc()))
+    finally:
+        # Liberar las vistas antes de cerrar la memoria compartida
+        frames = None
+        outputs = None
+        if input_shm is not None:
+            input_shm.close()
+        if output_shm is not None:
+            output_shm.close()
+
+
+class InterpreterPool:
+    """
+    Pool de procesos que ejecutan el modelo TFLite en paralelo. Cada proceso carga el modelo una
+    sola vez con una cantidad de hilos configurable. Los frames se reparten entre los procesos
+    a través de memoria compartida, sin serializarlos, y los resultados se devuelven en el orden
+    de los frames. La cantidad de frames en vuelo está acotada por el número de posiciones de la
+    memoria compartida, lo que aplica contrapresión al productor.
+
+    Attributes:
+        frame_shape (tuple): Forma de los frames (alto, ancho, canales).
+        num_workers (int): Cantidad de procesos del pool.
+        num_slots (int): Cantidad máxima de frames en vuelo.
+        output_shape (tuple): Forma de la salida del modelo para un frame.
+    """
+    def __init__(self, model_path, frame_shape, num_workers=2, num_threads=1, max_in_flight=None,
+                 timeout=60.0):
+        """
+        Inicializa el pool, lanza los procesos y espera a que todos carguen el modelo.
+
+        Args:
+            model_path (str): Ruta al archivo del modelo TFLite.
+            frame_shape (tuple): Forma de los frames (alto, ancho, canales).
+            num_workers (int): Cantidad de procesos del pool.
+            num_threads (int): Cantidad de hilos del intérprete de cada proceso.
+            max_in_flight (int): Cantidad máxima de frames en vuelo. Por defecto el doble de procesos.
+            timeout (float): Tiempo máximo de espera para la carga del modelo, en segundos.
+
+        Raises:
+            ValueError: Si los parámetros no son válidos.
+            RuntimeError: Si algún proceso falla al cargar el modelo.
+        """
+        if num_workers < 1:
+            raise ValueError("Error: El pool necesita al menos un proceso.")
+        self.frame_shape = tuple(frame_shape)
+        self.num_workers = num_workers
+        self.num_slots = max_in_flight or 2 * num_workers
+        if self.num_slots < num_workers:
+            raise ValueError("Error: max_in_flight debe ser al menos igual a la cantidad de procesos.")
+        self.output_shape = None
+        self._timeout = timeout
+        self._output_shm = None
+        self._outputs = None
+        self._free_slots = list(range(self.num_slots))
+        self._completed = {}
+        self._in_flight = [0] * num_workers
+        self._next_seq = 0
+
+        self._input_shm = shared_memory.SharedMemory(
+            create=True, size=self.num_slots * int(np.prod(self.frame_shape)))
+        self._frames = np.ndarray((self.num_slots, *self.frame_shape), dtype=np.uint8,
+                                  buffer=self._input_shm.buf)
+
+        # 'spawn' evita heredar el estado de TensorFlow del proceso principal
+        context = mp.get_context('spawn')
+        self._result_queue = context.Queue()
+        self._task_queues = [context.Queue() for _ in range(num_workers)]
+        self._workers = [
+            context.Process(
+                target=_worker_main,
+                args=(worker_id, model_path, num_threads, self.frame_shape, self.num_slots,
+                      self._input_shm.name, self._task_queues[worker_id], self._result_queue),
+                daemon=True)
+            for worker_id in range(num_workers)
+        ]
+        try:
+            for worker in self._workers:
+                worker.start()
+            self._wait_until_ready()
+        except Exception:
+            self.close()
+            raise
+
+    def _wait_until_ready(self):
+        """
+        Espera a que todos los procesos carguen el modelo y les comunica la memoria compartida
+        de salida.
+
+        Raises:
+            RuntimeError: Si algún proceso falla o no responde a tiempo.
+        """
+        ready = 0
+        while ready < self.num_workers:
+            message = self._get_message(timeout=self._timeout)
+            if message[0] == 'ready':
+                self.output_shape = message[2]
+                ready += 1
+        self._output_shm = shared_memory.SharedMemory(
+            create=True, size=self.num_slots * int(np.prod(self.output_shape)) * np.dtype(np.float32).itemsize)
+        self._outputs = np.ndarray((self.num_slots, *self.output_shape), dtype=np.float32,
+                                   buffer=self._output_shm.buf)
+        for task_queue in self._task_queues:
+            task_queue.put(('attach', self._output_shm.name))
+
+    def _get_message(self, timeout):
+        """
+        Obtiene el siguiente mensaje de los procesos, comprobando periódicamente que sigan vivos
+        para que un fallo se reporte como error en lugar de bloquear el pool.
+
+        Args:
+            timeout (float): Tiempo máximo de espera, en segundos.
+
+        Returns:
+            tuple: Mensaje recibido.
+
+        Raises:
+            RuntimeError: Si un proceso reporta un error, termina inesperadamente o no responde a tiempo.
+        """
+        waited = 0.0
+        while waited < timeout:
+            try:
+                message = self._result_queue.get(timeout=0.5)
+            except queue.Empty:
+                waited += 0.5
+                for worker_id, worker in enumerate(self._workers):
+                    if not worker.is_alive():
+                        raise RuntimeError(f"Error: El proceso {worker_id} del pool terminó inesperadamente "
+                                           f"(código {worker.exitcode}).")
+                continue
+            if message[0] == 'error':
+                raise RuntimeError(f"Error en el proceso {message[1]} del pool:\n{message[2]}")
+            return message
+        raise RuntimeError(f"Error: El pool no respondió en {timeout} segundos.")
+
+    def _submit(self, frame):
+        """
+        Copia un frame a una posición libre de la memoria compartida y lo asigna al proceso con
+        menos frames en vuelo. Los frames de otro tamaño se redimensionan al del pool al
+        copiarlos; los procesos los redimensionan de todos modos a la entrada del modelo.
+
+        Args:
+            frame (ndarray): Frame a procesar.
+
+        Returns:
+            int: Número de secuencia del frame.
+
+        Raises:
+            ValueError: Si la cantidad de canales del frame no coincide con la del pool.
+        """
+        if frame.shape[2:] != self.frame_shape[2:]:
+            raise ValueError(f"Error: Se esperaba un frame con forma {self.frame_shape}, se recibió {frame.shape}.")
+        slot = self._free_slots.pop()
+        if frame.shape == self.frame_shape:
+            np.copyto(self._frames[slot], frame)
+        else:
+            height, width = self.frame_shape[:2]
+            cv2.resize(frame, (width, height), dst=self._frames[slot], interpolation=cv2.INTER_AREA)
+        worker_id = self._in_flight.index(min(self._in_flight))
+        self._in_flight[worker_id] += 1
+        seq = self._next_seq
+        self._next_seq += 1
+        self._task_queues[worker_id].put(('frame', seq, slot))
+        return seq
+
+    def _pop_result(self, seq):
+        """
+        Espera el resultado de un frame y libera su posición de la memoria compartida.
+
+        Args:
+            seq (int): Número de secuencia del frame.
+
+        Returns:
+            ndarray: Salida del modelo para el frame.
+        """
+        while seq not in self._completed:
+            _, worker_id, done_seq, slot = self._get_message(timeout=self._timeout)
+            self._in_flight[worker_id] -= 1
+            self._completed[done_seq] = slot
+        slot = self._completed.pop(seq)
+        output = self._outputs[slot].copy()
+        self._free_slots.append(slot)
+        return output
+
+    def map(self, frames):
+        """
+        Procesa una secuencia de frames en paralelo y devuelve las salidas en el mismo orden.
+        Cuando todas las posiciones de la memoria compartida están ocupadas, se espera al frame
+        más antiguo antes de aceptar uno nuevo.
+
+        Args:
+            frames (iterable): Frames a procesar.
+
+        Yields:
+            ndarray: Salida del modelo para cada frame, en orden.
+        """
+        pending = collections.deque()
+        for frame in frames:
+            if not self._free_slots:
+                yield self._pop_result(pending.popleft())
+            pending.append(self._submit(frame))
+        while pending:
+            yield self._pop_result(pending.popleft())
+
+    def close(self):
+        """
+        Detiene los procesos del pool y libera la memoria compartida.
+        """
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for worker in self._workers:
+            if worker.pid is None:
+                continue
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        self._frames = None
+        self._outputs = None
+        for shm in (self._input_shm, self._output_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._input_shm = None
+        self._output_shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
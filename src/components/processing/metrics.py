@@ -0,0 +1,518 @@
+import collections
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import cv2
+
+class LatencyHistogram:
+    """
+    Histograma deslizante de latencias. Conserva las últimas mediciones en una ventana de
+    tamaño fijo y calcula sus percentiles bajo demanda.
+
+    Attributes:
+        count (int): Cantidad total de mediciones registradas.
+    """
+    def __init__(self, window=512):
+        """
+        Inicializa el histograma.
+
+        Args:
+            window (int): Cantidad de mediciones recientes que se conservan.
+        """
+        self.count = 0
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """
+        Registra una medición.
+
+        Args:
+            seconds (float): Latencia medida, en segundos.
+        """
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """
+        Resume las mediciones de la ventana.
+
+        Returns:
+            dict: Cantidad total y p50, p95, p99 y máximo de la ventana en milisegundos, o
+            None si no hay mediciones.
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            values = 1000 * np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+            count = self.count
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        return {'count': count, 'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                'max': float(values.max())}
+
+
+class _Timer:
+    """
+    Contexto que mide la duración de un bloque con un reloj monotónico.
+    """
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    """
+    Contexto vacío utilizado cuando la instrumentación está desactivada.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas de la aplicación: histogramas de latencia por etapa, contadores y
+    valores instantáneos (por ejemplo, la profundidad de las colas). Las métricas se publican
+    a través de destinos intercambiables. Cuando está desactivado, medir una etapa solo cuesta
+    una llamada que devuelve un contexto vacío.
+
+    Attributes:
+        enabled (bool): Indicador de si se registran métricas.
+        sinks (list): Destinos donde se publican las métricas.
+    """
+    def __init__(self, enabled=True, sinks=None, window=512):
+        """
+        Inicializa el registro.
+
+        Args:
+            enabled (bool): Si es False, ninguna métrica se registra.
+            sinks (list): Destinos donde se publican las métricas.
+            window (int): Cantidad de mediciones recientes por histograma.
+        """
+        self.enabled = enabled
+        self.sinks = sinks or []
+        self._window = window
+        self._histograms = {}
+        self._counters = collections.Counter()
+        self._gauges = collections.defaultdict(dict)
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+
+    def time(self, stage):
+        """
+        Devuelve un contexto que mide la duración de una etapa.
+
+        Args:
+            stage (str): Nombre de la etapa.
+
+        Returns:
+            object: Contexto para usar con `with`.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram(self._window))
+        return _Timer(histogram)
+
+    def record(self, stage, seconds):
+        """
+        Registra una latencia medida externamente.
+
+        Args:
+            stage (str): Nombre de la etapa.
+            seconds (float): Latencia, en segundos.
+        """
+        if not self.enabled:
+            return
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram(self._window))
+        histogram.record(seconds)
+
+    def count(self, name, value=1):
+        """
+        Incrementa un contador.
+
+        Args:
+            name (str): Nombre del contador.
+            value (int): Incremento.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name, value, label=None):
+        """
+        Actualiza un valor instantáneo.
+
+        Args:
+            name (str): Nombre de la métrica.
+            value (float): Valor actual.
+            label (str): Etiqueta opcional, por ejemplo el nombre de una cola.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[name][label] = value
+
+    def snapshot(self):
+        """
+        Devuelve el estado actual de todas las métricas.
+
+        Returns:
+            dict: Tiempo de actividad, latencias por etapa, contadores y valores instantáneos.
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+            gauges = {name: dict(values) for name, values in self._gauges.items()}
+        latency = {}
+        for stage, histogram in histograms.items():
+            summary = histogram.summary()
+            if summary is not None:
+                latency[stage] = summary
+        return {
+            'uptime_s': time.monotonic() - self._start_time,
+            'latency_ms': latency,
+            'counters': counters,
+            'gauges': gauges,
+        }
+
+    def publish(self, frame=None):
+        """
+        Publica las métricas en los destinos cuyo intervalo se cumplió. Se llama una vez por frame.
+
+        Args:
+            frame (ndarray): Frame visualizado, sobre el cual los destinos de superposición dibujan.
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        snapshot = None
+        for sink in self.sinks:
+            if sink.is_due(now):
+                if snapshot is None:
+                    snapshot = self.snapshot()
+                sink.emit(snapshot)
+            if frame is not None:
+                sink.draw(frame)
+
+    def close(self):
+        """
+        Publica las métricas finales y libera los recursos de los destinos.
+        """
+        if not self.enabled:
+            return
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.emit(snapshot)
+            sink.close()
+
+
+class MetricsSink:
+    """
+    Destino base de métricas. Emite como máximo una vez por intervalo.
+
+    Attributes:
+        interval (float): Segundos mínimos entre emisiones.
+    """
+    def __init__(self, interval=1.0):
+        """
+        Inicializa el destino.
+
+        Args:
+            interval (float): Segundos mínimos entre emisiones.
+        """
+        self.interval = interval
+        self._last_emit = float('-inf')
+
+    def is_due(self, now):
+        """
+        Indica si corresponde emitir y, en ese caso, reinicia el intervalo.
+
+        Args:
+            now (float): Tiempo monotónico actual.
+
+        Returns:
+            bool: True si debe emitir.
+        """
+        if now - self._last_emit < self.interval:
+            return False
+        self._last_emit = now
+        return True
+
+    def emit(self, snapshot):
+        """
+        Publica una instantánea de las métricas.
+
+        Args:
+            snapshot (dict): Instantánea devuelta por MetricsRegistry.snapshot.
+        """
+
+    def draw(self, frame):
+        """
+        Dibuja sobre el frame visualizado. Solo lo usan los destinos de superposición.
+
+        Args:
+            frame (ndarray): Frame a modificar.
+        """
+
+    def close(self):
+        """
+        Libera los recursos del destino.
+        """
+
+
+class OverlaySink(MetricsSink):
+    """
+    Dibuja las latencias por etapa sobre el frame visualizado.
+    """
+    def __init__(self, interval=0.5):
+        """
+        Inicializa el destino de superposición.
+
+        Args:
+            interval (float): Segundos entre actualizaciones del texto dibujado.
+        """
+        super().__init__(interval)
+        self._lines = []
+
+    def emit(self, snapshot):
+        """
+        Prepara las líneas de texto con los percentiles de latencia de cada etapa.
+
+        Args:
+            snapshot (dict): Instantánea devuelta por MetricsRegistry.snapshot.
+        """
+        self._lines = [f"{stage}: p50 {stats['p50']:.1f} p95 {stats['p95']:.1f} ms"
+                       for stage, stats in snapshot['latency_ms'].items()]
+
+    def draw(self, frame):
+        """
+        Dibuja las últimas líneas preparadas sobre el frame.
+
+        Args:
+            frame (ndarray): Frame a modificar.
+        """
+        for i, line in enumerate(self._lines):
+            cv2.putText(frame, line, (7, 110 + 25 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                        (100, 255, 0), 2, cv2.LINE_AA)
+
+
+class LogSink(MetricsSink):
+    """
+    Imprime periódicamente una línea con las latencias y contadores.
+    """
+    def __init__(self, interval=5.0):
+        """
+        Inicializa el destino de registro por consola.
+
+        Args:
+            interval (float): Segundos entre líneas impresas.
+        """
+        super().__init__(interval)
+
+    def emit(self, snapshot):
+        """
+        Imprime una línea con las latencias p50/p95/p99, los contadores y los indicadores.
+
+        Args:
+            snapshot (dict): Instantánea devuelta por MetricsRegistry.snapshot.
+        """
+        latency = " ".join(f"{stage}={stats['p50']:.1f}/{stats['p95']:.1f}/{stats['p99']:.1f}ms"
+                           for stage, stats in snapshot['latency_ms'].items())
+        counters = " ".join(f"{name}={value}" for name, value in snapshot['counters'].items())
+        gauges = " ".join(f"{name}[{label}]={value}" if label else f"{name}={value}"
+                          for name, values in snapshot['gauges'].items() for label, value in values.items())
+        print(f"[métricas] {latency} {counters} {gauges}".rstrip())
+
+
+class JsonFileSink(MetricsSink):
+    """
+    Escribe periódicamente la instantánea de métricas en un archivo JSON. El archivo se
+    reemplaza de forma atómica para que un lector nunca vea un archivo a medio escribir.
+
+    Attributes:
+        path (str): Ruta del archivo JSON.
+    """
+    def __init__(self, path, interval=5.0):
+        """
+        Inicializa el destino de archivo JSON.
+
+        Args:
+            path (str): Ruta del archivo JSON.
+            interval (float): Segundos entre escrituras del archivo.
+        """
+        super().__init__(interval)
+        self.path = path
+
+    def emit(self, snapshot):
+        """
+        Escribe la instantánea en un archivo temporal y lo reemplaza sobre el archivo final.
+
+        Args:
+            snapshot (dict): Instantánea devuelta por MetricsRegistry.snapshot.
+        """
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(temporary_path, self.path)
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Sirve las métricas en formato de texto de Prometheus a través de un servidor HTTP local en
+    la ruta /metrics. Las métricas se calculan en cada consulta.
+
+    Attributes:
+        registry (MetricsRegistry): Registro del cual se leen las métricas.
+        server (ThreadingHTTPServer): Servidor HTTP.
+    """
+    def __init__(self, registry, port=9100, host='127.0.0.1'):
+        """
+        Inicializa el destino e inicia el servidor HTTP en un hilo en segundo plano.
+
+        Args:
+            registry (MetricsRegistry): Registro del cual se leen las métricas.
+            port (int): Puerto del servidor HTTP.
+            host (str): Dirección en la que escucha el servidor.
+        """
+        super().__init__(interval=float('inf'))
+        self.registry = registry
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                """
+                Responde en /metrics con las métricas actuales y con 404 en cualquier otra ruta.
+                """
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = sink.render(sink.registry.snapshot()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                """
+                Silencia el registro de cada solicitud que hace BaseHTTPRequestHandler.
+                """
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"Métricas de Prometheus disponibles en http://{host}:{port}/metrics")
+
+    @staticmethod
+    def _metric_name(name):
+        """
+        Convierte un nombre de métrica a un nombre válido de Prometheus con el prefijo del proyecto.
+
+        Args:
+            name (str): Nombre de la métrica.
+
+        Returns:
+            str: Nombre de la métrica para Prometheus.
+        """
+        return "monodepth_" + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+    @staticmethod
+    def render(snapshot):
+        """
+        Convierte una instantánea al formato de texto de Prometheus.
+
+        Args:
+            snapshot (dict): Instantánea devuelta por MetricsRegistry.snapshot.
+
+        Returns:
+            str: Métricas en formato de texto de Prometheus.
+        """
+        lines = ["# TYPE monodepth_stage_latency_seconds summary"]
+        for stage, stats in snapshot['latency_ms'].items():
+            for quantile, key in (('0.5', 'p50'), ('0.95', 'p95'), ('0.99', 'p99'), ('1', 'max')):
+                lines.append(f'monodepth_stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                             f'{stats[key] / 1000:.6f}')
+            lines.append(f'monodepth_stage_latency_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for name, value in snapshot['counters'].items():
+            metric = PrometheusSink._metric_name(name) + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, values in snapshot['gauges'].items():
+            metric = PrometheusSink._metric_name(name)
+            lines.append(f"# TYPE {metric} gauge")
+            for label, value in values.items():
+                labels = f'{{label="{label}"}}' if label else ""
+                lines.append(f"{metric}{labels} {value}")
+        lines.append(f"monodepth_uptime_seconds {snapshot['uptime_s']:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        """
+        Detiene el servidor HTTP y libera el puerto.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+
+SINK_NAMES = ('overlay', 'log', 'json', 'prometheus')
+
+def create_metrics(sink_names, json_path="metrics.json", port=9100, log_interval=5.0):
+    """
+    Crea un registro de métricas con los destinos indicados.
+
+    Args:
+        sink_names (list): Nombres de los destinos: 'overlay', 'log', 'json' o 'prometheus'.
+                           Si está vacío, la instrumentación queda desactivada.
+        json_path (str): Ruta del archivo del destino 'json'.
+        port (int): Puerto del destino 'prometheus'.
+        log_interval (float): Segundos entre líneas del destino 'log' y escrituras del destino 'json'.
+
+    Returns:
+        MetricsRegistry: Registro de métricas.
+
+    Raises:
+        ValueError: Si algún destino no es válido.
+    """
+    if not sink_names:
+        return MetricsRegistry(enabled=False)
+    registry = MetricsRegistry()
+    for name in sink_names:
+        if name == 'overlay':
+            registry.sinks.append(OverlaySink())
+        elif name == 'log':
+            registry.sinks.append(LogSink(interval=log_interval))
+        elif name == 'json':
+            registry.sinks.append(JsonFileSink(json_path, interval=log_interval))
+        elif name == 'prometheus':
+            registry.sinks.append(PrometheusSink(registry, port=port))
+        else:
+            raise ValueError(f"Error: Destino de métricas no válido. Las opciones son {SINK_NAMES}.")
+    return registry
@@ -0,0 +1,394 @@
+import collections
+import os
+import re
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
+
+# Especificación de un modelo: ruta, con una resolución de entrada opcional ("modelo.tflite@256x192")
+_SPEC_PATTERN = re.compile(r"^(?P<path>.+?)(?:@(?P<width>\d+)x(?P<height>\d+))?$")
+
+def parse_spec(spec):
+    """
+    Interpreta la especificación de un modelo del registro.
+
+    Args:
+        spec (str): Ruta del modelo TFLite, opcionalmente seguida de '@ANCHOxALTO' para
+                    cambiar la resolución de entrada.
+
+    Returns:
+        tuple: Ruta del modelo y resolución (ancho, alto), o None para la del modelo.
+    """
+    match = _SPEC_PATTERN.match(spec)
+    if match.group('width') is None:
+        return match.group('path'), None
+    return match.group('path'), (int(match.group('width')), int(match.group('height')))
+
+class ModelRegistry:
+    """
+    Registro de intérpretes cargados que permite cambiar de modelo sin detener el bucle de
+    procesamiento. Los modelos nuevos se cargan, reservan y calientan en un hilo en segundo
+    plano mientras el modelo activo sigue atendiendo frames; el cambio se aplica de forma
+    atómica entre dos frames, cuando el bucle llama a current. Los modelos cargados se
+    conservan en orden de uso y, si se supera el límite de memoria, se descartan los usados
+    hace más tiempo (nunca el activo ni el que está por activarse).
+
+    Cada cambio registra su latencia (desde la solicitud hasta el primer frame con el modelo
+    nuevo) y una estimación de los frames perdidos durante el cambio, calculada a partir de los
+    intervalos entre frames que superan el intervalo habitual.
+
+    Attributes:
+        specs (list): Especificaciones de los modelos que se recorren con request_next.
+        max_memory (int): Memoria máxima estimada de los modelos cargados, en bytes, o None.
+        num_threads (int): Hilos de cada intérprete, o None para el valor por defecto.
+        use_xnnpack (bool): Indicador de si los intérpretes usan el delegado XNNPACK.
+        active_spec (str): Especificación del modelo activo.
+        swaps (list): Resumen de cada cambio realizado: modelos, latencia y frames perdidos.
+        evictions (int): Cantidad de modelos descartados por el límite de memoria.
+    """
+    def __init__(self, specs, max_memory_mb=None, num_threads=None, use_xnnpack=True, metrics=None):
+        """
+        Inicializa el registro y carga el primer modelo, que queda activo.
+
+        Args:
+            specs (list): Especificaciones de los modelos. El primero es el modelo inicial.
+            max_memory_mb (float): Memoria máxima estimada de los modelos cargados, en MB, o
+                                   None para conservarlos todos.
+            num_threads (int): Hilos de cada intérprete, o None para el valor por defecto.
+            use_xnnpack (bool): Indicador de si los intérpretes usan el delegado XNNPACK.
+            metrics (MetricsRegistry): Registro de métricas donde se publican los cambios, o None.
+
+        Raises:
+            ValueError: Si no hay modelos o el límite de memoria no es válido.
+        """
+        if not specs:
+            raise ValueError("Error: El registro necesita al menos un modelo.")
+        if max_memory_mb is not None and max_memory_mb <= 0:
+            raise ValueError("Error: El límite de memoria debe ser positivo.")
+        self.specs = list(specs)
+        self.max_memory = int(max_memory_mb * 2**20) if max_memory_mb is not None else None
+        self.num_threads = num_threads
+        self.use_xnnpack = use_xnnpack
+        self.metrics = metrics
+        self.swaps = []
+        self.evictions = 0
+        # Modelos cargados en orden de uso: el último es el usado más recientemente
+        self._models = collections.OrderedDict()
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="carga-modelo")
+        self._futures = {}
+        self._swap = None
+        self._cycle_requested = False
+        # Última especificación solicitada y especificaciones que no se pudieron cargar, que
+        # request_next omite para no quedar atascado en un modelo roto
+        self._requested_spec = None
+        self._failed = set()
+        self._last_frame_time = None
+        self._frame_interval = None
+
+        self.active_spec = self._requested_spec = self.specs[0]
+        self._store(self.active_spec, self._load(self.active_spec))
+        self._active = self._models[self.active_spec]
+
+    @property
+    def active(self):
+        """
+        Intérprete del modelo activo, sin aplicar cambios pendientes.
+
+        Returns:
+            TFLiteModelInterpreter: Modelo activo.
+        """
+        return self._active
+
+    def _load(self, spec):
+        """
+        Crea, reserva y calienta el intérprete de un modelo. Se ejecuta en el hilo de carga,
+        salvo el modelo inicial.
+
+        Args:
+            spec (str): Especificación del modelo.
+
+        Returns:
+            TFLiteModelInterpreter: Intérprete listo para inferir.
+        """
+        path, size = parse_spec(spec)
+        # Si se cambia la resolución, el calentamiento se hace una sola vez, con la forma final
+        model = TFLiteModelInterpreter(model_path=path, num_threads=self.num_threads,
+                                       use_xnnpack=self.use_xnnpack, warmup=size is None)
+        if size is not None:
+            model.resize_input(height=size[1], width=size[0])
+            model.warmup()
+        return model
+
+    @staticmethod
+    def estimate_memory(model, path):
+        """
+        Estima la memoria ocupada por un intérprete: el archivo del modelo, que ya incluye los
+        pesos constantes, más los buffers de entrada y salida. Los tensores intermedios no se
+        cuentan, ya que la API del intérprete no distingue los constantes de los de la arena.
+
+        Args:
+            model (TFLiteModelInterpreter): Intérprete cargado.
+            path (str): Ruta del modelo.
+
+        Returns:
+            int: Memoria estimada, en bytes.
+        """
+        tensors = 0
+        for detail in model.input_details + model.output_details:
+            tensors += int(np.prod(detail['shape'])) * np.dtype(detail['dtype']).itemsize
+        return os.path.getsize(path) + tensors
+
+    def _store(self, spec, model):
+        """
+        Agrega un modelo cargado al registro y descarta los menos usados si se supera el límite
+        de memoria.
+
+        Args:
+            spec (str): Especificación del modelo.
+            model (TFLiteModelInterpreter): Intérprete cargado.
+        """
+        memory = self.estimate_memory(model, parse_spec(spec)[0])
+        with self._lock:
+            self._models[spec] = model
+            self._memory[spec] = memory
+            self._models.move_to_end(spec)
+            self._evict()
+
+    def _evict(self):
+        """
+        Descarta los modelos usados hace más tiempo hasta respetar el límite de memoria. Debe
+        llamarse con el bloqueo tomado.
+        """
+        if self.max_memory is None:
+            return
+        protected = {self.active_spec}
+        if self._swap is not None:
+            protected.add(self._swap['target'])
+        for spec in list(self._models):
+            if sum(self._memory.values()) <= self.max_memory:
+                return
+            if spec in protected:
+                continue
+            del self._models[spec]
+            del self._memory[spec]
+            self.evictions += 1
+            print(f"Modelo descartado por el límite de memoria: {spec}")
+        if sum(self._memory.values()) > self.max_memory:
+            print(f"Advertencia: Los modelos en uso ocupan {self.memory_mb():.0f} MB, más que el límite de "
+                  f"{self.max_memory / 2**20:.0f} MB.")
+
+    def memory_mb(self):
+        """
+        Devuelve la memoria estimada de los modelos cargados.
+
+        Returns:
+            float: Memoria estimada, en MB.
+        """
+        return sum(self._memory.values()) / 2**20
+
+    def preload(self, spec):
+        """
+        Carga un modelo en segundo plano sin activarlo.
+
+        Args:
+            spec (str): Especificación del modelo.
+
+        Returns:
+            concurrent.futures.Future: Carga en curso, o None si el modelo ya estaba cargado.
+        """
+        with self._lock:
+            if spec in self._models:
+                return None
+            future = self._futures.get(spec)
+            if future is None:
+                future = self._executor.submit(self._load_and_store, spec)
+                self._futures[spec] = future
+            return future
+
+    def _load_and_store(self, spec):
+        """
+        Tarea del hilo de carga: carga el modelo y lo agrega al registro.
+
+        Args:
+            spec (str): Especificación del modelo.
+        """
+        try:
+            self._store(spec, self._load(spec))
+        finally:
+            with self._lock:
+                self._futures.pop(spec, None)
+
+    def request_swap(self, spec):
+        """
+        Solicita activar un modelo. Si no está cargado se carga en segundo plano; el cambio se
+        aplica en el primer frame en que esté listo. Una solicitud nueva reemplaza a la pendiente.
+
+        Args:
+            spec (str): Especificación del modelo.
+        """
+        self._requested_spec = spec
+        if spec == self.active_spec:
+            # Volver al modelo activo cancela el cambio pendiente
+            with self._lock:
+                self._swap = None
+            return
+        future = self.preload(spec)
+        with self._lock:
+            if self._swap is not None and self._swap['target'] == spec:
+                return
+            print(f"Cambio de modelo solicitado: {spec}")
+            # El intervalo habitual entre frames se congela para estimar los frames perdidos
+            self._swap = {'target': spec, 'future': future, 'requested': time.perf_counter(),
+                          'interval': self._frame_interval, 'dropped': 0, 'frames': 0}
+
+    def request_next(self):
+        """
+        Solicita activar el siguiente modelo de la lista, de forma cíclica, a partir del último
+        solicitado y omitiendo los que no se pudieron cargar.
+        """
+        target = self._requested_spec
+        index = self.specs.index(target) if target in self.specs else -1
+        for offset in range(1, len(self.specs) + 1):
+            spec = self.specs[(index + offset) % len(self.specs)]
+            if spec not in self._failed:
+                self.request_swap(spec)
+                return
+        print("Advertencia: No hay otros modelos disponibles.")
+
+    def install_signal_handler(self, signum=None):
+        """
+        Instala un manejador de señal que pasa al siguiente modelo. El manejador solo marca la
+        solicitud, que se atiende en la siguiente llamada a current, ya que una señal puede
+        interrumpir al hilo principal con el bloqueo del registro tomado.
+
+        Args:
+            signum (int): Señal que provoca el cambio, o None para SIGUSR1. En plataformas sin
+                          SIGUSR1 (Windows) no se instala ningún manejador.
+        """
+        if signum is None:
+            signum = getattr(signal, 'SIGUSR1', None)
+            if signum is None:
+                print("Advertencia: La plataforma no tiene SIGUSR1; el modelo solo se cambia con la tecla 'm'.")
+                return
+        def handler(received, frame):
+            self._cycle_requested = True
+        signal.signal(signum, handler)
+
+    def current(self, now=None):
+        """
+        Devuelve el modelo que debe usarse para el frame actual. Debe llamarse una vez por frame,
+        antes de la inferencia: si el modelo solicitado ya está cargado, el cambio se aplica aquí.
+
+        Args:
+            now (float): Marca de tiempo monotónica del frame, o None para la actual.
+
+        Returns:
+            TFLiteModelInterpreter: Modelo activo.
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self._cycle_requested:
+            self._cycle_requested = False
+            self.request_next()
+        self._observe_frame(now)
+        swap = self._swap
+        if swap is None:
+            return self._active
+        future = swap['future']
+        if future is not None and future.done() and future.exception() is not None:
+            print(f"Error al cargar el modelo {swap['target']}: {future.exception()}. Se omitirá en los "
+                  f"próximos cambios.")
+            with self._lock:
+                self._failed.add(swap['target'])
+                self._swap = None
+            return self._active
+        with self._lock:
+            model = self._models.get(swap['target'])
+            if model is not None:
+                self._models.move_to_end(swap['target'])
+        if model is None:
+            if future is None or future.done():
+                # El modelo fue descartado antes de activarse: volver a cargarlo
+                swap['future'] = self.preload(swap['target'])
+            return self._active
+        with self._lock:
+            previous, self.active_spec, self._active = self.active_spec, swap['target'], model
+            swap['previous'] = previous
+            # El modelo anterior deja de estar protegido y puede descartarse
+            self._evict()
+        # Este frame es el primero que procesa el modelo nuevo
+        self._finish_swap(now)
+        return model
+
+    def _observe_frame(self, now):
+        """
+        Actualiza el intervalo habitual entre frames y, durante un cambio, cuenta los frames
+        y estima los perdidos.
+
+        Args:
+            now (float): Marca de tiempo monotónica del frame.
+        """
+        last, self._last_frame_time = self._last_frame_time, now
+        if last is None:
+            return
+        interval = now - last
+        swap = self._swap
+        if swap is None:
+            self._frame_interval = interval if self._frame_interval is None else \
+                0.9 * self._frame_interval + 0.1 * interval
+            return
+        swap['frames'] += 1
+        if swap['interval']:
+            swap['dropped'] += max(int(round(interval / swap['interval'])) - 1, 0)
+
+    def _finish_swap(self, now):
+        """
+        Registra y reporta un cambio de modelo terminado.
+
+        Args:
+            now (float): Marca de tiempo del primer frame procesado por el modelo nuevo.
+        """
+        with self._lock:
+            swap, self._swap = self._swap, None
+        latency = now - swap['requested']
+        summary = {'from': swap['previous'], 'to': swap['target'], 'latency_s': latency,
+                   'dropped': swap['dropped'], 'frames': swap['frames']}
+        self.swaps.append(summary)
+        print(f"Modelo activo: {swap['target']} (cambio en {1000 * latency:.0f} ms, "
+              f"{swap['frames']} frames durante el cambio, {swap['dropped']} perdidos)")
+        if self.metrics is not None:
+            self.metrics.record('model_swap', latency)
+            self.metrics.count('model_swaps')
+            self.metrics.count('model_swap_dropped', swap['dropped'])
+            self.metrics.set_gauge('model_memory_mb', self.memory_mb())
+
+    def stats(self):
+        """
+        Resume los cambios de modelo realizados.
+
+        Returns:
+            dict: Modelo activo, modelos cargados, memoria estimada, cambios, latencia máxima
+            de cambio en segundos, frames perdidos y modelos descartados.
+        """
+        with self._lock:
+            loaded = list(self._models)
+        return {
+            'active': self.active_spec,
+            'loaded': loaded,
+            'memory_mb': self.memory_mb(),
+            'swaps': len(self.swaps),
+            'max_swap_s': max((swap['latency_s'] for swap in self.swaps), default=0.0),
+            'dropped': sum(swap['dropped'] for swap in self.swaps),
+            'evictions': self.evictions,
+        }
+
+    def close(self):
+        """
+        Detiene el hilo de carga, descartando las cargas que aún no comenzaron.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
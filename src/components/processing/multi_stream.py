@@ -0,0 +1,404 @@
+import threading
+import time
+from src.components.processing.camera_manager import CameraManager
+from src.components.processing.frame_sources import video_frames
+from src.components.processing.pipeline import BoundedQueue, PipelineStage, END_OF_STREAM
+from src.components.processing.metrics import LatencyHistogram, MetricsRegistry
+from src.components.processing.video_processor import VideoProcessor
+from src.components.storage.video_recorder import VideoRecorder
+
+class VideoStream:
+    """
+    Flujo de video independiente dentro del modo multi-fuente. Captura frames en su propio hilo
+    y mantiene sus propias colas, post-procesamiento, grabador y estadísticas.
+
+    Attributes:
+        name (str): Nombre del flujo, utilizado en ventanas, archivos y métricas.
+        source (int or str): Índice de la cámara o ruta del video.
+        frames (BoundedQueue): Frames capturados pendientes de inferencia.
+        results (BoundedQueue): Profundidades pendientes de post-procesamiento.
+        video_processor (VideoProcessor): Procesador de video propio del flujo.
+        video_recorder (VideoRecorder): Grabador del flujo, o None si no se graba.
+        finished (bool): Indicador de si la fuente terminó.
+        processed (int): Frames post-procesados.
+        budget_misses (int): Frames cuya latencia de extremo a extremo superó el presupuesto.
+        latency (LatencyHistogram): Latencias desde la captura hasta el frame combinado.
+        output (ndarray): Último frame combinado, pendiente de visualizar.
+    """
+    def __init__(self, name, source, resolution_option=2, queue_size=2, overflow_policy=None,
+                 range_smoothing=None, camera_options=None):
+        """
+        Inicializa el flujo y abre su fuente de video.
+
+        Args:
+            name (str): Nombre del flujo.
+            source (int or str): Índice de la cámara o ruta del video.
+            resolution_option (int): Opción de resolución de las cámaras (1, 2, 3 o 4).
+            queue_size (int): Capacidad de las colas del flujo.
+            overflow_policy (str): 'drop_oldest' o 'block'. Si es None se usa 'drop_oldest' para
+                                   cámaras en vivo y 'block' para archivos de video.
+            range_smoothing (float): Suavizado temporal del rango de profundidad del mapa de colores.
+            camera_options (dict): Argumentos adicionales de CameraManager. Con replay, los
+                                   archivos también se leen con CameraManager.
+
+        Raises:
+            ValueError: Si no se puede abrir la fuente de video.
+        """
+        self.name = name
+        self.source = source
+        if overflow_policy is None:
+            overflow_policy = 'drop_oldest' if isinstance(source, int) else 'block'
+        self.frames = BoundedQueue(f"{name}:captura->inferencia", queue_size, overflow_policy)
+        self.results = BoundedQueue(f"{name}:inferencia->post", queue_size, overflow_policy)
+        # Los frames combinados pueden seguir pendientes de visualización mientras se procesa el siguiente
+        self.video_processor = VideoProcessor(buffer_count=queue_size + 2, range_smoothing=range_smoothing,
+                                              window_name=f"Visualizador {name}")
+        self.video_recorder = None
+        self.finished = False
+        self.processed = 0
+        self.budget_misses = 0
+        self.latency = LatencyHistogram()
+        self.output = None
+        self._output_lock = threading.Lock()
+        self._camera_manager = None
+        self._video = None
+        camera_options = camera_options or {}
+        # Con replay, los archivos se reproducen a su tasa original como si fueran cámaras
+        if isinstance(source, int) or camera_options.get('replay'):
+            self._camera_manager = CameraManager(source=source, resolution_option=resolution_option,
+                                                 **camera_options)
+        else:
+            self._video = video_frames(source)
+
+    def read_frame(self):
+        """
+        Lee el siguiente frame de la fuente.
+
+        Returns:
+            tuple: El frame y su marca de tiempo de captura, o None si la fuente terminó.
+        """
+        try:
+            if self._camera_manager is not None:
+                return self._camera_manager.read()
+            _, frame = next(self._video)
+        except (ValueError, StopIteration):
+            return None
+        return frame, time.perf_counter()
+
+    def start_recording(self, save_path="src/videos", record_mode='video'):
+        """
+        Crea el grabador del flujo e inicia la grabación. La resolución del video se toma del
+        primer frame, ya que cada fuente puede tener un tamaño distinto.
+
+        Args:
+            save_path (str): Directorio de las grabaciones.
+            record_mode (str): 'video', 'depth' o 'both'.
+        """
+        self.video_recorder = VideoRecorder(
+            save_path=save_path,
+            frame_rate=None,
+            resolution_option=None,
+            record_mode=record_mode,
+            overflow_policy=self.frames.overflow_policy,
+            name_suffix=f"_{self.name}")
+        self.video_recorder.start_recording()
+
+    def take_output(self):
+        """
+        Devuelve el último frame combinado y lo marca como visualizado.
+
+        Returns:
+            ndarray: Frame combinado, o None si no hay uno nuevo.
+        """
+        with self._output_lock:
+            output, self.output = self.output, None
+        return output
+
+    def set_output(self, output):
+        """
+        Publica un frame combinado para su visualización. Si el anterior no llegó a
+        visualizarse, su buffer se devuelve al procesador de video.
+
+        Args:
+            output (ndarray): Frame combinado.
+        """
+        with self._output_lock:
+            replaced, self.output = self.output, output
+        self.video_processor.release_output(replaced)
+
+    def release(self):
+        """
+        Libera la fuente de video y detiene el grabador.
+        """
+        if self._camera_manager is not None:
+            self._camera_manager.release()
+        if self._video is not None:
+            self._video.close()
+        if self.video_recorder is not None:
+            self.video_recorder.stop_recording()
+
+
+class MultiStreamEngine:
+    """
+    Sirve varias fuentes de video con un único intérprete TFLite. Cada flujo captura en su propio
+    hilo; un hilo de inferencia agrupa en cada lote como máximo un frame por flujo, recorriendo
+    los flujos en orden rotativo para que ninguno quede relegado, y espera a completar el lote
+    solo mientras el frame más antiguo respete el presupuesto de latencia. Las profundidades se
+    devuelven a la cola de post-procesamiento de cada flujo, que colorea, graba y mide su latencia
+    de extremo a extremo.
+
+    Attributes:
+        depth_model (TFLiteModelInterpreter): Intérprete compartido, con batch_size igual a max_batch.
+        streams (list): Flujos de video servidos.
+        max_batch (int): Cantidad máxima de frames por inferencia.
+        latency_budget (float): Latencia máxima deseada desde la captura hasta el frame
+        combinado, en segundos.
+        max_wait (float): Tiempo máximo de espera para completar un lote, en segundos.
+        metrics (MetricsRegistry): Registro de latencias por flujo, contadores y tamaños de lote.
+        batches (int): Inferencias realizadas.
+        batched_frames (int): Frames procesados en total por las inferencias.
+    """
+    def __init__(self, depth_model, streams, max_batch=None, latency_budget=0.2, max_wait=0.01,
+                 metrics=None):
+        """
+        Inicializa el motor y ajusta el tamaño de lote del intérprete.
+
+        Args:
+            depth_model (TFLiteModelInterpreter): Intérprete compartido por todos los flujos.
+            streams (list): Flujos de video (VideoStream).
+            max_batch (int): Cantidad máxima de frames por inferencia. Por defecto la cantidad de
+                             flujos. Los lotes incompletos se rellenan, por lo que valores mayores
+                             que la cantidad de flujos solo desperdician cómputo.
+            latency_budget (float): Presupuesto de latencia por frame, en segundos.
+            max_wait (float): Tiempo máximo de espera para completar un lote, en segundos.
+            metrics (MetricsRegistry): Registro de métricas. Si es None la instrumentación
+                                       queda desactivada.
+
+        Raises:
+            ValueError: Si no hay flujos, los parámetros no son válidos o el modelo no admite
+                        el tamaño de lote.
+        """
+        if not streams:
+            raise ValueError("Error: Se necesita al menos un flujo de video.")
+        max_batch = len(streams) if max_batch is None else max_batch
+        if max_batch < 1:
+            raise ValueError("Error: El tamaño de lote debe ser al menos 1.")
+        if latency_budget <= 0 or max_wait < 0:
+            raise ValueError("Error: El presupuesto de latencia debe ser positivo y la espera no negativa.")
+        self.depth_model = depth_model
+        self.streams = streams
+        self.max_batch = max_batch
+        self.latency_budget = latency_budget
+        self.max_wait = max_wait
+        self.metrics = metrics or MetricsRegistry(enabled=False)
+        self.batches = 0
+        self.batched_frames = 0
+        self.depth_model.resize_batch(max_batch)
+        self._stop_event = threading.Event()
+        self._next_stream = 0
+        # Estimación suavizada de la duración de una inferencia, descontada del presupuesto
+        self._inference_time = 0.0
+
+    def collect_batch(self):
+        """
+        Reúne el siguiente lote. Recorre los flujos empezando por el siguiente al primero del
+        lote anterior y toma como máximo un frame de cada uno. Si el lote no está completo
+        espera nuevos frames hasta max_wait, o menos si el frame más antiguo agotaría su
+        presupuesto de latencia.
+
+        Returns:
+            list: Tuplas (flujo, frame, marca de tiempo), vacía si todas las fuentes terminaron
+            o se solicitó parar.
+        """
+        batch = []
+        taken = set()
+        start = time.perf_counter()
+        count = len(self.streams)
+        while not self._stop_event.is_set():
+            for offset in range(count):
+                index = (self._next_stream + offset) % count
+                stream = self.streams[index]
+                if len(batch) == self.max_batch:
+                    break
+                if index in taken or stream.finished:
+                    continue
+                item = stream.frames.get_nowait()
+                if item is END_OF_STREAM:
+                    stream.finished = True
+                    stream.results.put_end()
+                elif item is not None:
+                    batch.append((stream, *item))
+                    taken.add(index)
+            active = sum(not stream.finished for stream in self.streams)
+            if len(batch) == self.max_batch or (batch and len(batch) == active) or active == 0:
+                break
+            now = time.perf_counter()
+            if batch:
+                oldest = min(timestamp for _, _, timestamp in batch)
+                deadline = min(start + self.max_wait,
+                               oldest + self.latency_budget - self._inference_time)
+                if now >= deadline:
+                    break
+            time.sleep(0.001)
+        if batch:
+            # El próximo lote empieza por el flujo siguiente, rotando la prioridad
+            self._next_stream = (self.streams.index(batch[0][0]) + 1) % count
+        return batch
+
+    def _inference_loop(self):
+        """
+        Bucle del hilo de inferencia: ejecuta un lote por iteración y reparte las profundidades
+        entre las colas de post-procesamiento de cada flujo.
+        """
+        try:
+            while not self._stop_event.is_set():
+                batch = self.collect_batch()
+                if not batch:
+                    break
+                start = time.perf_counter()
+                with self.metrics.time('preprocess'):
+                    self.depth_model.set_input_batch([frame for _, frame, _ in batch])
+                with self.metrics.time('invoke'):
+                    self.depth_model.invoke()
+                with self.metrics.time('get_output'):
+                    outputs = self.depth_model.get_output_batch(len(batch))
+                elapsed = time.perf_counter() - start
+                self._inference_time = elapsed if self.batches == 0 else 0.8 * self._inference_time + 0.2 * elapsed
+                self.batches += 1
+                self.batched_frames += len(batch)
+                self.metrics.set_gauge('batch_size', len(batch))
+                for (stream, frame, timestamp), output_data in zip(batch, outputs):
+                    stream.results.put((frame, output_data, timestamp), self._stop_event)
+        except Exception as e:
+            print(f"Error en el hilo de inferencia: {e}")
+            self._stop_event.set()
+        finally:
+            for stream in self.streams:
+                stream.results.put_end()
+
+    def _postprocess(self, stream):
+        """
+        Crea la función de post-procesamiento de un flujo.
+
+        Args:
+            stream (VideoStream): Flujo de video.
+
+        Returns:
+            callable: Función que colorea la profundidad, graba el resultado y registra la latencia.
+        """
+        def process(item):
+            frame, output_data, timestamp = item
+            with self.metrics.time(f'normalize[{stream.name}]'):
+                output = stream.video_processor.normalize_output(output_data=output_data, frame=frame)
+            if stream.video_recorder is not None:
+                stream.video_recorder.write_frame(frame=output, depth=output_data, timestamp=timestamp)
+            latency = time.perf_counter() - timestamp
+            stream.latency.record(latency)
+            self.metrics.record(f'end_to_end[{stream.name}]', latency)
+            if latency > self.latency_budget:
+                stream.budget_misses += 1
+                self.metrics.count(f'budget_misses[{stream.name}]')
+            stream.processed += 1
+            stream.video_processor.calculate_fps()
+            stream.set_output(output)
+            return None
+        return process
+
+    def run(self, display=True):
+        """
+        Ejecuta el motor hasta que terminen todas las fuentes o el usuario presione 'q'. Las
+        ventanas se gestionan desde el hilo principal, una por flujo.
+
+        Args:
+            display (bool): Si es False no se abren ventanas y se espera a que terminen las fuentes
+                            (o a Ctrl+C).
+        """
+        stop_event = self._stop_event
+        stages = []
+        for stream in self.streams:
+            stages.append(PipelineStage(f"captura-{stream.name}", stream.read_frame, stop_event,
+                                        output_queue=stream.frames))
+            stages.append(PipelineStage(f"post-{stream.name}", self._postprocess(stream), stop_event,
+                                        input_queue=stream.results))
+        inference = threading.Thread(target=self._inference_loop, name="inferencia", daemon=True)
+        start_time = time.perf_counter()
+        try:
+            print(f"Iniciando estimación de fondo monocular con {len(self.streams)} flujos")
+            for stage in stages:
+                stage.start()
+            inference.start()
+            while any(stage.is_alive() for stage in stages):
+                for stream in self.streams:
+                    output = stream.take_output()
+                    self.metrics.set_gauge('stream_fps', round(stream.video_processor.fps or 0.0, 1),
+                                           label=stream.name)
+                    self.metrics.set_gauge('queue_dropped', stream.frames.dropped, label=stream.frames.name)
+                    if output is None:
+                        continue
+                    self.metrics.count('frames')
+                    self.metrics.publish(frame=output)
+                    if display:
+                        stream.video_processor.visualize(output=output)
+                    stream.video_processor.release_output(output)
+                if display:
+                    if self.streams[0].video_processor.validate_stop():
+                        break
+                else:
+                    time.sleep(0.01)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_event.set()
+            inference.join()
+            for stage in stages:
+                stage.join()
+            elapsed = time.perf_counter() - start_time
+            self.report_stats(elapsed)
+            for stream in self.streams:
+                stream.release()
+            if display:
+                self.streams[0].video_processor.release()
+            self.metrics.close()
+
+    def stats(self, elapsed):
+        """
+        Devuelve las estadísticas de cada flujo.
+
+        Args:
+            elapsed (float): Duración total, en segundos.
+
+        Returns:
+            list: Por flujo, nombre, frames procesados, FPS, latencia de extremo a extremo
+            (p50/p95/p99 en milisegundos), frames fuera de presupuesto y frames descartados.
+        """
+        result = []
+        for stream in self.streams:
+            latency = stream.latency.summary() or {}
+            result.append({
+                'name': stream.name,
+                'processed': stream.processed,
+                'fps': stream.processed / elapsed if elapsed > 0 else 0.0,
+                'p50_ms': latency.get('p50'),
+                'p95_ms': latency.get('p95'),
+                'p99_ms': latency.get('p99'),
+                'budget_misses': stream.budget_misses,
+                'dropped': stream.frames.dropped + stream.results.dropped,
+            })
+        return result
+
+    def report_stats(self, elapsed):
+        """
+        Muestra el rendimiento de cada flujo y el tamaño medio de los lotes.
+
+        Args:
+            elapsed (float): Duración total, en segundos.
+        """
+        mean_batch = self.batched_frames / self.batches if self.batches else 0.0
+        print(f"Multi-fuente: {self.batches} inferencias en {elapsed:.2f} s, lote medio {mean_batch:.2f}/{self.max_batch}")
+        for stats in self.stats(elapsed):
+            latency = ""
+            if stats['p50_ms'] is not None:
+                latency = (f", latencia p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+                           f"p99 {stats['p99_ms']:.1f} ms")
+            print(f"  Flujo {stats['name']}: {stats['processed']} frames ({stats['fps']:.1f} FPS){latency}, "
+                  f"fuera de presupuesto {stats['budget_misses']}, descartados {stats['dropped']}")
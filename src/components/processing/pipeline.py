@@ -0,0 +1,248 @@
+import queue
+import threading
+import time
+
+# Marcador que indica el final del flujo de frames entre etapas
+END_OF_STREAM = object()
+
+class BoundedQueue:
+    """
+    Cola acotada que conecta dos etapas del pipeline. Aplica una política de desbordamiento
+    configurable y lleva estadísticas de ocupación y de frames descartados.
+
+    Attributes:
+        name (str): Nombre de la cola, utilizado en los reportes.
+        maxsize (int): Número máximo de elementos en la cola.
+        overflow_policy (str): 'drop_oldest' para descartar el elemento más antiguo cuando la cola
+        está llena, o 'block' para bloquear al productor hasta que haya espacio.
+        dropped (int): Cantidad de elementos descartados por desbordamiento.
+    """
+    POLICIES = ('drop_oldest', 'block')
+
+    def __init__(self, name, maxsize=2, overflow_policy='block'):
+        """
+        Inicializa la cola acotada.
+
+        Args:
+            name (str): Nombre de la cola.
+            maxsize (int): Número máximo de elementos en la cola.
+            overflow_policy (str): Política de desbordamiento, 'drop_oldest' o 'block'.
+
+        Raises:
+            ValueError: Si la política de desbordamiento o el tamaño no son válidos.
+        """
+        if overflow_policy not in self.POLICIES:
+            raise ValueError(f"Error: Política de desbordamiento no válida. Las opciones son {self.POLICIES}.")
+        if maxsize < 1:
+            raise ValueError("Error: El tamaño de la cola debe ser al menos 1.")
+        self.name = name
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._occupancy_sum = 0
+        self._occupancy_samples = 0
+        self._max_occupancy = 0
+
+    def put(self, item, stop_event):
+        """
+        Inserta un elemento en la cola aplicando la política de desbordamiento.
+
+        Args:
+            item (object): Elemento a insertar.
+            stop_event (threading.Event): Evento de parada; si se activa mientras se espera
+            espacio en la cola, el elemento se descarta.
+
+        Returns:
+            bool: True si el elemento fue insertado, False si se descartó por una parada.
+        """
+        self._sample_occupancy()
+        if self.overflow_policy == 'block':
+            while not stop_event.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                # Descartar el elemento más antiguo para dejar espacio al más reciente
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def put_end(self):
+        """
+        Inserta el marcador de fin de flujo. Si la cola está llena se descarta el elemento más
+        antiguo para garantizar que el consumidor reciba el marcador.
+        """
+        while True:
+            try:
+                self._queue.put_nowait(END_OF_STREAM)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, stop_event, timeout=0.1):
+        """
+        Obtiene el siguiente elemento de la cola.
+
+        Args:
+            stop_event (threading.Event): Evento de parada; si se activa se devuelve el marcador
+            de fin de flujo.
+            timeout (float): Tiempo máximo de espera por intento, en segundos.
+
+        Returns:
+            object: El siguiente elemento, o END_OF_STREAM si el flujo terminó o se solicitó parar.
+        """
+        while not stop_event.is_set():
+            try:
+                return self._queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
+        return END_OF_STREAM
+
+    def get_nowait(self):
+        """
+        Obtiene el siguiente elemento de la cola sin esperar.
+
+        Returns:
+            object: El siguiente elemento, o None si la cola está vacía.
+        """
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _sample_occupancy(self):
+        """
+        Registra la ocupación actual de la cola para el reporte de estadísticas.
+        """
+        occupancy = self._queue.qsize()
+        self._occupancy_sum += occupancy
+        self._occupancy_samples += 1
+        self._max_occupancy = max(self._max_occupancy, occupancy)
+
+    def qsize(self):
+        """
+        Devuelve la cantidad actual de elementos en la cola.
+
+        Returns:
+            int: Elementos en la cola.
+        """
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Devuelve las estadísticas de ocupación de la cola.
+
+        Returns:
+            dict: Ocupación media y máxima, capacidad y elementos descartados.
+        """
+        mean = self._occupancy_sum / self._occupancy_samples if self._occupancy_samples else 0.0
+        return {
+            'name': self.name,
+            'maxsize': self.maxsize,
+            'mean_occupancy': mean,
+            'max_occupancy': self._max_occupancy,
+            'dropped': self.dropped,
+        }
+
+
+class PipelineStage(threading.Thread):
+    """
+    Etapa del pipeline que se ejecuta en su propio hilo. Consume elementos de una cola de
+    entrada, los procesa y publica el resultado en una cola de salida. Una etapa sin cola de
+    entrada actúa como fuente y llama a la función de procesamiento sin argumentos hasta que
+    esta devuelve None.
+
+    Attributes:
+        process (callable): Función que procesa cada elemento.
+        input_queue (BoundedQueue): Cola de entrada, o None para una etapa fuente.
+        output_queue (BoundedQueue): Cola de salida, o None para una etapa final.
+        stop_event (threading.Event): Evento compartido para detener el pipeline.
+        processed (int): Cantidad de elementos procesados.
+        busy_time (float): Tiempo total dedicado a procesar elementos, en segundos.
+        error (Exception): Excepción que detuvo la etapa, si la hubo.
+    """
+    def __init__(self, name, process, stop_event, input_queue=None, output_queue=None):
+        """
+        Inicializa la etapa del pipeline.
+
+        Args:
+            name (str): Nombre de la etapa.
+            process (callable): Función que procesa cada elemento. Si devuelve None el
+            resultado no se publica (en una etapa fuente, indica el fin del flujo).
+            stop_event (threading.Event): Evento compartido para detener el pipeline.
+            input_queue (BoundedQueue): Cola de entrada, o None para una etapa fuente.
+            output_queue (BoundedQueue): Cola de salida, o None para una etapa final.
+        """
+        super().__init__(name=name, daemon=True)
+        self.process = process
+        self.stop_event = stop_event
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.processed = 0
+        self.busy_time = 0.0
+        self.error = None
+
+    def run(self):
+        """
+        Bucle principal de la etapa. Ante un error se activa el evento de parada para que el
+        resto del pipeline termine de forma ordenada.
+        """
+        try:
+            while not self.stop_event.is_set():
+                if self.input_queue is None:
+                    start = time.perf_counter()
+                    result = self.process()
+                    self.busy_time += time.perf_counter() - start
+                    if result is None:
+                        break
+                else:
+                    item = self.input_queue.get(self.stop_event)
+                    if item is END_OF_STREAM:
+                        break
+                    start = time.perf_counter()
+                    result = self.process(item)
+                    self.busy_time += time.perf_counter() - start
+                self.processed += 1
+                if self.output_queue is not None and result is not None:
+                    self.output_queue.put(result, self.stop_event)
+        except Exception as e:
+            print(f"Error en la etapa {self.name}: {e}")
+            self.error = e
+            self.stop_event.set()
+        finally:
+            if self.output_queue is not None:
+                self.output_queue.put_end()
+
+    def stats(self, elapsed):
+        """
+        Devuelve las estadísticas de la etapa.
+
+        Args:
+            elapsed (float): Duración total del pipeline, en segundos.
+
+        Returns:
+            dict: Elementos procesados, tiempo medio por elemento y fracción de tiempo ocupada.
+        """
+        mean_ms = 1000 * self.busy_time / self.processed if self.processed else 0.0
+        utilization = self.busy_time / elapsed if elapsed > 0 else 0.0
+        return {
+            'name': self.name,
+            'processed': self.processed,
+            'mean_ms': mean_ms,
+            'utilization': utilization,
+        }
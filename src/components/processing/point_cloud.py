@@ -0,0 +1,214 @@
+import math
+import numpy as np
+
+class PointCloudProjector:
+    """
+    Retroproyecta mapas de profundidad a nubes de puntos 3D con un modelo de cámara estenopeica.
+    Para cada resolución de profundidad se precalcula una sola vez la grilla de rayos
+    ((u - cx) / fx, (v - cy) / fy, 1) de los píxeles muestreados, de modo que cada frame se
+    proyecta con un producto vectorizado, sin bucles por píxel en Python. La profundidad se usa
+    sin normalizar, tal como la entrega el modelo, multiplicada por depth_scale.
+
+    Los parámetros intrínsecos se expresan en píxeles de la imagen de la cámara (image_size); la
+    profundidad, que suele tener la resolución de salida del modelo, se muestrea en el centro
+    de cada píxel reescalado a esa imagen.
+
+    Attributes:
+        intrinsics (tuple): Parámetros (fx, fy, cx, cy) en píxeles, o None para derivarlos de fov.
+        image_size (tuple): Resolución (ancho, alto) a la que se refieren los intrínsecos, o None
+        para usar la resolución de la profundidad.
+        fov (float): Campo de visión horizontal en grados, usado si no hay intrínsecos.
+        stride (int): Paso de muestreo de la profundidad en filas y columnas.
+        voxel_size (float): Lado de la grilla de vóxeles para el submuestreo, o None.
+        depth_scale (float): Factor que convierte la salida del modelo a unidades de distancia.
+        min_depth (float): Profundidad mínima, exclusiva, de los puntos conservados.
+        max_depth (float): Profundidad máxima, exclusiva, de los puntos conservados.
+    """
+    def __init__(self, intrinsics=None, image_size=None, fov=60.0, stride=1, voxel_size=None, depth_scale=1.0,
+                 min_depth=0.0, max_depth=np.inf):
+        """
+        Inicializa el proyector.
+
+        Args:
+            intrinsics (tuple): Parámetros (fx, fy, cx, cy) en píxeles de image_size. Si es None
+                                se usa una cámara centrada con el campo de visión fov.
+            image_size (tuple): Resolución (ancho, alto) de la cámara, o None para usar la de la
+                                profundidad.
+            fov (float): Campo de visión horizontal en grados, usado si intrinsics es None.
+            stride (int): Se usa un píxel de cada stride en filas y columnas.
+            voxel_size (float): Si se indica, los puntos de cada vóxel se promedian en uno solo.
+            depth_scale (float): Factor aplicado a la salida del modelo.
+            min_depth (float): Se descartan los puntos con profundidad menor o igual.
+            max_depth (float): Se descartan los puntos con profundidad mayor o igual.
+
+        Raises:
+            ValueError: Si los parámetros no son válidos.
+        """
+        if stride < 1:
+            raise ValueError("Error: El paso de muestreo debe ser al menos 1.")
+        if voxel_size is not None and voxel_size <= 0:
+            raise ValueError("Error: El tamaño de vóxel debe ser positivo.")
+        if intrinsics is None and not 0 < fov < 180:
+            raise ValueError("Error: El campo de visión debe estar en (0, 180) grados.")
+        self.intrinsics = tuple(intrinsics) if intrinsics is not None else None
+        self.image_size = tuple(image_size) if image_size is not None else None
+        self.fov = fov
+        self.stride = stride
+        self.voxel_size = voxel_size
+        self.depth_scale = depth_scale
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        # Grillas de rayos por resolución de profundidad e índices de color por resolución de imagen
+        self._rays = {}
+        self._color_indices = {}
+
+    def camera_parameters(self, width, height):
+        """
+        Devuelve los intrínsecos y la resolución de la imagen a la que se refieren.
+
+        Args:
+            width (int): Ancho de la profundidad, usado si no hay image_size.
+            height (int): Alto de la profundidad, usado si no hay image_size.
+
+        Returns:
+            tuple: (fx, fy, cx, cy) y la resolución (ancho, alto) de la imagen.
+        """
+        image_width, image_height = self.image_size or (width, height)
+        if self.intrinsics is not None:
+            return self.intrinsics, (image_width, image_height)
+        focal = (image_width / 2) / math.tan(math.radians(self.fov) / 2)
+        return (focal, focal, (image_width - 1) / 2, (image_height - 1) / 2), (image_width, image_height)
+
+    def ray_grid(self, height, width):
+        """
+        Devuelve la grilla de rayos de los píxeles muestreados de una profundidad, calculándola
+        la primera vez que aparece la resolución.
+
+        Args:
+            height (int): Alto de la profundidad.
+            width (int): Ancho de la profundidad.
+
+        Returns:
+            ndarray: Rayos float32 con forma (alto / stride, ancho / stride, 3) y z = 1.
+        """
+        rays = self._rays.get((height, width))
+        if rays is not None:
+            return rays
+        (fx, fy, cx, cy), (image_width, image_height) = self.camera_parameters(width, height)
+        # Centro de cada píxel muestreado, expresado en píxeles de la imagen de la cámara
+        u = (np.arange(0, width, self.stride) + 0.5) * (image_width / width) - 0.5
+        v = (np.arange(0, height, self.stride) + 0.5) * (image_height / height) - 0.5
+        rays = np.empty((len(v), len(u), 3), dtype=np.float32)
+        rays[..., 0] = ((u - cx) / fx)[np.newaxis, :]
+        rays[..., 1] = ((v - cy) / fy)[:, np.newaxis]
+        rays[..., 2] = 1.0
+        self._rays[(height, width)] = rays
+        return rays
+
+    def color_indices(self, depth_shape, image_shape):
+        """
+        Devuelve, para cada píxel muestreado de la profundidad, la posición del píxel
+        correspondiente en la imagen aplanada, calculándolas la primera vez que aparece la
+        combinación de resoluciones.
+
+        Args:
+            depth_shape (tuple): Forma (alto, ancho) de la profundidad.
+            image_shape (tuple): Forma (alto, ancho) de la imagen.
+
+        Returns:
+            ndarray: Índices planos en el orden de la grilla de rayos.
+        """
+        key = (*depth_shape, *image_shape)
+        indices = self._color_indices.get(key)
+        if indices is None:
+            height, width = depth_shape
+            image_height, image_width = image_shape
+            rows = (np.arange(0, height, self.stride) + 0.5) * (image_height / height)
+            columns = (np.arange(0, width, self.stride) + 0.5) * (image_width / width)
+            rows = np.minimum(rows.astype(np.intp), image_height - 1)
+            columns = np.minimum(columns.astype(np.intp), image_width - 1)
+            indices = (rows[:, np.newaxis] * image_width + columns[np.newaxis, :]).ravel()
+            self._color_indices[key] = indices
+        return indices
+
+    def project(self, depth, image=None):
+        """
+        Retroproyecta un mapa de profundidad. Los píxeles válidos se seleccionan con índices
+        planos (np.take), bastante más rápido que la indexación booleana sobre arrays de puntos.
+
+        Args:
+            depth (ndarray): Salida del modelo sin normalizar, con forma (alto, ancho) o con
+                             dimensiones unitarias de lote y canal.
+            image (ndarray): Frame BGR de la cámara para colorear los puntos, o None.
+
+        Returns:
+            tuple: Puntos float32 con forma (n, 3) y colores RGB uint8 con forma (n, 3), o None
+            si no se indicó image.
+        """
+        depth = depth.squeeze()
+        height, width = depth.shape
+        rays = self.ray_grid(height, width).reshape(-1, 3)
+        sampled = np.multiply(depth[::self.stride, ::self.stride], self.depth_scale, dtype=np.float32).ravel()
+        # Las comparaciones descartan también los valores NaN
+        valid = (sampled > self.min_depth) & (sampled < self.max_depth)
+        selected = None if valid.all() else np.flatnonzero(valid)
+        if selected is None:
+            points = rays * sampled[:, np.newaxis]
+        else:
+            points = np.take(rays, selected, axis=0)
+            points *= np.take(sampled, selected)[:, np.newaxis]
+        colors = None
+        if image is not None:
+            indices = self.color_indices((height, width), image.shape[:2])
+            if selected is not None:
+                indices = np.take(indices, selected)
+            # Conversión de BGR a RGB como vista, sin copia
+            colors = np.take(image.reshape(-1, 3), indices, axis=0)[:, ::-1]
+        if self.voxel_size is not None:
+            points, colors = self.voxel_downsample(points, colors, self.voxel_size)
+        return points, colors
+
+    @staticmethod
+    def voxel_downsample(points, colors, voxel_size):
+        """
+        Reemplaza los puntos de cada vóxel por su centroide y su color medio.
+
+        Args:
+            points (ndarray): Puntos con forma (n, 3).
+            colors (ndarray): Colores uint8 con forma (n, 3), o None.
+            voxel_size (float): Lado del vóxel.
+
+        Returns:
+            tuple: Puntos y colores submuestreados.
+        """
+        if len(points) == 0:
+            return points, colors
+        # Coordenadas de vóxel por eje en filas contiguas: las operaciones por columna de un
+        # array (n, 3) son varias veces más lentas
+        cells = np.floor(points * (1 / voxel_size)).astype(np.int32).T.copy()
+        low = cells.min(axis=1)
+        dims = cells.max(axis=1).astype(np.int64) - low + 1
+        x, y, z = cells - low[:, np.newaxis]
+        keys = (x.astype(np.int64) * dims[1] + y) * dims[2] + z
+        size = int(np.prod(dims))
+        if size <= 4 * len(keys):
+            # Grilla densa: los vóxeles ocupados se obtienen contando, sin ordenar las claves
+            counts = np.bincount(keys, minlength=size)
+            occupied = np.flatnonzero(counts)
+            counts = counts[occupied]
+
+            def total(column):
+                return np.bincount(keys, weights=column, minlength=size)[occupied]
+        else:
+            _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+
+            def total(column):
+                return np.bincount(inverse, weights=column, minlength=len(counts))
+
+        def average(values):
+            return np.column_stack([total(column) for column in values.T]) / counts[:, np.newaxis]
+
+        points = average(points).astype(np.float32)
+        if colors is not None:
+            colors = np.rint(average(colors)).astype(np.uint8)
+        return points, colors
@@ -1,7 +1,67 @@
+import importlib
 import os
 import numpy as np
 import cv2
-import tensorflow as tf
+
+# Entornos de ejecución de TFLite en orden de preferencia: módulo, clase del intérprete y
+# enumeración de resolvedores de operaciones. TensorFlow completo solo se importa si no hay
+# un entorno liviano instalado, ya que su importación tarda segundos y ocupa cientos de MB.
+RUNTIMES = {
+    'ai_edge_litert': ('ai_edge_litert.interpreter', 'Interpreter', 'OpResolverType'),
+    'tflite_runtime': ('tflite_runtime.interpreter', 'Interpreter', 'OpResolverType'),
+    'tensorflow': ('tensorflow', 'lite.Interpreter', 'lite.experimental.OpResolverType'),
+}
+_runtime = None
+
+def _resolve(module, path):
+    """
+    Obtiene un atributo anidado de un módulo.
+
+    Args:
+        module (module): Módulo de partida.
+        path (str): Atributos separados por puntos.
+
+    Returns:
+        object: Atributo encontrado.
+    """
+    for name in path.split('.'):
+        module = getattr(module, name)
+    return module
+
+def load_runtime():
+    """
+    Importa el entorno de ejecución de TFLite la primera vez que se necesita. La variable de
+    entorno MONODEPTH_TFLITE_RUNTIME permite forzar uno ('ai_edge_litert', 'tflite_runtime' o
+    'tensorflow').
+
+    Returns:
+        tuple: Nombre del entorno, clase del intérprete y enumeración OpResolverType (o None si
+        el entorno no la ofrece).
+
+    Raises:
+        ImportError: Si no hay ningún entorno de TFLite instalado.
+    """
+    global _runtime
+    if _runtime is not None:
+        return _runtime
+    # Desactivar logs de TensorFlow antes de importarlo
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')  # Solo mostrar errores
+    forced = os.environ.get('MONODEPTH_TFLITE_RUNTIME')
+    names = [forced] if forced else list(RUNTIMES)
+    for name in names:
+        module_name, interpreter_path, resolver_path = RUNTIMES[name]
+        try:
+            module = importlib.import_module(module_name)
+            interpreter_class = _resolve(module, interpreter_path)
+        except (ImportError, AttributeError):
+            continue
+        try:
+            resolver = _resolve(module, resolver_path)
+        except AttributeError:
+            resolver = None
+        _runtime = (name, interpreter_class, resolver)
+        return _runtime
+    raise ImportError(f"Error: No hay ningún entorno de TFLite instalado ({', '.join(names)}).")
 
 class TFLiteModelInterpreter:
     """
@@ -10,25 +70,47 @@ class TFLiteModelInterpreter:
     permite la inferencia en frames de video.
     
     Attributes:
-        interpreter (tf.lite.Interpreter): Intérprete de TensorFlow Lite.
+        interpreter (Interpreter): Intérprete de TensorFlow Lite del entorno disponible.
+        runtime (str): Entorno de ejecución utilizado: 'ai_edge_litert', 'tflite_runtime' o 'tensorflow'.
         input_details (dict): Detalles del tensor de entrada del modelo.
         output_details (dict): Detalles del tensor de salida del modelo.
+        input_height (int): Alto del tensor de entrada del modelo.
+        input_width (int): Ancho del tensor de entrada del modelo.
+        swap_rb (bool): Indicador de si se convierte el frame de BGR a RGB antes de la inferencia.
+        batch_size (int): Cantidad de frames que procesa cada inferencia.
+        use_xnnpack (bool): Indicador de si se aplica el delegado XNNPACK por defecto.
+        input_quantization (tuple): Escala y punto cero de la entrada si el modelo recibe enteros
+        cuantizados, o None si recibe float32.
+        output_quantization (tuple): Escala y punto cero de la salida si el modelo devuelve enteros
+        cuantizados, o None si devuelve float32.
     """
-    def __init__(self, model_path):
+    def __init__(self, model_path, swap_rb=False, num_threads=None, use_xnnpack=True, warmup=True):
         """
         Inicializa el intérprete de TensorFlow Lite con el modelo especificado
-        y prepara los tensores necesarios.
+        y prepara los tensores necesarios. Por defecto ejecuta una inferencia de calentamiento,
+        para que el costo de preparación de la primera inferencia no recaiga sobre el primer frame.
         
         Args:
             model_path (str): Ruta al archivo del modelo TensorFlow Lite.
+            swap_rb (bool): Si es True, los frames BGR de OpenCV se convierten a RGB al
+                            escribirlos en el tensor de entrada. Por defecto False.
+            num_threads (int): Cantidad de hilos que usa el intérprete. Por defecto None, que
+                               deja la decisión a TensorFlow Lite.
+            use_xnnpack (bool): Si es False se desactiva el delegado XNNPACK que TensorFlow Lite
+                                aplica por defecto y se usan los kernels integrados.
+            warmup (bool): Si es True se ejecuta una inferencia de calentamiento al construir.
         
         Raises:
             ValueError: Error si no se puede cargar el modelo.
         """
         try:
-            # Desactivar logs de TensorFlow
-            os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # Solo mostrar errores
-            self.interpreter = tf.lite.Interpreter(model_path=model_path)
+            self.runtime, interpreter_class, resolver = load_runtime()
+            options = {}
+            if not use_xnnpack:
+                if resolver is None:
+                    raise ValueError(f"El entorno {self.runtime} no permite desactivar XNNPACK")
+                options['experimental_op_resolver_type'] = resolver.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+            self.interpreter = interpreter_class(model_path=model_path, num_threads=num_threads, **options)
             self.interpreter.allocate_tensors()
             self.input_details = self.interpreter.get_input_details()
             self.output_details = self.interpreter.get_output_details()
@@ -36,6 +118,74 @@ class TFLiteModelInterpreter:
             print(f"Error al cargar el modelo TensorFlow Lite {model_path}: {e}")
             raise ValueError("No se pudo cargar el modelo TFLite") from e
 
+        self.swap_rb = swap_rb
+        self.use_xnnpack = use_xnnpack
+        self.batch_size, self.input_height, self.input_width, channels = self.input_details[0]['shape']
+        # Buffer preasignado donde se redimensiona cada frame, evitando asignaciones por frame
+        self._resized = np.empty((self.input_height, self.input_width, channels), dtype=np.uint8)
+        self.input_quantization = self._quantization(self.input_details[0])
+        self.output_quantization = self._quantization(self.output_details[0])
+        self._input_lut = None
+        if self.input_quantization is not None:
+            # Tabla de 256 valores que combina el escalado a [0, 1] y la cuantización de la entrada
+            scale, zero_point = self.input_quantization
+            dtype = self.input_details[0]['dtype']
+            info = np.iinfo(dtype)
+            levels = np.rint(np.arange(256) / 255.0 / scale + zero_point)
+            self._input_lut = np.clip(levels, info.min, info.max).astype(dtype)
+        self._dequantized = None
+        self._warmup_enabled = warmup
+        if warmup:
+            self.warmup()
+
+    def warmup(self):
+        """
+        Ejecuta una inferencia sobre una entrada nula para que el intérprete complete su
+        preparación (reserva de memoria, empaquetado de pesos de los delegados) antes del
+        primer frame real.
+        """
+        input_view = self.interpreter.tensor(self.input_details[0]['index'])()
+        input_view.fill(0)
+        del input_view
+        self.invoke()
+
+    @staticmethod
+    def _quantization(details):
+        """
+        Obtiene los parámetros de cuantización de un tensor.
+
+        Args:
+            details (dict): Detalles del tensor devueltos por el intérprete.
+
+        Returns:
+            tuple: Escala y punto cero si el tensor es entero cuantizado, o None.
+        """
+        scale, zero_point = details['quantization']
+        if not np.issubdtype(details['dtype'], np.integer) or scale == 0:
+            return None
+        return float(scale), int(zero_point)
+
+    def _dequantize(self, values, out=None):
+        """
+        Convierte una salida cuantizada a float32 con su escala y punto cero. Las salidas en
+        float32 se devuelven sin cambios.
+
+        Args:
+            values (ndarray): Salida del modelo.
+            out (ndarray): Buffer float32 de destino, o None para crear un array nuevo.
+
+        Returns:
+            ndarray: Salida en float32.
+        """
+        if self.output_quantization is None:
+            return values
+        scale, zero_point = self.output_quantization
+        if out is None:
+            out = np.empty(values.shape, dtype=np.float32)
+        np.subtract(values, np.float32(zero_point), out=out, dtype=np.float32)
+        out *= np.float32(scale)
+        return out
+
     def set_input_tensor(self, frame):
         """
         Preprocesa el frame y establece el tensor de entrada del modelo para su procesamiento.
@@ -46,16 +196,108 @@ class TFLiteModelInterpreter:
         Raises:
             Exception: Error al establecer el tensor de entrada.
         """
-        # Normalizar el frame de tal manera que sea valido para el tensor de entrada
-        input_data = self.preprocess_frame(frame=frame)
         try:
-            if input_data.shape != tuple(self.input_details[0]['shape']):
-                raise ValueError(f"Error: Se esperaba {self.input_details[0]['shape']}.")
-            self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
+            # Obtener una vista sobre el buffer interno del tensor de entrada. La vista no debe
+            # conservarse más allá de esta llamada, ya que el intérprete no permite invocar el
+            # modelo mientras existan referencias a sus buffers internos.
+            input_view = self.interpreter.tensor(self.input_details[0]['index'])()
+            self.preprocess_frame_into(frame=frame, out=input_view[0])
         except Exception as e:
             print(f"Error al establecer el tensor de entrada: {e}")
             raise
 
+    def resize_batch(self, batch_size):
+        """
+        Redimensiona el tensor de entrada del modelo para procesar varios frames en cada
+        inferencia y vuelve a reservar los tensores del intérprete.
+
+        Args:
+            batch_size (int): Cantidad de frames por inferencia.
+
+        Raises:
+            ValueError: Si el tamaño de lote no es válido o el modelo no admite el cambio.
+        """
+        if batch_size < 1:
+            raise ValueError("Error: El tamaño de lote debe ser al menos 1.")
+        if batch_size == self.batch_size:
+            return
+        self._reshape_input(batch_size, self.input_height, self.input_width,
+                            "No se pudo cambiar el tamaño de lote del modelo TFLite")
+
+    def resize_input(self, height, width):
+        """
+        Cambia la resolución de entrada del modelo y vuelve a reservar los tensores del
+        intérprete. Solo es posible en modelos totalmente convolucionales.
+
+        Args:
+            height (int): Alto de la nueva entrada.
+            width (int): Ancho de la nueva entrada.
+
+        Raises:
+            ValueError: Si la resolución no es válida o el modelo no admite el cambio.
+        """
+        if height < 1 or width < 1:
+            raise ValueError("Error: La resolución de entrada debe ser positiva.")
+        if (height, width) == (self.input_height, self.input_width):
+            return
+        self._reshape_input(self.batch_size, height, width,
+                            "No se pudo cambiar la resolución de entrada del modelo TFLite")
+
+    def _reshape_input(self, batch_size, height, width, message):
+        """
+        Cambia la forma del tensor de entrada, vuelve a reservar los tensores y actualiza los
+        buffers que dependen de la forma.
+
+        Args:
+            batch_size (int): Cantidad de frames por inferencia.
+            height (int): Alto de la entrada.
+            width (int): Ancho de la entrada.
+            message (str): Mensaje del error si el modelo no admite el cambio.
+
+        Raises:
+            ValueError: Si el modelo no admite la nueva forma.
+        """
+        channels = self._resized.shape[2]
+        shape = [batch_size, height, width, channels]
+        try:
+            self.interpreter.resize_tensor_input(self.input_details[0]['index'], shape)
+            self.interpreter.allocate_tensors()
+            self.input_details = self.interpreter.get_input_details()
+            self.output_details = self.interpreter.get_output_details()
+        except Exception as e:
+            print(f"Error al redimensionar el tensor de entrada a {shape}: {e}")
+            raise ValueError(message) from e
+        self.batch_size, self.input_height, self.input_width = batch_size, height, width
+        if self._resized.shape[:2] != (height, width):
+            self._resized = np.empty((height, width, channels), dtype=np.uint8)
+        # allocate_tensors descarta la preparación previa
+        if self._warmup_enabled:
+            self.warmup()
+
+    def set_input_batch(self, frames):
+        """
+        Preprocesa un lote de frames y los escribe directamente en el tensor de entrada. Si el
+        lote es más pequeño que batch_size, las posiciones restantes repiten el último frame y
+        sus salidas deben descartarse.
+
+        Args:
+            frames (list): Frames de video a procesar, como máximo batch_size.
+
+        Raises:
+            ValueError: Si el lote está vacío o supera batch_size.
+        """
+        if not 0 < len(frames) <= self.batch_size:
+            raise ValueError(f"Error: Se esperaban entre 1 y {self.batch_size} frames.")
+        try:
+            input_view = self.interpreter.tensor(self.input_details[0]['index'])()
+            for i, frame in enumerate(frames):
+                self.preprocess_frame_into(frame=frame, out=input_view[i])
+            for i in range(len(frames), self.batch_size):
+                input_view[i] = input_view[len(frames) - 1]
+        except Exception as e:
+            print(f"Error al establecer el lote de entrada: {e}")
+            raise
+
     def invoke(self):
         """
         Realiza la inferencia utilizando el modelo cargado en el intérprete.
@@ -80,7 +322,51 @@ class TFLiteModelInterpreter:
             Exception: Error al obtener el tensor de salida.
         """
         try:
-            return self.interpreter.get_tensor(self.output_details[0]['index'])[0]
+            return self._dequantize(self.interpreter.get_tensor(self.output_details[0]['index'])[0])
+        except Exception as e:
+            print(f"Error al obtener el tensor de salida: {e}")
+            raise
+
+    def get_output_batch(self, count=None):
+        """
+        Obtiene las salidas del modelo para un lote tras la inferencia.
+
+        Args:
+            count (int): Cantidad de salidas válidas del lote. Por defecto batch_size.
+
+        Returns:
+            ndarray: Salidas del modelo con forma (count, alto, ancho, canales).
+
+        Raises:
+            Exception: Error al obtener el tensor de salida.
+        """
+        count = self.batch_size if count is None else count
+        try:
+            return self._dequantize(self.interpreter.get_tensor(self.output_details[0]['index'])[:count])
+        except Exception as e:
+            print(f"Error al obtener el tensor de salida: {e}")
+            raise
+
+    def get_output_view(self):
+        """
+        Obtiene una vista sin copia sobre el tensor de salida del modelo tras la inferencia.
+        La vista apunta al buffer interno del intérprete: solo es válida hasta la siguiente
+        inferencia y debe liberarse antes de llamar a invoke. Si la salida está cuantizada se
+        devuelve en un buffer float32 preasignado, reutilizado en cada llamada.
+
+        Returns:
+            ndarray: Vista sobre el tensor de salida del modelo.
+
+        Raises:
+            Exception: Error al obtener el tensor de salida.
+        """
+        try:
+            view = self.interpreter.tensor(self.output_details[0]['index'])()[0]
+            if self.output_quantization is None:
+                return view
+            if self._dequantized is None or self._dequantized.shape != view.shape:
+                self._dequantized = np.empty(view.shape, dtype=np.float32)
+            return self._dequantize(view, out=self._dequantized)
         except Exception as e:
             print(f"Error al obtener el tensor de salida: {e}")
             raise
@@ -100,11 +386,31 @@ class TFLiteModelInterpreter:
         """
         # Redimensionar la imagen (frame) a las dimensiones especificadas (width, height)
         img_resized = cv2.resize(frame, (width, height))
+        if self.swap_rb:
+            img_resized = cv2.cvtColor(img_resized, cv2.COLOR_BGR2RGB)
         # Añadir una nueva dimensión al array de la imagen redimensionada, convirtiéndolo en un tensor de 4 dimensiones
         # Esto es necesario para que sea compatible con el modelo de entrada (batch size, height, width, channels)
         input_data = np.expand_dims(img_resized, axis=0)
         # Convertir los datos de la imagen a tipo de dato float32, escalando los valores de píxeles al rango [0, 1]
         # Esto es necesario para preparar los datos para el modelo TensorFlow
-        input_data = tf.image.convert_image_dtype(input_data, tf.float32)
+        input_data = input_data.astype(np.float32) / 255.0
         # Devolver los datos de entrada preparados
         return input_data
+
+    def preprocess_frame_into(self, frame, out):
+        """
+        Preprocesa un frame de video escribiendo el resultado directamente en un buffer
+        existente, sin asignar memoria por frame. El frame se redimensiona en un buffer
+        preasignado y se escala a float32 en el rango [0, 1] dentro de `out`. Si la entrada del
+        modelo está cuantizada, el escalado y la cuantización se aplican con una tabla de búsqueda.
+
+        Args:
+            frame (ndarray): Frame de video a procesar.
+            out (ndarray): Buffer de destino con forma (alto, ancho, canales) del tensor de entrada.
+        """
+        cv2.resize(frame, (self.input_width, self.input_height), dst=self._resized)
+        source = self._resized[..., ::-1] if self.swap_rb else self._resized
+        if self._input_lut is not None:
+            np.take(self._input_lut, source, out=out)
+            return
+        np.multiply(source, np.float32(1.0 / 255.0), out=out, dtype=np.float32, casting='unsafe')
@@ -1,3 +1,4 @@
+import threading
 import time
 import numpy as np
 import cv2
@@ -10,17 +11,60 @@ class VideoProcessor:
     Attributes:
         color_map (int): Referencia al mapa de colores de OpenCV utilizado para visualizar
         la salida.
-        prev_frame_time (float): Marca de tiempo del último frame procesado, utilizada para
-        calcular FPS.
+        prev_frame_time (float): Marca de tiempo monotónica del último frame procesado, utilizada
+        para calcular FPS.
+        fps (float): FPS suavizados con una media móvil exponencial.
         frame_time_text (str): Texto para mostrar los FPS en la visualización.
         output (ndarray): La imagen resultante después de combinar el frame original con la
         salida procesada.
+        buffer_count (int): Cantidad de buffers de salida preasignados. Con un solo buffer se
+        reutiliza en cada frame; con más, cada buffer entregado queda reservado hasta que el
+        consumidor lo devuelve con release_output.
+        range_smoothing (float): Factor de suavizado temporal del rango mínimo/máximo de la
+        profundidad, en (0, 1], o None para usar el rango exacto de cada frame.
+        window_name (str): Nombre de la ventana de visualización.
+        last_key (int): Última tecla leída por validate_stop (255 si no se presionó ninguna).
     """
-    def __init__(self):
+    def __init__(self, buffer_count=1, range_smoothing=None, window_name='Visualizador'):
+        """
+        Inicializa el procesador de video.
+
+        Args:
+            buffer_count (int): Cantidad de buffers de salida preasignados. En modo pipeline
+                                conviene que cubra los frames combinados en vuelo; si no
+                                alcanzan, se crean buffers adicionales en lugar de
+                                sobrescribir uno en uso.
+            range_smoothing (float): Peso del rango del frame actual en la media móvil del
+                                     rango de profundidad. Valores bajos evitan el parpadeo
+                                     de la escala. None usa el rango exacto de cada frame.
+            window_name (str): Nombre de la ventana de visualización. Cada flujo de video
+                               necesita una ventana distinta.
+
+        Raises:
+            ValueError: Si los parámetros no son válidos.
+        """
+        if buffer_count < 1:
+            raise ValueError("Error: Se necesita al menos un buffer de salida.")
+        if range_smoothing is not None and not 0 < range_smoothing <= 1:
+            raise ValueError("Error: range_smoothing debe estar en (0, 1].")
         self.color_map = cv2.COLORMAP_MAGMA
-        self.prev_frame_time = time.time()
+        self.prev_frame_time = time.perf_counter()
+        self.fps = None
         self.frame_time_text = "FPS: ?"
         self.output = None
+        self.buffer_count = buffer_count
+        self.range_smoothing = range_smoothing
+        self.window_name = window_name
+        self.last_key = 255
+        # Tabla de colores que combina la inversión y el mapa de colores en una sola búsqueda
+        inverted_levels = np.arange(255, -1, -1, dtype=np.uint8).reshape(256, 1)
+        self._lut = cv2.applyColorMap(inverted_levels, self.color_map).reshape(256, 3)
+        self._buffers = []
+        self._free_buffers = []
+        self._buffers_lock = threading.Lock()
+        self._levels = None
+        self._colored_small = None
+        self._range = None
 
     def normalize_output(self, output_data, frame):
         """
@@ -30,33 +74,157 @@ class VideoProcessor:
         Args:
             output_data (ndarray): Datos de salida del modelo de inferencia.
             frame (ndarray): Frame original capturado de la cámara.
+
+        Returns:
+            ndarray: El frame combinado con la predicción coloreada.
+        """
+        height, width = frame.shape[:2]
+        output = self.prepare_output(frame.shape)
+        # Copiar el frame original en la mitad izquierda del buffer combinado
+        np.copyto(output[:, :width], frame)
+        # Colorear la predicción directamente en la mitad derecha
+        self.colorize_into(output_data=output_data, out=output[:, width:])
+        self.output = output
+        return self.output
+
+    def prepare_output(self, frame_shape):
+        """
+        Devuelve un buffer libre para el frame combinado, creando los buffers cuando cambia el
+        tamaño del frame. Con varios buffers, el buffer queda reservado hasta release_output.
+
+        Args:
+            frame_shape (tuple): Forma del frame original (alto, ancho, canales).
+
+        Returns:
+            ndarray: Buffer con forma (alto, 2 * ancho, canales).
+        """
+        height, width, channels = frame_shape
+        shape = (height, 2 * width, channels)
+        with self._buffers_lock:
+            if not self._buffers or self._buffers[0].shape != shape:
+                self._buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.buffer_count)]
+                self._free_buffers = list(self._buffers)
+            if self.buffer_count == 1:
+                # Uso secuencial: el frame anterior ya no se usa cuando se procesa el siguiente
+                return self._buffers[0]
+            if not self._free_buffers:
+                # Todos los buffers siguen en uso: crear otro en lugar de sobrescribir uno
+                self._buffers.append(np.empty(shape, dtype=np.uint8))
+                return self._buffers[-1]
+            return self._free_buffers.pop()
+
+    def release_output(self, output):
+        """
+        Devuelve un buffer entregado por normalize_output para que pueda reutilizarse. No tiene
+        efecto con un solo buffer ni con buffers de un tamaño de frame anterior.
+
+        Args:
+            output (ndarray): Frame combinado que ya no se usa.
         """
-        # Normalizar los datos de salida a un rango entre 0 y 1
-        output_data = (output_data - output_data.min()) / (output_data.max() - output_data.min())
-        # Escalar los datos normalizados al rango de 0 a 255 y convertirlos a tipo de dato uint8 (8 bits sin signo)
-        output_data = (output_data * 255).astype(np.uint8)
-        # Redimensionar los datos de salida para que coincidan con el tamaño del frame original
-        output_data_resized = cv2.resize(output_data.squeeze(), (frame.shape[1], frame.shape[0]))
-        # Invertir los colores de los datos redimensionados (esto puede ser útil para ciertas visualizaciones)
-        output_data_inverted = cv2.bitwise_not(output_data_resized)
-        # Aplicar un mapa de colores para visualizar mejor la estimación
-        colored_output = cv2.applyColorMap(output_data_inverted, self.color_map)
-        # Combinar el frame original con la predicción coloreada en una sola imagen horizontalmente
-        self.output = np.hstack((frame, colored_output))
+        if output is None or self.buffer_count == 1:
+            return
+        with self._buffers_lock:
+            if any(buffer is output for buffer in self._buffers) and \
+                    not any(buffer is output for buffer in self._free_buffers):
+                self._free_buffers.append(output)
+
+    def depth_range(self, depth):
+        """
+        Calcula el rango de profundidad usado para normalizar, aplicando el suavizado temporal
+        si está configurado.
+
+        Args:
+            depth (ndarray): Profundidad del frame actual.
+
+        Returns:
+            tuple: Valores mínimo y máximo.
+        """
+        low, high = float(depth.min()), float(depth.max())
+        if self.range_smoothing is not None and self._range is not None:
+            alpha = self.range_smoothing
+            low = (1 - alpha) * self._range[0] + alpha * low
+            high = (1 - alpha) * self._range[1] + alpha * high
+        self._range = (low, high)
+        return low, high
+
+    def colorize_into(self, output_data, out):
+        """
+        Normaliza, invierte y colorea la salida del modelo a su resolución original en un solo
+        paso de tabla de colores, y luego la redimensiona escribiendo en el buffer de destino.
+
+        Args:
+            output_data (ndarray): Datos de salida del modelo de inferencia.
+            out (ndarray): Buffer BGR de destino con el tamaño final.
+        """
+        depth = output_data.squeeze()
+        if self._levels is None or self._levels.shape != depth.shape:
+            self._levels = np.empty(depth.shape, dtype=np.uint8)
+            self._colored_small = np.empty((*depth.shape, 3), dtype=np.uint8)
+        low, high = self.depth_range(depth)
+        scale = 255.0 / (high - low) if high > low else 0.0
+        # Escalar al rango [0, 255] con saturación, sin arrays temporales
+        cv2.addWeighted(depth, scale, depth, 0.0, -low * scale, dst=self._levels, dtype=cv2.CV_8U)
+        np.take(self._lut, self._levels, axis=0, out=self._colored_small)
+        resized = cv2.resize(self._colored_small, (out.shape[1], out.shape[0]), dst=out)
+        if resized.ctypes.data != out.ctypes.data:
+            # OpenCV no pudo escribir en la vista (por ejemplo, si no es contigua)
+            np.copyto(out, resized)
+
+    def colorize(self, output_data, width, height):
+        """
+        Normaliza la salida del modelo, le aplica el mapa de colores y la redimensiona.
+
+        Args:
+            output_data (ndarray): Datos de salida del modelo de inferencia.
+            width (int): Ancho de la imagen coloreada.
+            height (int): Alto de la imagen coloreada.
+
+        Returns:
+            ndarray: La predicción coloreada en BGR.
+        """
+        colored_output = np.empty((height, width, 3), dtype=np.uint8)
+        self.colorize_into(output_data=output_data, out=colored_output)
+        return colored_output
+
+    @staticmethod
+    def combine(frame, colored_output):
+        """
+        Combina el frame original con la predicción coloreada horizontalmente.
+
+        Args:
+            frame (ndarray): Frame original capturado de la cámara.
+            colored_output (ndarray): Predicción coloreada del mismo tamaño que el frame.
+
+        Returns:
+            ndarray: El frame combinado.
+        """
+        return np.hstack((frame, colored_output))
 
     def calculate_fps(self):
         """
         Calcula los frames por segundo (FPS) y actualiza el texto de visualización de los FPS.
+        Se usa un reloj monotónico y una media móvil exponencial para que el valor no oscile
+        frame a frame.
         """
-        new_frame_time = time.time()
-        fps = 1 / (new_frame_time - self.prev_frame_time)
+        new_frame_time = time.perf_counter()
+        elapsed = new_frame_time - self.prev_frame_time
         self.prev_frame_time = new_frame_time
-        self.frame_time_text = f"FPS: {int(fps)}"
+        if elapsed <= 0:
+            return
+        fps = 1 / elapsed
+        self.fps = fps if self.fps is None else 0.9 * self.fps + 0.1 * fps
+        self.frame_time_text = f"FPS: {int(self.fps)}"
 
-    def visualize(self):
+    def visualize(self, output=None):
         """
         Visualiza el frame combinado y los FPS sobre una ventana de OpenCV.
+
+        Args:
+            output (ndarray): Frame combinado a visualizar. Si es None se usa la última salida
+            generada por normalize_output.
         """
+        if output is not None:
+            self.output = output
         cv2.putText(
             self.output,
             self.frame_time_text,
@@ -74,9 +242,9 @@ class VideoProcessor:
         scale = min(scale_width, scale_height)
         window_width = int(width * scale)
         window_height = int(height * scale)
-        cv2.namedWindow('Visualizador', cv2.WINDOW_NORMAL)
-        cv2.resizeWindow('Visualizador', window_width, window_height)
-        cv2.imshow('Visualizador', self.output)
+        cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(self.window_name, window_width, window_height)
+        cv2.imshow(self.window_name, self.output)
 
     def get_output(self):
         """
@@ -92,9 +260,11 @@ class VideoProcessor:
         Verifica si el usuario ha solicitado cerrar la aplicación.
 
         Returns:
-            bool: True si el usuario ha presionado 'q', False en caso contrario.
+            bool: True si el usuario ha presionado 'q', False en caso contrario. La tecla leída
+            queda en last_key para que la aplicación atienda otros comandos.
         """
-        return cv2.waitKey(1) & 0xFF == ord('q')
+        self.last_key = cv2.waitKey(1) & 0xFF
+        return self.last_key == ord('q')
 
     def release(self):
         """
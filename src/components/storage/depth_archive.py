@@ -0,0 +1,472 @@
+import json
+import os
+import time
+import zlib
+import numpy as np
+
+# Marcadores que delimitan cada registro; un registro incompleto tras una caída no los tiene
+RECORD_MAGIC = 0x48545044  # 'DPTH'
+RECORD_COMMIT = 0x4B4D4F43  # 'COMK'
+
+INDEX_DTYPE = np.dtype([('frame_number', '<i8'), ('timestamp', '<f8')])
+
+def record_dtype(frame_shape, dtype):
+    """
+    Construye el tipo de dato de un registro de frame dentro de un bloque del archivo.
+
+    Args:
+        frame_shape (tuple): Forma del mapa de profundidad (alto, ancho).
+        dtype (str): 'float16' o 'uint16'.
+
+    Returns:
+        numpy.dtype: Tipo estructurado con cabecera, profundidad y marcador de cierre.
+    """
+    return np.dtype([
+        ('magic', '<u4'),
+        ('reserved', '<u4'),
+        ('frame_number', '<i8'),
+        ('timestamp', '<f8'),
+        ('scale', '<f4'),
+        ('offset', '<f4'),
+        ('depth', np.dtype(dtype).newbyteorder('<'), tuple(frame_shape)),
+        ('commit', '<u4'),
+    ])
+
+
+class DepthArchive:
+    """
+    Archivo en disco de mapas de profundidad dividido en bloques de tamaño fijo. Cada frame se
+    agrega como un registro con cabecera (número de frame, marca de tiempo, escala) a un bloque,
+    y los bloques sin comprimir se leen mediante np.memmap, devolviendo vistas sin copia. Un
+    índice aparte con el número de frame y la marca de tiempo de cada posición permite el acceso
+    aleatorio; si falta o está truncado se reconstruye a partir de las cabeceras de los bloques.
+
+    La profundidad se guarda en float16, o cuantizada a uint16 con escala y desplazamiento por
+    frame. Los bloques completos pueden comprimirse con zlib; esos bloques se descomprimen al
+    leerlos, por lo que sus lecturas no son sin copia.
+
+    Attributes:
+        path (str): Directorio del archivo.
+        mode (str): 'r' para solo lectura o 'a' para agregar frames.
+        frame_shape (tuple): Forma de cada mapa de profundidad.
+        dtype (str): 'float16' o 'uint16'.
+        chunk_frames (int): Cantidad de frames por bloque.
+        compression (str): 'zlib' o None.
+    """
+    DTYPES = ('float16', 'uint16')
+
+    def __init__(self, path, mode='r', frame_shape=None, dtype='float16', chunk_frames=256,
+                 compression=None, fsync=False):
+        """
+        Abre o crea un archivo de profundidad y recupera su estado tras una posible caída.
+
+        Args:
+            path (str): Directorio del archivo.
+            mode (str): 'r' para solo lectura o 'a' para agregar frames (lo crea si no existe).
+            frame_shape (tuple): Forma de cada mapa de profundidad. Obligatoria al crear el archivo.
+            dtype (str): 'float16' o 'uint16' (cuantizado). Solo se usa al crear el archivo.
+            chunk_frames (int): Cantidad de frames por bloque. Solo se usa al crear el archivo.
+            compression (str): 'zlib' para comprimir los bloques completos, o None.
+            fsync (bool): Si es True, cada bloque completo se sincroniza con el disco.
+
+        Raises:
+            ValueError: Si los parámetros no son válidos o el archivo no existe en modo 'r'.
+        """
+        if mode not in ('r', 'a'):
+            raise ValueError("Error: Modo no válido. Las opciones son 'r' y 'a'.")
+        self.path = path
+        self.mode = mode
+        self._fsync = fsync
+        self._file = None
+        self._index_file = None
+        self._maps = {}
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            if mode == 'r':
+                raise ValueError(f"Error: No existe el archivo de profundidad {path}.")
+            self._create(meta_path, frame_shape, dtype, chunk_frames, compression)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        self.frame_shape = tuple(meta['frame_shape'])
+        self.dtype = meta['dtype']
+        self.chunk_frames = meta['chunk_frames']
+        self.compression = meta['compression']
+        self._record = record_dtype(self.frame_shape, self.dtype)
+        self._buffer = np.zeros(1, dtype=self._record)
+        self._chunk_counts = self._recover_chunks()
+        # Índice en un array que crece por duplicación; solo las primeras _length entradas son válidas
+        self._index = self._load_index()
+        self._length = len(self._index)
+        if mode == 'a':
+            self._index_file = open(self._index_path, 'ab')
+
+    def _create(self, meta_path, frame_shape, dtype, chunk_frames, compression):
+        """
+        Crea el directorio y la descripción del archivo de forma atómica.
+        """
+        if frame_shape is None:
+            raise ValueError("Error: Se requiere frame_shape para crear el archivo de profundidad.")
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Error: Tipo no válido. Las opciones son {self.DTYPES}.")
+        if compression not in (None, 'zlib'):
+            raise ValueError("Error: Compresión no válida. Las opciones son None y 'zlib'.")
+        if chunk_frames < 1:
+            raise ValueError("Error: chunk_frames debe ser al menos 1.")
+        os.makedirs(self.path, exist_ok=True)
+        meta = {'frame_shape': list(frame_shape), 'dtype': dtype, 'chunk_frames': chunk_frames,
+                'compression': compression, 'version': 1}
+        temporary_path = f"{meta_path}.tmp"
+        with open(temporary_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temporary_path, meta_path)
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.path, "index.bin")
+
+    def _chunk_path(self, chunk, compressed=False):
+        name = os.path.join(self.path, f"chunk_{chunk:06d}.bin")
+        return f"{name}.zlib" if compressed else name
+
+    def _recover_chunks(self):
+        """
+        Recorre los bloques existentes y descarta registros incompletos al final del último
+        bloque sin comprimir.
+
+        Returns:
+            list: Cantidad de frames válidos de cada bloque.
+        """
+        counts = []
+        chunk = 0
+        while True:
+            if os.path.exists(self._chunk_path(chunk, compressed=True)):
+                counts.append(self.chunk_frames)
+                # Una caída entre la compresión y el borrado puede dejar el bloque original
+                if self.mode == 'a' and os.path.exists(self._chunk_path(chunk)):
+                    os.remove(self._chunk_path(chunk))
+            elif os.path.exists(self._chunk_path(chunk)):
+                counts.append(self._recover_raw_chunk(chunk))
+            else:
+                break
+            # Solo el último bloque puede estar incompleto
+            if counts[-1] < self.chunk_frames:
+                break
+            chunk += 1
+        return counts
+
+    def _recover_raw_chunk(self, chunk):
+        """
+        Cuenta los registros completos de un bloque sin comprimir y, en modo 'a', trunca el
+        archivo después del último registro válido.
+
+        Args:
+            chunk (int): Número de bloque.
+
+        Returns:
+            int: Cantidad de registros válidos.
+        """
+        path = self._chunk_path(chunk)
+        count = min(os.path.getsize(path) // self._record.itemsize, self.chunk_frames)
+        if count:
+            records = np.memmap(path, dtype=self._record, mode='r', shape=(count,))
+            valid = (records['magic'] == RECORD_MAGIC) & (records['commit'] == RECORD_COMMIT)
+            # Conservar solo el prefijo de registros válidos
+            count = int(np.argmin(valid)) if not valid.all() else count
+            del records, valid
+        if self.mode == 'a' and os.path.getsize(path) != count * self._record.itemsize:
+            with open(path, 'r+b') as f:
+                f.truncate(count * self._record.itemsize)
+        return count
+
+    def _load_index(self):
+        """
+        Carga el índice y lo reconstruye si no coincide con los bloques.
+
+        Returns:
+            ndarray: Número de frame y marca de tiempo de cada posición (INDEX_DTYPE).
+        """
+        total = sum(self._chunk_counts)
+        index = None
+        if os.path.exists(self._index_path):
+            entries = os.path.getsize(self._index_path) // INDEX_DTYPE.itemsize
+            if entries >= total:
+                index = np.fromfile(self._index_path, dtype=INDEX_DTYPE, count=total)
+                # Verificar que la última entrada coincida con la cabecera del último registro
+                if total and index['frame_number'][-1] != self._records(len(self._chunk_counts) - 1)['frame_number'][-1]:
+                    index = None
+                elif entries != total and self.mode == 'a':
+                    with open(self._index_path, 'r+b') as f:
+                        f.truncate(total * INDEX_DTYPE.itemsize)
+        if index is None:
+            index = self._rebuild_index()
+        return np.array(index, dtype=INDEX_DTYPE)
+
+    def _rebuild_index(self):
+        """
+        Reconstruye el índice a partir de las cabeceras de los registros y, en modo 'a', lo
+        reescribe de forma atómica.
+
+        Returns:
+            ndarray: Índice reconstruido.
+        """
+        parts = []
+        for chunk in range(len(self._chunk_counts)):
+            records = self._records(chunk)
+            part = np.empty(len(records), dtype=INDEX_DTYPE)
+            part['frame_number'] = records['frame_number']
+            part['timestamp'] = records['timestamp']
+            parts.append(part)
+        index = np.concatenate(parts) if parts else np.empty(0, dtype=INDEX_DTYPE)
+        if self.mode == 'a':
+            temporary_path = f"{self._index_path}.tmp"
+            index.tofile(temporary_path)
+            os.replace(temporary_path, self._index_path)
+        if len(index):
+            print(f"Índice de {self.path} reconstruido con {len(index)} frames")
+        return index
+
+    def _records(self, chunk):
+        """
+        Devuelve los registros de un bloque. Los bloques sin comprimir se mapean en memoria y
+        los comprimidos se descomprimen; se conserva en caché el último bloque usado.
+
+        Args:
+            chunk (int): Número de bloque.
+
+        Returns:
+            ndarray: Registros del bloque.
+        """
+        count = self._chunk_counts[chunk]
+        cached = self._maps.get(chunk)
+        if cached is not None and len(cached) == count:
+            return cached
+        if chunk == len(self._chunk_counts) - 1 and self._file is not None:
+            self._file.flush()
+        compressed_path = self._chunk_path(chunk, compressed=True)
+        if os.path.exists(compressed_path):
+            with open(compressed_path, 'rb') as f:
+                records = np.frombuffer(zlib.decompress(f.read()), dtype=self._record)
+            # Conservar solo un bloque descomprimido para acotar la memoria
+            self._maps = {key: value for key, value in self._maps.items() if isinstance(value, np.memmap)}
+        else:
+            records = np.memmap(self._chunk_path(chunk), dtype=self._record, mode='r', shape=(count,))
+        self._maps[chunk] = records
+        return records
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def frame_numbers(self):
+        """
+        ndarray: Número de frame de cada posición del archivo.
+        """
+        return self._index['frame_number'][:self._length]
+
+    @property
+    def timestamps(self):
+        """
+        ndarray: Marca de tiempo de cada posición del archivo.
+        """
+        return self._index['timestamp'][:self._length]
+
+    def find(self, frame_number):
+        """
+        Busca la posición de un número de frame. Los números de frame deben ser crecientes.
+
+        Args:
+            frame_number (int): Número de frame.
+
+        Returns:
+            int: Posición en el archivo.
+
+        Raises:
+            KeyError: Si el frame no está en el archivo.
+        """
+        frame_numbers = self.frame_numbers
+        position = int(np.searchsorted(frame_numbers, frame_number))
+        if position == len(frame_numbers) or frame_numbers[position] != frame_number:
+            raise KeyError(f"El frame {frame_number} no está en el archivo.")
+        return position
+
+    def append(self, depth, timestamp=None, frame_number=None):
+        """
+        Agrega un mapa de profundidad al final del archivo. El registro se escribe en el bloque
+        antes que su entrada de índice, de modo que una caída nunca deja una entrada de índice
+        sin datos.
+
+        Args:
+            depth (ndarray): Mapa de profundidad con forma frame_shape.
+            timestamp (float): Marca de tiempo del frame. Por defecto time.time().
+            frame_number (int): Número de frame. Por defecto la posición en el archivo.
+
+        Raises:
+            ValueError: Si el archivo es de solo lectura o la forma no coincide.
+        """
+        if self.mode != 'a':
+            raise ValueError("Error: El archivo de profundidad está abierto en solo lectura.")
+        depth = depth.squeeze()
+        if depth.shape != self.frame_shape:
+            raise ValueError(f"Error: Se esperaba una profundidad con forma {self.frame_shape}.")
+        position = len(self)
+        timestamp = time.time() if timestamp is None else timestamp
+        frame_number = position if frame_number is None else frame_number
+
+        record = self._buffer
+        record['magic'] = RECORD_MAGIC
+        record['commit'] = RECORD_COMMIT
+        record['frame_number'] = frame_number
+        record['timestamp'] = timestamp
+        if self.dtype == 'uint16':
+            low, high = float(depth.min()), float(depth.max())
+            scale = (high - low) / 65535.0 if high > low else 1.0
+            record['scale'] = scale
+            record['offset'] = low
+            record['depth'][0] = np.clip(np.rint((depth - low) / scale), 0, 65535)
+        else:
+            record['scale'] = 1.0
+            record['offset'] = 0.0
+            record['depth'][0] = depth
+
+        if not self._chunk_counts or self._chunk_counts[-1] == self.chunk_frames:
+            self._chunk_counts.append(0)
+        chunk = len(self._chunk_counts) - 1
+        if self._file is None:
+            self._file = open(self._chunk_path(chunk), 'ab')
+        self._file.write(self._buffer.view(np.uint8))
+        self._file.flush()
+        self._chunk_counts[-1] += 1
+
+        if position == len(self._index):
+            grown = np.empty(max(2 * len(self._index), 1024), dtype=INDEX_DTYPE)
+            grown[:position] = self._index[:position]
+            self._index = grown
+        entry = self._index[position:position + 1]
+        entry['frame_number'] = frame_number
+        entry['timestamp'] = timestamp
+        self._index_file.write(entry.view(np.uint8))
+        self._index_file.flush()
+        self._length = position + 1
+
+        if self._chunk_counts[-1] == self.chunk_frames:
+            self._close_chunk(chunk)
+
+    def _close_chunk(self, chunk):
+        """
+        Cierra un bloque completo, sincronizándolo con el disco y comprimiéndolo si corresponde.
+
+        Args:
+            chunk (int): Número de bloque.
+        """
+        if self._fsync:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._maps.pop(chunk, None)
+        if self.compression == 'zlib':
+            raw_path = self._chunk_path(chunk)
+            compressed_path = self._chunk_path(chunk, compressed=True)
+            with open(raw_path, 'rb') as f:
+                data = zlib.compress(f.read(), 1)
+            temporary_path = f"{compressed_path}.tmp"
+            with open(temporary_path, 'wb') as f:
+                f.write(data)
+                if self._fsync:
+                    os.fsync(f.fileno())
+            # El bloque comprimido reemplaza al original solo cuando está completo en disco
+            os.replace(temporary_path, compressed_path)
+            os.remove(raw_path)
+
+    def iter_slices(self, start, stop):
+        """
+        Recorre un rango de frames como segmentos contiguos, uno por bloque. En bloques sin
+        comprimir y tipo float16 los segmentos son vistas sin copia sobre el archivo mapeado.
+
+        Args:
+            start (int): Posición inicial.
+            stop (int): Posición final (excluida).
+
+        Yields:
+            ndarray: Segmento de mapas de profundidad.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        position = start
+        while position < stop:
+            chunk, offset = divmod(position, self.chunk_frames)
+            end = min(stop - position, self._chunk_counts[chunk] - offset) + offset
+            records = self._records(chunk)[offset:end]
+            if self.dtype == 'uint16':
+                scale = records['scale'].reshape(-1, *([1] * len(self.frame_shape)))
+                low = records['offset'].reshape(scale.shape)
+                yield (records['depth'] * scale + low).astype(np.float32)
+            else:
+                yield records['depth']
+            position += end - offset
+
+    def read(self, start, stop):
+        """
+        Lee un rango de frames. Si el rango está dentro de un bloque sin comprimir en float16
+        se devuelve una vista sin copia; si abarca varios bloques se concatena.
+
+        Args:
+            start (int): Posición inicial.
+            stop (int): Posición final (excluida).
+
+        Returns:
+            ndarray: Mapas de profundidad con forma (frames, alto, ancho).
+        """
+        segments = list(self.iter_slices(start, stop))
+        if not segments:
+            return np.empty((0, *self.frame_shape), dtype=np.float16)
+        return segments[0] if len(segments) == 1 else np.concatenate(segments)
+
+    def __getitem__(self, position):
+        """
+        Devuelve un frame o un rango de frames.
+
+        Args:
+            position (int or slice): Posición o rango (sin paso).
+
+        Returns:
+            ndarray: Mapa o mapas de profundidad.
+        """
+        if isinstance(position, slice):
+            if position.step not in (None, 1):
+                raise ValueError("Error: No se admiten rangos con paso.")
+            return self.read(position.start, position.stop)
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("Posición fuera del archivo de profundidad.")
+        return self.read(position, position + 1)[0]
+
+    def flush(self):
+        """
+        Vuelca los datos pendientes al sistema operativo.
+        """
+        if self._file is not None:
+            self._file.flush()
+        if self._index_file is not None:
+            self._index_file.flush()
+
+    def close(self):
+        """
+        Cierra los archivos abiertos. El último bloque queda sin comprimir para poder seguir
+        agregando frames al reabrirlo.
+        """
+        if self._file is not None:
+            if self._fsync:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
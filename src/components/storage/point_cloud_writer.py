@@ -0,0 +1,138 @@
+import os
+import time
+import numpy as np
+
+POINT_DTYPE = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4')])
+COLORED_POINT_DTYPE = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+                                ('red', 'u1'), ('green', 'u1'), ('blue', 'u1')])
+CHUNK_INDEX_DTYPE = np.dtype([('frame_number', '<i8'), ('timestamp', '<f8'), ('chunk', '<i4'),
+                              ('start', '<i8'), ('count', '<i8')])
+
+def to_records(points, colors=None):
+    """
+    Empaqueta puntos y colores en un array estructurado, el formato de los vértices de PLY.
+
+    Args:
+        points (ndarray): Puntos con forma (n, 3).
+        colors (ndarray): Colores RGB uint8 con forma (n, 3), o None.
+
+    Returns:
+        ndarray: Array estructurado con los campos x, y, z y, si hay colores, red, green, blue.
+    """
+    records = np.empty(len(points), dtype=POINT_DTYPE if colors is None else COLORED_POINT_DTYPE)
+    records['x'], records['y'], records['z'] = points[:, 0], points[:, 1], points[:, 2]
+    if colors is not None:
+        records['red'], records['green'], records['blue'] = colors[:, 0], colors[:, 1], colors[:, 2]
+    return records
+
+class PointCloudWriter:
+    """
+    Guarda una secuencia de nubes de puntos en un directorio. En formato 'ply' cada frame se
+    escribe como un archivo PLY binario independiente; en formato 'npy' los puntos de varios
+    frames se agrupan en bloques .npy de arrays estructurados, con un índice que indica el
+    número de frame, la marca de tiempo y la posición de los puntos de cada frame en su bloque.
+
+    Attributes:
+        path (str): Directorio de salida.
+        file_format (str): 'ply' o 'npy'.
+        chunk_frames (int): Cantidad de frames por bloque en formato 'npy'.
+        frames_written (int): Frames guardados.
+        points_written (int): Puntos guardados.
+    """
+    FORMATS = ('ply', 'npy')
+
+    def __init__(self, path, file_format='ply', chunk_frames=30):
+        """
+        Inicializa el escritor y crea el directorio de salida.
+
+        Args:
+            path (str): Directorio de salida.
+            file_format (str): 'ply' o 'npy'.
+            chunk_frames (int): Cantidad de frames por bloque en formato 'npy'.
+
+        Raises:
+            ValueError: Si el formato o el tamaño de bloque no son válidos.
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Error: Formato de nube de puntos no válido. Las opciones son {self.FORMATS}.")
+        if chunk_frames < 1:
+            raise ValueError("Error: Un bloque debe contener al menos un frame.")
+        self.path = path
+        self.file_format = file_format
+        self.chunk_frames = chunk_frames
+        self.frames_written = 0
+        self.points_written = 0
+        self._chunk = []
+        self._chunk_size = 0
+        self._chunk_number = 0
+        self._index = []
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, points, colors=None, timestamp=None, frame_number=None):
+        """
+        Guarda la nube de puntos de un frame.
+
+        Args:
+            points (ndarray): Puntos con forma (n, 3).
+            colors (ndarray): Colores RGB uint8 con forma (n, 3), o None.
+            timestamp (float): Marca de tiempo del frame. Por defecto time.time().
+            frame_number (int): Número de frame. Por defecto la cantidad de frames guardados.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        frame_number = self.frames_written if frame_number is None else frame_number
+        records = to_records(points, colors)
+        if self.file_format == 'ply':
+            self._write_ply(records, timestamp, frame_number)
+        else:
+            self._index.append((frame_number, timestamp, self._chunk_number, self._chunk_size, len(records)))
+            self._chunk.append(records)
+            self._chunk_size += len(records)
+            if len(self._chunk) == self.chunk_frames:
+                self._flush_chunk()
+        self.frames_written += 1
+        self.points_written += len(records)
+
+    def _write_ply(self, records, timestamp, frame_number):
+        """
+        Escribe un archivo PLY binario con los vértices de un frame.
+
+        Args:
+            records (ndarray): Vértices empaquetados por to_records.
+            timestamp (float): Marca de tiempo del frame.
+            frame_number (int): Número de frame.
+        """
+        properties = [f"property float {name}" for name in ('x', 'y', 'z')]
+        if 'red' in records.dtype.names:
+            properties += [f"property uchar {name}" for name in ('red', 'green', 'blue')]
+        header = "\n".join([
+            "ply",
+            "format binary_little_endian 1.0",
+            f"comment frame {frame_number}",
+            f"comment timestamp {timestamp!r}",
+            f"element vertex {len(records)}",
+            *properties,
+            "end_header",
+        ]) + "\n"
+        with open(os.path.join(self.path, f"frame_{frame_number:06d}.ply"), 'wb') as f:
+            f.write(header.encode('ascii'))
+            f.write(records.tobytes())
+
+    def _flush_chunk(self):
+        """
+        Guarda el bloque de puntos pendiente y actualiza el índice.
+        """
+        if not self._chunk:
+            return
+        np.save(os.path.join(self.path, f"chunk_{self._chunk_number:05d}.npy"), np.concatenate(self._chunk))
+        # El índice se reescribe tras cada bloque para que refleje siempre los bloques completos
+        np.save(os.path.join(self.path, "index.npy"), np.array(self._index, dtype=CHUNK_INDEX_DTYPE))
+        self._chunk = []
+        self._chunk_size = 0
+        self._chunk_number += 1
+
+    def close(self):
+        """
+        Guarda el último bloque incompleto.
+        """
+        if self.file_format == 'npy':
+            self._flush_chunk()
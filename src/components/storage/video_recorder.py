@@ -1,42 +1,108 @@
 from datetime import datetime
+import threading
+import time
+import numpy as np
 import cv2
+from src.components.processing.pipeline import BoundedQueue, END_OF_STREAM
+from src.components.storage.depth_archive import DepthArchive
+from src.components.storage.point_cloud_writer import PointCloudWriter
 
 class VideoRecorder:
     """
-    Clase para gestionar la grabación de video utilizando OpenCV. Esta clase permite iniciar, 
+    Clase para gestionar la grabación de video utilizando OpenCV. Esta clase permite iniciar,
     detener y escribir frames en un archivo de video con configuraciones específicas.
 
+    La codificación se realiza en un hilo en segundo plano alimentado por una cola acotada, de
+    modo que no bloquea el bucle principal. La tasa de cuadros del video se obtiene de las
+    marcas de tiempo de los frames: los frames se duplican u omiten para que la reproducción
+    respete el tiempo real. Opcionalmente se graban los mapas de profundidad sin procesar en
+    un DepthArchive, junto al video combinado o en su lugar, y las nubes de puntos obtenidas
+    al retroproyectar cada profundidad, que se calculan en el hilo de escritura.
+
     Attributes:
         save_path (str): Ruta donde se guardará el archivo de video.
-        frame_rate (float): Tasa de cuadros por segundo (FPS) del video.
-        resolution (tuple): Resolución del video (ancho, alto).
+        frame_rate (float): Tasa de cuadros por segundo (FPS) del video. Si es None se mide a
+        partir de las marcas de tiempo de los primeros frames.
+        resolution (tuple): Resolución del video (ancho, alto). Si es None se toma del primer
+        frame grabado.
         codec (str): Codec utilizado para comprimir el video.
         is_recording (bool): Estado de la grabación (True si está grabando, False si no).
         writer (cv2.VideoWriter): Objeto de OpenCV para escribir el video.
+        record_mode (str): 'video', 'depth' o 'both'.
+        depth_path (str): Directorio del archivo de profundidad.
+        depth_dtype (str): Tipo de la profundidad grabada: 'float16' o 'uint16' cuantizado.
+        depth_compression (str): Compresión de los bloques de profundidad: 'zlib' o None.
+        asynchronous (bool): Indicador de si la escritura se realiza en un hilo en segundo plano.
+        dropped (int): Frames descartados por desbordamiento de la cola.
+        queue (BoundedQueue): Cola del hilo de escritura.
+        point_cloud (PointCloudProjector): Proyector de las nubes de puntos grabadas, o None.
+        points_path (str): Directorio de las nubes de puntos.
     """
-    
-    def __init__(self, save_path, frame_rate=10.0, resolution_option=2, codec='mp4v'):
+    RECORD_MODES = ('video', 'depth', 'both')
+
+    def __init__(self, save_path, frame_rate=None, resolution_option=2, codec='mp4v', record_mode='video',
+                 asynchronous=True, queue_size=8, overflow_policy='block', rate_window=30,
+                 depth_dtype='float16', depth_compression=None, name_suffix='', point_cloud=None,
+                 point_cloud_format='ply'):
         """
         Inicializa un objeto VideoRecorder con las configuraciones especificadas.
 
         Args:
             save_path (str): Ruta donde se guardará el archivo de video.
-            frame_rate (float): Tasa de cuadros por segundo (FPS) del video. Por defecto es 10.0.
-            resolution_option (int): Opción de resolución deseada (1, 2, 3 o 4).
+            frame_rate (float): Tasa de cuadros por segundo (FPS) del video. Por defecto None,
+                                que la mide a partir de las marcas de tiempo de los frames.
+            resolution_option (int): Opción de resolución deseada (1, 2, 3 o 4), o None para
+                                     usar el tamaño del primer frame grabado.
             codec (str): Codec utilizado para comprimir el video. Por defecto es 'mp4v'.
-        
+            record_mode (str): 'video' graba el frame combinado, 'depth' la profundidad sin
+                               procesar y 'both' ambos.
+            asynchronous (bool): Si es True, la escritura se realiza en un hilo en segundo plano.
+            queue_size (int): Capacidad de la cola del hilo de escritura.
+            overflow_policy (str): 'block' o 'drop_oldest' cuando la cola está llena.
+            rate_window (int): Cantidad de marcas de tiempo usadas para medir la tasa de cuadros.
+                               El video empieza con el primer frame posterior a la medición.
+            depth_dtype (str): 'float16' o 'uint16' (cuantizado por frame).
+            depth_compression (str): 'zlib' para comprimir los bloques de profundidad, o None.
+            name_suffix (str): Sufijo de los nombres de archivo, para distinguir grabaciones
+                               simultáneas de varios flujos.
+            point_cloud (PointCloudProjector): Si se indica, cada profundidad se retroproyecta y
+                                               se graba como nube de puntos, en cualquier modo.
+            point_cloud_format (str): 'ply' (un archivo por frame) o 'npy' (bloques de frames).
+
         Raises:
-            ValueError: Si la opción de resolución no es válida.
+            ValueError: Si la opción de resolución o el modo de grabación no son válidos.
         """
+        if record_mode not in self.RECORD_MODES:
+            raise ValueError(f"Error: Modo de grabación no válido. Las opciones son {self.RECORD_MODES}.")
         # Formato de fecha y hora para el nombre del archivo
         current_time = datetime.now().strftime("%Y-%m-%d_%H.%M.%S")
-        self.save_path = f"{save_path}/{current_time}.mp4"
+        self.save_path = f"{save_path}/{current_time}{name_suffix}.mp4"
+        self.depth_path = f"{save_path}/{current_time}{name_suffix}_depth"
+        self.points_path = f"{save_path}/{current_time}{name_suffix}_points"
+        self.point_cloud = point_cloud
+        self.point_cloud_format = point_cloud_format
+        self.depth_dtype = depth_dtype
+        self.depth_compression = depth_compression
         self.frame_rate = frame_rate
-        self.resolution = self.set_resolution(resolution_option=resolution_option)
+        self.resolution = None if resolution_option is None else self.set_resolution(resolution_option=resolution_option)
         self.codec = codec
         self.is_recording = False
         self.writer = None
-        
+        self.record_mode = record_mode
+        self.asynchronous = asynchronous
+        self.dropped = 0
+        self.queue = BoundedQueue("grabación", queue_size, overflow_policy)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._rate_window = rate_window
+        self._rate_timestamps = []
+        self._last_frame = None
+        self._first_timestamp = None
+        self._written = 0
+        self._depth_archive = None
+        self._frame_number = 0
+        self._point_cloud_writer = None
+
     def set_resolution(self, resolution_option):
         """
         Configura la resolución del video basada en la opción de resolución.
@@ -62,28 +128,183 @@ class VideoRecorder:
 
     def start_recording(self):
         """
-        Inicia la grabación de video creando un objeto VideoWriter con las configuraciones especificadas.
+        Inicia la grabación. El VideoWriter se crea cuando se conoce la tasa de cuadros y, en
+        modo asíncrono, se lanza el hilo de escritura.
         """
-        fourcc = cv2.VideoWriter_fourcc(*self.codec)
-        self.writer = cv2.VideoWriter(self.save_path, fourcc, self.frame_rate, self.resolution)
         self.is_recording = True
-        print(f"Grabación iniciada, guardando en {self.save_path}")
+        if self.asynchronous:
+            self._thread = threading.Thread(target=self._writer_loop, name="grabación", daemon=True)
+            self._thread.start()
+        if self.record_mode != 'depth':
+            print(f"Grabación iniciada, guardando en {self.save_path}")
+        if self.record_mode != 'video':
+            print(f"Grabando profundidad en {self.depth_path}")
+        if self.point_cloud is not None:
+            self._point_cloud_writer = PointCloudWriter(self.points_path, file_format=self.point_cloud_format)
+            print(f"Grabando nubes de puntos en {self.points_path}")
 
-    def write_frame(self, frame):
+    def write_frame(self, frame, depth=None, timestamp=None, image=None):
         """
-        Escribe un frame al video si la grabación está activa.
+        Escribe un frame al video si la grabación está activa. En modo asíncrono el frame se
+        copia y se encola para el hilo de escritura.
 
         Args:
             frame (ndarray): Frame de video a escribir.
+            depth (ndarray): Profundidad sin procesar del frame, grabada en los modos 'depth' y
+                             'both' y usada para las nubes de puntos.
+            timestamp (float): Marca de tiempo monotónica de captura. Por defecto el momento
+                               de la llamada.
+            image (ndarray): Frame original de la cámara, usado para colorear la nube de puntos.
         """
-        if self.is_recording:
+        if not self.is_recording:
+            return
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        frame_number = self._frame_number
+        self._frame_number += 1
+        if self.record_mode == 'depth':
+            frame = None
+        if depth is not None and self.point_cloud is not None:
+            # La nube de puntos necesita la profundidad completa; el archivo la convierte al grabarla
+            depth = depth.squeeze().astype(np.float32)
+        elif depth is not None and self.record_mode != 'video':
+            # La conversión crea una copia independiente del buffer del intérprete
+            depth = depth.squeeze().astype(np.float16 if self.depth_dtype == 'float16' else np.float32)
+        else:
+            depth = None
+        if self.point_cloud is None:
+            image = None
+        if not self.asynchronous:
+            self._write(frame, depth, timestamp, frame_number, image)
+            return
+        if frame is not None:
+            frame = frame.copy()
+        if image is not None:
+            image = image.copy()
+        self.queue.put((frame, depth, timestamp, frame_number, image), self._stop_event)
+        self.dropped = self.queue.dropped
+
+    def _writer_loop(self):
+        """
+        Bucle del hilo de escritura: consume la cola hasta recibir el fin de la grabación.
+        """
+        try:
+            while True:
+                item = self.queue.get(self._stop_event)
+                if item is END_OF_STREAM:
+                    break
+                self._write(*item)
+        except Exception as e:
+            print(f"Error en el hilo de grabación: {e}")
+            self._stop_event.set()
+
+    def _write(self, frame, depth, timestamp, frame_number, image=None):
+        """
+        Escribe un frame de video, su profundidad y su nube de puntos. El número de frame de la
+        profundidad cuenta los frames entregados al grabador, incluso los que no llegaron a
+        grabarse.
+
+        Args:
+            frame (ndarray): Frame combinado, o None.
+            depth (ndarray): Profundidad del frame, o None.
+            timestamp (float): Marca de tiempo de captura.
+            frame_number (int): Número de frame.
+            image (ndarray): Frame original para colorear la nube de puntos, o None.
+        """
+        if frame is not None:
+            self._write_video(frame, timestamp)
+        if depth is None:
+            return
+        if self.record_mode != 'video':
+            self._write_depth(depth, timestamp, frame_number)
+        if self._point_cloud_writer is not None:
+            points, colors = self.point_cloud.project(depth, image=image)
+            self._point_cloud_writer.write(points, colors, timestamp=timestamp, frame_number=frame_number)
+
+    def _write_video(self, frame, timestamp):
+        """
+        Escribe un frame en el video. Mientras se mide la tasa de cuadros solo se conservan
+        las marcas de tiempo (y el último frame, por si la grabación termina antes); después,
+        cada frame se repite u omite para mantener la sincronía con su marca de tiempo.
+
+        Args:
+            frame (ndarray): Frame combinado.
+            timestamp (float): Marca de tiempo de captura.
+        """
+        if self.writer is None:
+            if self.frame_rate is None and len(self._rate_timestamps) < self._rate_window:
+                self._rate_timestamps.append(timestamp)
+                self._last_frame = (frame, timestamp)
+                return
+            self._open_writer(frame, timestamp)
+        # Cantidad de frames que debería tener el video en este instante
+        target = int(round((timestamp - self._first_timestamp) * self.frame_rate)) + 1
+        while self._written < target:
             self.writer.write(frame)
+            self._written += 1
+
+    def _open_writer(self, frame, timestamp):
+        """
+        Crea el VideoWriter con la tasa de cuadros configurada o medida. El video empieza en el
+        frame indicado.
+
+        Args:
+            frame (ndarray): Primer frame del video.
+            timestamp (float): Marca de tiempo de captura del primer frame.
+        """
+        if self.frame_rate is None:
+            timestamps = self._rate_timestamps
+            elapsed = timestamps[-1] - timestamps[0] if timestamps else 0.0
+            self.frame_rate = (len(timestamps) - 1) / elapsed if elapsed > 0 else 10.0
+            print(f"Tasa de cuadros medida para la grabación: {self.frame_rate:.1f} FPS")
+        self._rate_timestamps = []
+        self._last_frame = None
+        if self.resolution is None:
+            height, width = frame.shape[:2]
+            self.resolution = (width, height)
+        fourcc = cv2.VideoWriter_fourcc(*self.codec)
+        self.writer = cv2.VideoWriter(self.save_path, fourcc, self.frame_rate, self.resolution)
+        self._first_timestamp = timestamp
+
+    def _write_depth(self, depth, timestamp, frame_number):
+        """
+        Agrega un mapa de profundidad al archivo de profundidad, creándolo con el primer frame.
+
+        Args:
+            depth (ndarray): Profundidad del frame.
+            timestamp (float): Marca de tiempo de captura.
+            frame_number (int): Número de frame.
+        """
+        if self._depth_archive is None:
+            self._depth_archive = DepthArchive(self.depth_path, mode='a', frame_shape=depth.shape,
+                                               dtype=self.depth_dtype, compression=self.depth_compression)
+        self._depth_archive.append(depth, timestamp=timestamp, frame_number=frame_number)
 
     def stop_recording(self):
         """
-        Detiene la grabación de video y libera el objeto VideoWriter.
+        Detiene la grabación, espera a que el hilo de escritura vacíe la cola y libera el
+        objeto VideoWriter.
         """
         if self.is_recording:
-            self.writer.release()
-            print("Grabación detenida y archivo guardado.")
             self.is_recording = False
+            if self._thread is not None:
+                self.queue.put_end()
+                self._thread.join()
+                self._thread = None
+            if self.writer is None and self._last_frame is not None:
+                # La grabación terminó antes de completar la medición: guardar el último frame
+                frame, timestamp = self._last_frame
+                self._open_writer(frame, timestamp)
+                self._write_video(frame, timestamp)
+            if self.writer is not None:
+                self.writer.release()
+            if self._depth_archive is not None:
+                self._depth_archive.close()
+                self._depth_archive = None
+            if self._point_cloud_writer is not None:
+                self._point_cloud_writer.close()
+                print(f"Nubes de puntos grabadas: {self._point_cloud_writer.frames_written} frames, "
+                      f"{self._point_cloud_writer.points_written} puntos")
+                self._point_cloud_writer = None
+            if self.dropped:
+                print(f"Frames descartados durante la grabación: {self.dropped}")
+            print("Grabación detenida y archivo guardado.")
@@ -1,7 +1,11 @@
+import threading
+import time
 from src.components.processing.tflite_model_interpreter import TFLiteModelInterpreter
 from src.components.processing.camera_manager import CameraManager
 from src.components.storage.video_recorder import VideoRecorder
 from src.components.processing.video_processor import VideoProcessor
+from src.components.processing.pipeline import BoundedQueue, PipelineStage, END_OF_STREAM
+from src.components.processing.metrics import MetricsRegistry
 
 class DepthEstimationApp:
     """
@@ -15,21 +19,90 @@ class DepthEstimationApp:
         video_recorder (VideoRecorder): Grabador de video.
         video_processor (VideoProcessor): Procesador de video.
         enable_storage (bool): Indicador de si la grabación de video está habilitada.
+        source (int or str): Índice de la cámara o ruta del video a procesar.
+        pipelined (bool): Indicador de si se ejecuta en modo pipeline, con cada etapa en su propio hilo.
+        queue_size (int): Capacidad de las colas entre etapas del pipeline.
+        overflow_policy (str): Política de desbordamiento de las colas del pipeline.
+        record_mode (str): Contenido de la grabación: 'video', 'depth' o 'both'.
+        metrics (MetricsRegistry): Registro de latencias por etapa, contadores y profundidad de colas.
+        scheduler (InferenceScheduler): Planificador que omite la inferencia en escenas estáticas,
+        o None para inferir en todos los frames.
+        camera_options (dict): Opciones adicionales de CameraManager (captura del último frame,
+        formato de píxel, reproducción de archivos...).
+        model_registry (ModelRegistry): Registro que permite cambiar de modelo durante la
+        ejecución con la tecla 'm', o None para usar un único modelo.
+        point_cloud (PointCloudProjector): Proyector de las nubes de puntos que se graban junto
+        al video, o None.
+        point_cloud_format (str): Formato de las nubes de puntos grabadas: 'ply' o 'npy'.
+        publisher (FramePublisher): Publicador de los frames y la profundidad en memoria
+        compartida para otros procesos, o None.
     """
     
-    def __init__(self, tflite_model_path):
+    def __init__(self, tflite_model_path, source=0, pipelined=False, queue_size=2, overflow_policy=None,
+                 metrics=None, scheduler=None, range_smoothing=None, record_mode='video', num_threads=None,
+                 use_xnnpack=True, camera_options=None, model_registry=None, point_cloud=None,
+                 point_cloud_format='ply', publisher=None):
         """
         Inicializa un objeto DepthEstimationApp con el modelo TFLite especificado.
 
         Args:
             tflite_model_path (str): Ruta al archivo del modelo TFLite.
+            source (int or str): Índice de la cámara o ruta del video a procesar. Por defecto 0.
+            pipelined (bool): Si es True, captura, inferencia, post-procesamiento y grabación se
+                              ejecutan como etapas independientes conectadas por colas acotadas.
+            queue_size (int): Capacidad de las colas entre etapas del pipeline.
+            overflow_policy (str): 'drop_oldest' o 'block'. Si es None se usa 'drop_oldest' para
+                                   cámaras en vivo y 'block' para archivos de video.
+            metrics (MetricsRegistry): Registro de métricas. Si es None la instrumentación
+                                       queda desactivada.
+            scheduler (InferenceScheduler): Planificador de inferencias. Si es None se ejecuta
+                                            el modelo en todos los frames.
+            range_smoothing (float): Suavizado temporal del rango de profundidad del mapa de
+                                     colores, en (0, 1], o None para usar el rango de cada frame.
+            record_mode (str): 'video' graba el frame combinado, 'depth' la profundidad sin
+                               procesar en float16 y 'both' ambos.
+            num_threads (int): Hilos del intérprete TFLite, o None para el valor por defecto.
+            use_xnnpack (bool): Indicador de si el intérprete usa el delegado XNNPACK.
+            camera_options (dict): Argumentos adicionales de CameraManager, por ejemplo
+                                   latest_only, pixel_format, buffer_size o replay.
+            model_registry (ModelRegistry): Registro de modelos intercambiables. Si se indica,
+                                            tflite_model_path se ignora y el modelo inicial es
+                                            el activo del registro.
+            point_cloud (PointCloudProjector): Si se indica, la grabación se habilita sin
+                                               preguntar e incluye la nube de puntos de
+                                               cada frame.
+            point_cloud_format (str): 'ply' (un archivo por frame) o 'npy' (bloques de frames).
+            publisher (FramePublisher): Si se indica, cada frame y su profundidad se publican
+                                        en memoria compartida antes del post-procesamiento.
         """
+        self.source = source
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        if overflow_policy is None:
+            overflow_policy = 'drop_oldest' if isinstance(source, int) else 'block'
+        self.overflow_policy = overflow_policy
         self.resolution_option = 2
-        self.depth_model = TFLiteModelInterpreter(model_path=tflite_model_path)
+        self.model_registry = model_registry
+        if model_registry is not None:
+            self.depth_model = model_registry.active
+        else:
+            self.depth_model = TFLiteModelInterpreter(model_path=tflite_model_path, num_threads=num_threads,
+                                                      use_xnnpack=use_xnnpack)
         self.camera_manager = None
         self.video_recorder = None
-        self.video_processor = VideoProcessor()
+        # En modo pipeline los frames combinados siguen en uso en la cola de visualización, por
+        # lo que se necesitan varios buffers de salida, que el hilo principal devuelve tras
+        # usarlos. El grabador copia cada frame al encolarlo, de modo que no retiene buffers.
+        buffer_count = queue_size + 2 if pipelined else 1
+        self.video_processor = VideoProcessor(buffer_count=buffer_count, range_smoothing=range_smoothing)
         self.enable_storage = False
+        self.metrics = metrics or MetricsRegistry(enabled=False)
+        self.scheduler = scheduler
+        self.record_mode = record_mode
+        self.camera_options = camera_options or {}
+        self.point_cloud = point_cloud
+        self.point_cloud_format = point_cloud_format
+        self.publisher = publisher
 
     def run(self):
         """
@@ -41,30 +114,242 @@ class DepthEstimationApp:
         # Habilitar o deshabilitar grabación de video
         self.ask_for_video_recording()
         if self.enable_storage:
+            if self.point_cloud is not None and self.point_cloud.image_size is None:
+                # Los intrínsecos se expresan en píxeles de la imagen de la cámara
+                self.point_cloud.image_size = self.camera_manager.resolution
+            # La tasa de cuadros se mide a partir de las marcas de tiempo de los frames
             self.video_recorder = VideoRecorder(
                 save_path="src/videos",
-                frame_rate=10.0,
+                frame_rate=None,
                 resolution_option=self.resolution_option,
-                codec='mp4v')
+                codec='mp4v',
+                record_mode=self.record_mode,
+                overflow_policy=self.overflow_policy,
+                point_cloud=self.point_cloud,
+                point_cloud_format=self.point_cloud_format)
             self.video_recorder.start_recording()
 
+        if self.pipelined:
+            self.run_pipelined()
+            return
+
         try:
             print("Iniciando estimación de fondo monocular")
+            metrics = self.metrics
             while True:
-                frame = self.camera_manager.get_frame()
-                self.depth_model.set_input_tensor(frame=frame)
-                self.depth_model.invoke()
-                output_data = self.depth_model.get_output_tensor()
-                self.video_processor.normalize_output(output_data=output_data, frame=frame)
+                with metrics.time('camera_read'):
+                    frame, timestamp = self.camera_manager.read()
+                self.publish_camera_stats()
+                if self.model_registry is not None:
+                    # Los cambios de modelo se aplican entre frames
+                    self.depth_model = self.model_registry.current(timestamp)
+                if self.scheduler is None or self.scheduler.should_infer(frame):
+                    with metrics.time('preprocess'):
+                        self.depth_model.set_input_tensor(frame=frame)
+                    with metrics.time('invoke'):
+                        self.depth_model.invoke()
+                    with metrics.time('get_output'):
+                        output_data = self.depth_model.get_output_view()
+                    if self.scheduler is not None:
+                        self.scheduler.store_depth(output_data)
+                else:
+                    # Escena estable: reutilizar la última profundidad
+                    output_data = self.scheduler.depth
+                if self.publisher is not None:
+                    with metrics.time('publish'):
+                        self.publisher.publish(frame=frame, depth=output_data, timestamp=timestamp)
+                with metrics.time('normalize'):
+                    self.video_processor.normalize_output(output_data=output_data, frame=frame)
                 self.video_processor.calculate_fps()
-                self.video_processor.visualize()
+                metrics.count('frames')
+                self.publish_scheduler_stats()
+                metrics.publish(frame=self.video_processor.get_output())
+                with metrics.time('visualize'):
+                    self.video_processor.visualize()
                 if self.enable_storage:
-                    self.video_recorder.write_frame(frame=self.video_processor.get_output())
+                    with metrics.time('record'):
+                        self.video_recorder.write_frame(frame=self.video_processor.get_output(),
+                                                        depth=output_data, timestamp=timestamp, image=frame)
+                # Liberar la vista sobre el tensor de salida antes de la siguiente inferencia
+                del output_data
                 if self.video_processor.validate_stop():
                     break
+                self.handle_model_keys()
         finally:
             self.cleanup()
-            
+
+    def run_pipelined(self):
+        """
+        Ejecuta la estimación de profundidad como un pipeline. La captura, la inferencia, el
+        post-procesamiento y la grabación se ejecutan en hilos independientes conectados por
+        colas acotadas, de modo que el rendimiento queda limitado por la etapa más lenta y no por
+        la suma de todas. La visualización se mantiene en el hilo principal, ya que las ventanas
+        de OpenCV deben gestionarse desde él. La grabación se realiza en el hilo de escritura
+        del VideoRecorder, alimentado por su propia cola acotada.
+        """
+        stop_event = threading.Event()
+        frame_queue = BoundedQueue("captura->inferencia", self.queue_size, self.overflow_policy)
+        depth_queue = BoundedQueue("inferencia->post", self.queue_size, self.overflow_policy)
+        # La cola de visualización siempre bloquea: un frame descartado no devolvería su buffer
+        # de salida. Los frames se siguen descartando en las colas anteriores.
+        render_queue = BoundedQueue("post->render", self.queue_size, 'block')
+        queues = [frame_queue, depth_queue, render_queue]
+
+        stages = [
+            PipelineStage("captura", self._capture_stage, stop_event, output_queue=frame_queue),
+            PipelineStage("inferencia", self._inference_stage, stop_event,
+                          input_queue=frame_queue, output_queue=depth_queue),
+            PipelineStage("post-procesamiento", self._postprocess_stage, stop_event,
+                          input_queue=depth_queue, output_queue=render_queue),
+        ]
+        if self.enable_storage:
+            queues.append(self.video_recorder.queue)
+
+        start_time = time.perf_counter()
+        rendered = 0
+        try:
+            print("Iniciando estimación de fondo monocular (pipeline)")
+            for stage in stages:
+                stage.start()
+            while True:
+                item = render_queue.get(stop_event)
+                if item is END_OF_STREAM:
+                    break
+                output, output_data, timestamp, frame = item
+                self.video_processor.calculate_fps()
+                for bounded_queue in queues:
+                    self.metrics.set_gauge('queue_depth', bounded_queue.qsize(), label=bounded_queue.name)
+                    self.metrics.set_gauge('queue_dropped', bounded_queue.dropped, label=bounded_queue.name)
+                self.metrics.count('frames')
+                self.publish_scheduler_stats()
+                self.metrics.publish(frame=output)
+                with self.metrics.time('visualize'):
+                    self.video_processor.visualize(output=output)
+                rendered += 1
+                if self.enable_storage:
+                    with self.metrics.time('record'):
+                        self.video_recorder.write_frame(frame=output, depth=output_data, timestamp=timestamp,
+                                                        image=frame)
+                self.video_processor.release_output(output)
+                if self.video_processor.validate_stop():
+                    break
+                self.handle_model_keys()
+        finally:
+            stop_event.set()
+            for stage in stages:
+                stage.join()
+            elapsed = time.perf_counter() - start_time
+            self.report_pipeline_stats(stages, queues, rendered, elapsed)
+            self.cleanup()
+
+    def _capture_stage(self):
+        """
+        Etapa de captura del pipeline.
+
+        Returns:
+            tuple: El frame capturado y su marca de tiempo, o None si la fuente de video terminó.
+        """
+        try:
+            with self.metrics.time('camera_read'):
+                frame, timestamp = self.camera_manager.read()
+        except ValueError:
+            return None
+        self.publish_camera_stats()
+        return frame, timestamp
+
+    def _inference_stage(self, item):
+        """
+        Etapa de inferencia del pipeline.
+
+        Args:
+            item (tuple): Frame capturado y su marca de tiempo.
+
+        Returns:
+            tuple: El frame original, la salida del modelo y la marca de tiempo.
+        """
+        frame, timestamp = item
+        if self.model_registry is not None:
+            self.depth_model = self.model_registry.current(timestamp)
+        if self.scheduler is not None and not self.scheduler.should_infer(frame):
+            return frame, self.scheduler.depth, timestamp
+        with self.metrics.time('preprocess'):
+            self.depth_model.set_input_tensor(frame=frame)
+        with self.metrics.time('invoke'):
+            self.depth_model.invoke()
+        with self.metrics.time('get_output'):
+            output_data = self.depth_model.get_output_tensor()
+        if self.scheduler is not None:
+            # La salida es una copia que ninguna etapa modifica, por lo que puede compartirse
+            self.scheduler.store_depth(output_data, copy=False)
+        return frame, output_data, timestamp
+
+    def _postprocess_stage(self, item):
+        """
+        Etapa de post-procesamiento del pipeline.
+
+        Args:
+            item (tuple): El frame original, la salida del modelo y la marca de tiempo.
+
+        Returns:
+            tuple: El frame combinado con la predicción coloreada, la salida del modelo, la
+            marca de tiempo y el frame original.
+        """
+        frame, output_data, timestamp = item
+        if self.publisher is not None:
+            with self.metrics.time('publish'):
+                self.publisher.publish(frame=frame, depth=output_data, timestamp=timestamp)
+        with self.metrics.time('normalize'):
+            output = self.video_processor.normalize_output(output_data=output_data, frame=frame)
+        return output, output_data, timestamp, frame
+
+    def publish_camera_stats(self):
+        """
+        Publica los contadores de captura de la cámara en el registro de métricas.
+        """
+        stats = self.camera_manager.stats()
+        self.metrics.set_gauge('camera_dropped', stats['dropped'])
+        self.metrics.set_gauge('camera_reconnects', stats['reconnects'])
+
+    def handle_model_keys(self):
+        """
+        Pasa al siguiente modelo del registro cuando el usuario presiona 'm'.
+        """
+        if self.model_registry is not None and self.video_processor.last_key == ord('m'):
+            self.model_registry.request_next()
+
+    def publish_scheduler_stats(self):
+        """
+        Publica los contadores del planificador de inferencias en el registro de métricas.
+        """
+        if self.scheduler is None:
+            return
+        stats = self.scheduler.stats()
+        self.metrics.set_gauge('inferred_frames', stats['inferred'])
+        self.metrics.set_gauge('skipped_frames', stats['skipped'])
+        self.metrics.set_gauge('scene_change', self.scheduler.last_change)
+
+    @staticmethod
+    def report_pipeline_stats(stages, queues, rendered, elapsed):
+        """
+        Muestra el rendimiento del pipeline y la ocupación de cada etapa y cola.
+
+        Args:
+            stages (list): Etapas del pipeline.
+            queues (list): Colas entre etapas.
+            rendered (int): Cantidad de frames visualizados.
+            elapsed (float): Duración total del pipeline, en segundos.
+        """
+        fps = rendered / elapsed if elapsed > 0 else 0.0
+        print(f"Pipeline: {rendered} frames en {elapsed:.2f} s ({fps:.1f} FPS)")
+        for stage in stages:
+            stats = stage.stats(elapsed)
+            print(f"  Etapa {stats['name']}: {stats['processed']} frames, "
+                  f"{stats['mean_ms']:.1f} ms/frame, ocupación {100 * stats['utilization']:.0f}%")
+        for bounded_queue in queues:
+            stats = bounded_queue.stats()
+            print(f"  Cola {stats['name']}: ocupación media {stats['mean_occupancy']:.2f}/"
+                  f"{stats['maxsize']}, máxima {stats['max_occupancy']}, descartados {stats['dropped']}")
+
     def ask_for_frame_resolution(self):
         """
         Solicita al usuario que seleccione la resolución de la cámara y configura la cámara 
@@ -77,12 +362,19 @@ class DepthEstimationApp:
                 break
         # Configurar la resolución del administrador de cámara web
         self.resolution_option = int(choice)
-        self.camera_manager = CameraManager(source=0, resolution_option=self.resolution_option)
+        self.camera_manager = CameraManager(source=self.source, resolution_option=self.resolution_option,
+                                            **self.camera_options)
         
     def ask_for_video_recording(self):
         """
-        Solicita al usuario que habilite o deshabilite la grabación de video.
+        Solicita al usuario que habilite o deshabilite la grabación de video. Si se configuró
+        una nube de puntos, la grabación se habilita sin preguntar, ya que las nubes se
+        escriben desde el grabador.
         """
+        if self.point_cloud is not None:
+            print("\nGrabación habilitada: las nubes de puntos se graban junto al video")
+            self.enable_storage = True
+            return
         prompt_message = "\nHabilitar grabación de video:\n1 - Si\n2 - No\n"
         while True:
             choice = input(prompt_message)
@@ -96,7 +388,24 @@ class DepthEstimationApp:
         Libera los recursos utilizados por la aplicación, como la cámara y el grabador de video.
         """
         self.camera_manager.release()
+        stats = self.camera_manager.stats()
+        print(f"Cámara: {stats['captured']} frames capturados, {stats['dropped']} reemplazados por uno más "
+              f"reciente, {stats['reconnects']} reconexiones")
         if self.enable_storage:
             self.video_recorder.stop_recording()
         self.video_processor.release()
+        if self.publisher is not None:
+            self.publisher.close()
+            print(f"Memoria compartida: {self.publisher.published} frames publicados en '{self.publisher.name}'")
+        if self.model_registry is not None:
+            self.model_registry.close()
+            stats = self.model_registry.stats()
+            print(f"Modelos: {stats['swaps']} cambios (máximo {1000 * stats['max_swap_s']:.0f} ms), "
+                  f"{stats['dropped']} frames perdidos, {stats['evictions']} descartados, "
+                  f"{stats['memory_mb']:.0f} MB cargados")
+        self.metrics.close()
+        if self.scheduler is not None:
+            stats = self.scheduler.stats()
+            print(f"Inferencias: {stats['inferred']}, frames reutilizados: {stats['skipped']} "
+                  f"({100 * stats['skip_ratio']:.0f}%)")
         print("La estimación de fondo monocular ha finalizado")
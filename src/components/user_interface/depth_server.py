@@ -0,0 +1,425 @@
+import asyncio
+import concurrent.futures
+import io
+import json
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import cv2
+from src.components.processing.metrics import LatencyHistogram
+from src.components.processing.video_processor import VideoProcessor
+
+class ServerError(Exception):
+    """
+    Error de una solicitud que se devuelve al cliente con el código HTTP indicado.
+
+    Attributes:
+        status (int): Código de estado HTTP.
+    """
+    def __init__(self, status, message):
+        """
+        Inicializa el error.
+
+        Args:
+            status (int): Código de estado HTTP.
+            message (str): Descripción del error.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class DepthServer:
+    """
+    Servidor HTTP local basado en asyncio que expone el modelo de profundidad a otros servicios,
+    sobre TCP o sobre un socket Unix.
+
+    Las solicitudes concurrentes se acumulan en una ventana de agrupamiento dinámico: el lote se
+    ejecuta cuando reúne max_batch imágenes o cuando la solicitud más antigua esperó max_wait
+    segundos, con una sola llamada a invoke. La decodificación y la codificación se realizan en
+    un pool de hilos, y la inferencia en un único hilo dedicado al intérprete. Cuando hay
+    max_pending solicitudes en curso, las nuevas se rechazan de inmediato con 503 en lugar de
+    acumular latencia.
+
+    Endpoints:
+        POST /depth?format=float16|png16|color: el cuerpo es una imagen codificada (JPEG, PNG...)
+        o un array .npy uint8 de forma (alto, ancho, 3) en BGR, con Content-Type
+        application/x-npy. 'float16' devuelve la profundidad sin procesar con las cabeceras
+        X-Depth-Shape y X-Depth-Dtype; 'png16' la devuelve normalizada a uint16 en un PNG, con
+        el rango original en X-Depth-Min y X-Depth-Max; 'color' devuelve un JPEG con el mapa de
+        colores al tamaño de la imagen de entrada.
+        GET /health: estadísticas del servidor en JSON.
+
+    Attributes:
+        depth_model (TFLiteModelInterpreter): Intérprete compartido, con batch_size igual a max_batch.
+        max_batch (int): Cantidad máxima de imágenes por inferencia.
+        max_wait (float): Espera máxima de una solicitud para completar un lote, en segundos.
+        max_pending (int): Solicitudes en curso a partir de las cuales se rechazan las nuevas.
+        max_body_bytes (int): Tamaño máximo del cuerpo de una solicitud.
+        requests (int): Solicitudes respondidas correctamente.
+        rejected (int): Solicitudes rechazadas por sobrecarga.
+        batches (int): Inferencias realizadas.
+        batched_images (int): Imágenes procesadas en total por las inferencias.
+        latency (LatencyHistogram): Latencias de las solicitudes desde su admisión hasta la respuesta.
+    """
+    FORMATS = ('float16', 'png16', 'color')
+
+    def __init__(self, depth_model, max_batch=4, max_wait=0.005, max_pending=64, max_body_bytes=16 * 2**20,
+                 encode_workers=2):
+        """
+        Inicializa el servidor y ajusta el tamaño de lote del intérprete.
+
+        Args:
+            depth_model (TFLiteModelInterpreter): Intérprete del modelo de profundidad.
+            max_batch (int): Cantidad máxima de imágenes por inferencia.
+            max_wait (float): Espera máxima para completar un lote, en segundos.
+            max_pending (int): Cantidad máxima de solicitudes en curso.
+            max_body_bytes (int): Tamaño máximo del cuerpo de una solicitud, en bytes.
+            encode_workers (int): Hilos para decodificar y codificar imágenes.
+
+        Raises:
+            ValueError: Si los parámetros no son válidos o el modelo no admite el tamaño de lote.
+        """
+        if max_batch < 1 or max_pending < 1 or max_wait < 0:
+            raise ValueError("Error: max_batch y max_pending deben ser al menos 1 y max_wait no negativo.")
+        self.depth_model = depth_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.max_body_bytes = max_body_bytes
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_images = 0
+        self.latency = LatencyHistogram()
+        self._in_flight = 0
+        self.depth_model.resize_batch(max_batch)
+        self._pending = None
+        self._inference_executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="inferencia")
+        self._codec_executor = concurrent.futures.ThreadPoolExecutor(encode_workers, thread_name_prefix="codec")
+        # VideoProcessor reutiliza buffers internos, por lo que cada hilo usa el suyo
+        self._local = threading.local()
+
+    async def serve(self, host='127.0.0.1', port=8080, unix_socket=None):
+        """
+        Atiende solicitudes hasta que se cancele la tarea.
+
+        Args:
+            host (str): Dirección local en la que escuchar.
+            port (int): Puerto TCP.
+            unix_socket (str): Ruta de un socket Unix. Si se indica, se usa en lugar de TCP.
+        """
+        self._pending = asyncio.Queue()
+        batcher = asyncio.create_task(self._batch_loop())
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(self._handle_connection, path=unix_socket)
+            print(f"Servidor de profundidad escuchando en {unix_socket}")
+        else:
+            server = await asyncio.start_server(self._handle_connection, host=host, port=port)
+            print(f"Servidor de profundidad escuchando en http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._inference_executor.shutdown(wait=True)
+            self._codec_executor.shutdown(wait=True)
+
+    def run(self, host='127.0.0.1', port=8080, unix_socket=None):
+        """
+        Ejecuta el servidor hasta que el usuario lo interrumpa con Ctrl+C.
+
+        Args:
+            host (str): Dirección local en la que escuchar.
+            port (int): Puerto TCP.
+            unix_socket (str): Ruta de un socket Unix. Si se indica, se usa en lugar de TCP.
+        """
+        try:
+            asyncio.run(self.serve(host=host, port=port, unix_socket=unix_socket))
+        except KeyboardInterrupt:
+            pass
+        stats = self.stats()
+        print(f"Servidor detenido: {stats['requests']} solicitudes, {stats['rejected']} rechazadas, "
+              f"lote medio {stats['mean_batch']:.2f}/{self.max_batch}")
+
+    async def _batch_loop(self):
+        """
+        Reúne las solicitudes en lotes y ejecuta cada lote en el hilo del intérprete. Mientras
+        se ejecuta un lote, las solicitudes nuevas se acumulan para el siguiente.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch:
+                # Bajo carga la cola ya tiene solicitudes: se toman sin esperar
+                if not self._pending.empty():
+                    batch.append(self._pending.get_nowait())
+                    continue
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            frames = [frame for frame, _, _ in batch]
+            try:
+                outputs = await loop.run_in_executor(self._inference_executor, self._infer, frames)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_images += len(batch)
+            for (_, future, _), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+    def _infer(self, frames):
+        """
+        Ejecuta una inferencia sobre un lote.
+
+        Args:
+            frames (list): Imágenes BGR.
+
+        Returns:
+            ndarray: Una profundidad por imagen.
+        """
+        self.depth_model.set_input_batch(frames)
+        self.depth_model.invoke()
+        return self.depth_model.get_output_batch(len(frames))
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Atiende las solicitudes de una conexión, manteniéndola abierta entre solicitudes.
+
+        Args:
+            reader (asyncio.StreamReader): Flujo de lectura de la conexión.
+            writer (asyncio.StreamWriter): Flujo de escritura de la conexión.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                keep_alive = True
+                try:
+                    method, target, headers = self._parse_head(head)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    length = self._content_length(headers)
+                    if length > self.max_body_bytes:
+                        raise ServerError(413, "Error: El cuerpo de la solicitud es demasiado grande.")
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, extra, payload = await self._dispatch(method, target, headers, body)
+                except ServerError as e:
+                    status, content_type, extra, payload = e.status, 'text/plain', {}, str(e).encode()
+                    if e.status == 503:
+                        extra = {'Retry-After': '1'}
+                    # Tras un error de formato o un cuerpo rechazado la conexión queda desincronizada
+                    keep_alive = keep_alive and e.status not in (400, 413)
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    status, content_type, extra, payload = 500, 'text/plain', {}, f"Error: {e}".encode()
+                self._write_response(writer, status, content_type, extra, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _content_length(headers):
+        """
+        Obtiene el tamaño del cuerpo de la solicitud.
+
+        Args:
+            headers (dict): Cabeceras de la solicitud, en minúsculas.
+
+        Returns:
+            int: Tamaño del cuerpo en bytes, 0 si no se indica.
+
+        Raises:
+            ServerError: Si Content-Length no es un entero no negativo.
+        """
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ServerError(400, "Error: Content-Length no válido.")
+        return length
+
+    @staticmethod
+    def _parse_head(head):
+        """
+        Interpreta la línea de solicitud y las cabeceras HTTP.
+
+        Args:
+            head (bytes): Cabecera de la solicitud, terminada en una línea vacía.
+
+        Returns:
+            tuple: Método, ruta solicitada y diccionario de cabeceras en minúsculas.
+
+        Raises:
+            ServerError: Si la solicitud está mal formada.
+        """
+        try:
+            lines = head.decode('latin-1').split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            raise ServerError(400, "Error: Solicitud HTTP mal formada.")
+        return method, target, headers
+
+    async def _dispatch(self, method, target, headers, body):
+        """
+        Despacha una solicitud al endpoint correspondiente.
+
+        Args:
+            method (str): Método HTTP.
+            target (str): Ruta solicitada con su consulta.
+            headers (dict): Cabeceras en minúsculas.
+            body (bytes): Cuerpo de la solicitud.
+
+        Returns:
+            tuple: Código de estado, tipo de contenido, cabeceras adicionales y cuerpo de la respuesta.
+
+        Raises:
+            ServerError: Si la solicitud no es válida o el servidor está sobrecargado.
+        """
+        url = urlsplit(target)
+        if url.path == '/health' and method == 'GET':
+            return 200, 'application/json', {}, json.dumps(self.stats()).encode()
+        if url.path != '/depth':
+            raise ServerError(404, "Error: Ruta no encontrada.")
+        if method != 'POST':
+            raise ServerError(405, "Error: Se esperaba POST.")
+        output_format = parse_qs(url.query).get('format', ['float16'])[0]
+        if output_format not in self.FORMATS:
+            raise ServerError(400, f"Error: Formato no válido. Las opciones son {self.FORMATS}.")
+        # Control de admisión: rechazar antes de decodificar si hay demasiadas solicitudes en curso
+        if self._in_flight >= self.max_pending:
+            self.rejected += 1
+            raise ServerError(503, "Error: Servidor sobrecargado.")
+
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            frame = await loop.run_in_executor(self._codec_executor, self._decode, body,
+                                               headers.get('content-type', ''))
+            future = loop.create_future()
+            self._pending.put_nowait((frame, future, time.perf_counter()))
+            depth = await future
+            extra, payload = await loop.run_in_executor(self._codec_executor, self._encode, depth,
+                                                        output_format, frame.shape)
+        finally:
+            self._in_flight -= 1
+        self.requests += 1
+        self.latency.record(time.perf_counter() - start)
+        content_type = {'float16': 'application/octet-stream', 'png16': 'image/png', 'color': 'image/jpeg'}
+        return 200, content_type[output_format], extra, payload
+
+    @staticmethod
+    def _decode(body, content_type):
+        """
+        Decodifica el cuerpo de una solicitud a una imagen BGR.
+
+        Args:
+            body (bytes): Imagen codificada o array .npy.
+            content_type (str): Tipo de contenido de la solicitud.
+
+        Returns:
+            ndarray: Imagen BGR uint8.
+
+        Raises:
+            ServerError: Si el cuerpo no contiene una imagen válida.
+        """
+        if content_type.startswith('application/x-npy'):
+            try:
+                frame = np.load(io.BytesIO(body), allow_pickle=False)
+            except ValueError:
+                raise ServerError(400, "Error: El array .npy no es válido.")
+            if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 3:
+                raise ServerError(400, "Error: Se esperaba un array uint8 de forma (alto, ancho, 3).")
+            return frame
+        frame = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ServerError(400, "Error: No se pudo decodificar la imagen.")
+        return frame
+
+    def _encode(self, depth, output_format, frame_shape):
+        """
+        Codifica una profundidad en el formato solicitado.
+
+        Args:
+            depth (ndarray): Profundidad devuelta por el modelo.
+            output_format (str): 'float16', 'png16' o 'color'.
+            frame_shape (tuple): Forma de la imagen de entrada.
+
+        Returns:
+            tuple: Cabeceras adicionales y cuerpo de la respuesta.
+        """
+        depth = depth.squeeze()
+        if output_format == 'float16':
+            data = np.ascontiguousarray(depth, dtype=np.float16)
+            return {'X-Depth-Shape': ",".join(map(str, data.shape)), 'X-Depth-Dtype': 'float16'}, data.tobytes()
+        if output_format == 'png16':
+            low, high = float(depth.min()), float(depth.max())
+            scale = 65535.0 / (high - low) if high > low else 0.0
+            quantized = ((depth - low) * scale).round().astype(np.uint16)
+            _, encoded = cv2.imencode('.png', quantized)
+            return {'X-Depth-Min': repr(low), 'X-Depth-Max': repr(high)}, encoded.tobytes()
+        processor = getattr(self._local, 'video_processor', None)
+        if processor is None:
+            processor = self._local.video_processor = VideoProcessor()
+        colored = processor.colorize(output_data=depth, width=frame_shape[1], height=frame_shape[0])
+        _, encoded = cv2.imencode('.jpg', colored)
+        return {}, encoded.tobytes()
+
+    @staticmethod
+    def _write_response(writer, status, content_type, extra, payload, keep_alive):
+        """
+        Escribe una respuesta HTTP/1.1.
+
+        Args:
+            writer (asyncio.StreamWriter): Flujo de escritura de la conexión.
+            status (int): Código de estado.
+            content_type (str): Tipo de contenido.
+            extra (dict): Cabeceras adicionales.
+            payload (bytes): Cuerpo de la respuesta.
+            keep_alive (bool): Si es False se indica el cierre de la conexión.
+        """
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+        lines = [f"HTTP/1.1 {status} {reasons.get(status, '')}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(payload)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + payload)
+
+    def stats(self):
+        """
+        Devuelve las estadísticas del servidor.
+
+        Returns:
+            dict: Solicitudes atendidas, rechazadas y en curso, inferencias, tamaño
+            medio de lote y percentiles de latencia en milisegundos.
+        """
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'in_flight': self._in_flight,
+            'batches': self.batches,
+            'mean_batch': self.batched_images / self.batches if self.batches else 0.0,
+            'latency_ms': self.latency.summary(),
+        }
@@ -0,0 +1,430 @@
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+# Estados del bloque de memoria compartida, guardados en su cabecera
+STATE_OPEN = 0
+STATE_CLOSED = 1
+STATE_RECONFIGURED = 2
+
+RING_MAGIC = 0x474E4952  # 'RING'
+
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('state', '<u4'),
+    ('num_slots', '<i8'),
+    ('frame_shape', '<i8', (3,)),
+    ('depth_shape', '<i8', (2,)),
+    ('sequence', '<i8'),
+    ('first_sequence', '<i8'),
+], align=True)
+
+def slot_dtype(frame_shape, depth_shape):
+    """
+    Construye el tipo de dato de una posición del anillo.
+
+    Los campos 'begin' y 'end' forman un candado de secuencia: el productor escribe el número de
+    secuencia en 'begin' antes de copiar los datos y en 'end' después, de modo que una posición
+    es coherente para la secuencia n mientras ambos campos valgan n.
+
+    Args:
+        frame_shape (tuple): Forma del frame (alto, ancho, canales).
+        depth_shape (tuple): Forma del mapa de profundidad (alto, ancho).
+
+    Returns:
+        numpy.dtype: Tipo estructurado y alineado de una posición.
+    """
+    return np.dtype([
+        ('begin', '<i8'),
+        ('timestamp', '<f8'),
+        ('published', '<f8'),
+        ('frame', np.uint8, tuple(frame_shape)),
+        ('depth', '<f4', tuple(depth_shape)),
+        ('end', '<i8'),
+    ], align=True)
+
+def _attach(name):
+    """
+    Abre un bloque de memoria compartida existente sin registrarlo en el resource_tracker, que
+    de lo contrario lo eliminaría al terminar el proceso suscriptor.
+
+    Args:
+        name (str): Nombre del bloque.
+
+    Returns:
+        SharedMemory: El bloque abierto.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 no admite track
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class FramePublisher:
+    """
+    Publica cada frame de la cámara y su mapa de profundidad en un anillo de memoria compartida
+    (multiprocessing.shared_memory) para que otros procesos locales los lean sin copia.
+
+    El productor nunca espera a los lectores: escribe en la siguiente posición del anillo y
+    avanza el número de secuencia de la cabecera. Un lector lento detecta que sus frames fueron
+    sobrescritos mediante los números de secuencia de cada posición y salta al más antiguo aún
+    disponible. El bloque se crea al publicar el primer frame, ya que su tamaño depende de la
+    resolución de la cámara y del modelo; si alguna de las dos cambia, el bloque se recrea con
+    el mismo nombre y los suscriptores se vuelven a conectar.
+
+    Attributes:
+        name (str): Nombre del bloque de memoria compartida.
+        num_slots (int): Cantidad de posiciones del anillo.
+        frame_shape (tuple): Forma de los frames publicados, o None antes del primero.
+        depth_shape (tuple): Forma de los mapas de profundidad publicados, o None antes del primero.
+        published (int): Cantidad de frames publicados.
+    """
+    def __init__(self, name, num_slots=8):
+        """
+        Inicializa el publicador.
+
+        Args:
+            name (str): Nombre del bloque de memoria compartida que usan los suscriptores.
+            num_slots (int): Cantidad de posiciones del anillo. Un lector puede retrasarse hasta
+                             num_slots - 2 frames sin perder ninguno.
+
+        Raises:
+            ValueError: Si num_slots es menor que 3.
+        """
+        if num_slots < 3:
+            raise ValueError("Error: El anillo necesita al menos 3 posiciones.")
+        self.name = name
+        self.num_slots = num_slots
+        self.frame_shape = None
+        self.depth_shape = None
+        self.published = 0
+        self._shm = None
+        self._header = None
+        self._slots = None
+
+    def _create(self, frame_shape, depth_shape):
+        """
+        Crea el bloque de memoria compartida para las formas indicadas, reemplazando el anterior.
+        """
+        if self._shm is not None:
+            self._release(STATE_RECONFIGURED)
+        record = slot_dtype(frame_shape, depth_shape)
+        size = HEADER_DTYPE.itemsize + self.num_slots * record.itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # Bloque huérfano de una ejecución anterior que terminó sin liberarlo
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self._shm.buf)
+        self._slots = np.ndarray((self.num_slots,), dtype=record, buffer=self._shm.buf,
+                                 offset=HEADER_DTYPE.itemsize)
+        self._slots['begin'] = -1
+        self._slots['end'] = -1
+        self._header['num_slots'] = self.num_slots
+        self._header['frame_shape'] = frame_shape
+        self._header['depth_shape'] = depth_shape
+        # La numeración continúa entre bloques al cambiar de resolución
+        self._header['first_sequence'] = self.published
+        self._header['sequence'] = self.published - 1
+        self._header['state'] = STATE_OPEN
+        # El marcador se escribe al final para que los suscriptores no lean una cabecera incompleta
+        self._header['magic'] = RING_MAGIC
+        self.frame_shape = frame_shape
+        self.depth_shape = depth_shape
+
+    def publish(self, frame, depth, timestamp):
+        """
+        Copia el frame y su profundidad en la siguiente posición del anillo. No bloquea.
+
+        Args:
+            frame (ndarray): Frame BGR uint8 de forma (alto, ancho, 3).
+            depth (ndarray): Salida del modelo, por ejemplo de forma (1, alto, ancho, 1).
+            timestamp (float): Marca de tiempo monotónica (time.perf_counter) de captura.
+
+        Returns:
+            int: Número de secuencia del frame publicado.
+
+        Raises:
+            ValueError: Si la profundidad no es bidimensional tras quitar los ejes unitarios.
+        """
+        depth = np.squeeze(depth)
+        if depth.ndim != 2:
+            raise ValueError("Error: La profundidad publicada debe ser bidimensional.")
+        if frame.shape != self.frame_shape or depth.shape != self.depth_shape:
+            self._create(frame.shape, depth.shape)
+        sequence = self.published
+        index = sequence % self.num_slots
+        slots = self._slots
+        slots['begin'][index] = sequence
+        slots['timestamp'][index] = timestamp
+        slots['frame'][index] = frame
+        slots['depth'][index] = depth
+        slots['published'][index] = time.perf_counter()
+        slots['end'][index] = sequence
+        self._header['sequence'] = sequence
+        self.published += 1
+        return sequence
+
+    def _release(self, state):
+        """
+        Marca el bloque con el estado indicado y lo libera.
+        """
+        self._header['state'] = state
+        self._header = None
+        self._slots = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+        self.frame_shape = None
+        self.depth_shape = None
+
+    def close(self):
+        """
+        Indica a los suscriptores que la publicación terminó y elimina el bloque. Los
+        suscriptores conectados conservan su mapeo hasta cerrarlo.
+        """
+        if self._shm is not None:
+            self._release(STATE_CLOSED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+class SharedFrame:
+    """
+    Frame leído de un FramePublisher. frame y depth son vistas sin copia sobre la memoria
+    compartida, válidas hasta que el productor reutiliza la posición, es decir, durante al menos
+    num_slots - 2 publicaciones posteriores. Quien conserve las vistas más tiempo debe copiarlas
+    o comprobar valid después de usarlas.
+
+    Attributes:
+        sequence (int): Número de secuencia del frame.
+        timestamp (float): Marca de tiempo monotónica de captura.
+        published (float): Marca de tiempo monotónica de publicación.
+        frame (ndarray): Vista del frame BGR uint8.
+        depth (ndarray): Vista del mapa de profundidad float32.
+    """
+    __slots__ = ('sequence', 'timestamp', 'published', 'frame', 'depth', '_slots', '_index')
+
+    def __init__(self, sequence, slots, index):
+        self.sequence = sequence
+        self.timestamp = float(slots['timestamp'][index])
+        self.published = float(slots['published'][index])
+        self.frame = slots['frame'][index]
+        self.depth = slots['depth'][index]
+        self._slots = slots
+        self._index = index
+
+    @property
+    def valid(self):
+        """
+        bool: Indicador de si el productor todavía no sobrescribió la posición del frame.
+        """
+        return int(self._slots['begin'][self._index]) == self.sequence
+
+
+class FrameSubscriber:
+    """
+    Lee los frames publicados por un FramePublisher de otro proceso como vistas NumPy sin copia.
+
+    El suscriptor consulta la cabecera del anillo sin bloquear al productor. Si se retrasa más
+    de lo que el anillo permite, los frames sobrescritos se omiten y se cuentan en overruns y
+    skipped, en lugar de frenar la publicación.
+
+    Attributes:
+        name (str): Nombre del bloque de memoria compartida.
+        num_slots (int): Cantidad de posiciones del anillo.
+        frame_shape (tuple): Forma de los frames.
+        depth_shape (tuple): Forma de los mapas de profundidad.
+        received (int): Cantidad de frames leídos.
+        overruns (int): Cantidad de veces que el productor alcanzó al suscriptor.
+        skipped (int): Cantidad de frames perdidos por esos alcances.
+    """
+    def __init__(self, name, timeout=10.0, poll_interval=0.0005):
+        """
+        Se conecta a un anillo, esperando a que el productor publique el primer frame.
+
+        Args:
+            name (str): Nombre del bloque de memoria compartida.
+            timeout (float): Espera máxima hasta que el bloque exista, en segundos.
+            poll_interval (float): Pausa entre consultas de la cabecera, en segundos.
+
+        Raises:
+            TimeoutError: Si el bloque no existe tras timeout segundos.
+        """
+        self.name = name
+        self.poll_interval = poll_interval
+        self.received = 0
+        self.overruns = 0
+        self.skipped = 0
+        self._shm = None
+        self._header = None
+        self._slots = None
+        self._retired = []
+        self._attach(timeout)
+
+    def _attach(self, timeout):
+        """
+        Abre el bloque y construye las vistas de la cabecera y las posiciones.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                shm = _attach(self.name)
+                header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+                if header['magic'] == RING_MAGIC and header['state'] != STATE_RECONFIGURED:
+                    break
+                del header
+                shm.close()
+            except FileNotFoundError:
+                pass
+            except ValueError:
+                # Bloque recién creado, todavía sin truncar a su tamaño
+                pass
+            if time.perf_counter() >= deadline:
+                raise TimeoutError(f"Error: No se encontró el anillo de memoria compartida {self.name}.")
+            time.sleep(self.poll_interval)
+        self._shm = shm
+        self._header = header
+        self.num_slots = int(header['num_slots'])
+        self.frame_shape = tuple(int(dim) for dim in header['frame_shape'])
+        self.depth_shape = tuple(int(dim) for dim in header['depth_shape'])
+        self._slots = np.ndarray((self.num_slots,), dtype=slot_dtype(self.frame_shape, self.depth_shape),
+                                 buffer=shm.buf, offset=HEADER_DTYPE.itemsize)
+        # Los frames se leen a partir del siguiente que se publique
+        self._next = int(header['sequence']) + 1
+
+    def _detach(self):
+        """
+        Cierra el bloque actual. Si el usuario aún conserva vistas sobre él, el cierre se
+        reintenta más adelante.
+        """
+        self._header = None
+        self._slots = None
+        self._retired.append(self._shm)
+        self._shm = None
+        retired = []
+        for shm in self._retired:
+            try:
+                shm.close()
+            except BufferError:
+                retired.append(shm)
+        self._retired = retired
+
+    @property
+    def closed(self):
+        """
+        bool: Indicador de si el productor terminó la publicación.
+        """
+        return self._header is None or int(self._header['state']) == STATE_CLOSED
+
+    def read(self, timeout=None, latest=False):
+        """
+        Devuelve el siguiente frame publicado, esperando si todavía no está disponible.
+
+        Args:
+            timeout (float): Espera máxima en segundos, o None para esperar indefinidamente.
+            latest (bool): Si es True, devuelve el frame más reciente y descarta los anteriores
+                           no leídos, sin contarlos como perdidos.
+
+        Returns:
+            SharedFrame: El frame leído, o None si se agotó la espera o la publicación terminó.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            if self._header is None:
+                return None
+            # El estado se lee antes que la secuencia: si el bloque ya fue reemplazado o
+            # cerrado, la secuencia leída es la última que contiene
+            state = int(self._header['state'])
+            sequence = int(self._header['sequence'])
+            if sequence >= self._next:
+                item = self._try_read(sequence, latest)
+                if item is not None:
+                    return item
+                continue
+            if state == STATE_RECONFIGURED:
+                # El productor cambió de resolución: conectarse al nuevo bloque
+                self._detach()
+                try:
+                    self._attach(timeout=1.0)
+                except TimeoutError:
+                    return None
+                self._next = int(self._header['first_sequence'])
+                continue
+            if state == STATE_CLOSED:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _try_read(self, sequence, latest):
+        """
+        Lee el frame pendiente más antiguo (o el más reciente con latest), detectando si el
+        productor ya lo sobrescribió.
+
+        Args:
+            sequence (int): Último número de secuencia publicado.
+            latest (bool): Si es True, lee el frame más reciente.
+
+        Returns:
+            SharedFrame: El frame leído, o None si fue sobrescrito durante la lectura.
+        """
+        if latest:
+            self._next = sequence
+        else:
+            # La posición siguiente a la última publicada puede estar escribiéndose
+            oldest = sequence - self.num_slots + 2
+            if self._next < oldest:
+                self.overruns += 1
+                self.skipped += oldest - self._next
+                self._next = oldest
+        wanted = self._next
+        index = wanted % self.num_slots
+        if int(self._slots['end'][index]) != wanted:
+            # La posición ya pertenece a un frame posterior
+            self._next = wanted + 1
+            self.overruns += 1
+            self.skipped += 1
+            return None
+        item = SharedFrame(wanted, self._slots, index)
+        if int(self._slots['begin'][index]) != wanted:
+            self._next = wanted + 1
+            self.overruns += 1
+            self.skipped += 1
+            return None
+        self._next = wanted + 1
+        self.received += 1
+        return item
+
+    def stats(self):
+        """
+        Devuelve los contadores del suscriptor.
+
+        Returns:
+            dict: Frames recibidos, alcances del productor y frames perdidos.
+        """
+        return {'received': self.received, 'overruns': self.overruns, 'skipped': self.skipped}
+
+    def close(self):
+        """
+        Cierra el bloque de memoria compartida. Las vistas de los frames leídos dejan de ser
+        utilizables.
+        """
+        if self._shm is not None:
+            self._detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()